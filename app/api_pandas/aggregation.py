@@ -0,0 +1,634 @@
+"""
+Aggregation engine for the employee statistics endpoints.
+
+A ``StatisticsQuery`` groups employees by any number of dimensions and
+computes any number of metrics per group. It is compiled to a single
+``GROUP BY`` query when the database can express it, and otherwise to a
+single pandas ``groupby().agg()`` over the needed columns only. The named
+statistics of the original endpoints are predefined queries.
+"""
+import copy
+import json
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from operator import itemgetter
+
+from django.db import connection
+from django.db.models import (
+    Aggregate, Avg, Count, DateField, F, FloatField, Func, IntegerField, Max,
+    Min, StdDev, Sum, Value
+)
+from django.db.models.fields.json import KeyTextTransform
+from django.utils import timezone
+import numpy as np
+import pandas as pd
+
+from api_pandas.loaders import load_employee_frame
+from api_pandas.models import Employee
+from api_pandas.snapshot import employee_snapshot
+
+SQL_VENDORS = ('postgresql',)
+AGE_BAND_WIDTH = 10
+JSON_KEY = re.compile(r'^[A-Za-z0-9_-]+$')
+PERCENTILE = re.compile(r'^p(\d{1,2}(?:\.\d+)?)$')
+AGES_ON = ContextVar('ages_on', default=None)
+
+
+class StatisticsQueryError(ValueError):
+    pass
+
+
+class Percentile(Aggregate):
+    """PostgreSQL ``percentile_cont`` ordered-set aggregate."""
+
+    function = 'PERCENTILE_CONT'
+    name = 'Percentile'
+    template = (
+        '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    )
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+class Median(Percentile):
+    name = 'Median'
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, 0.5, **extra)
+
+
+def today():
+    """The date ages are reached on, in the current time zone.
+
+    Inside ``ages_on(date)``, that date instead.
+    """
+    return AGES_ON.get() or timezone.localdate()
+
+
+@contextmanager
+def ages_on(date):
+    """Compute ages on ``date`` instead of today."""
+    token = AGES_ON.set(date)
+    try:
+        yield
+    finally:
+        AGES_ON.reset(token)
+
+
+class AgeInYears(Func):
+    """Exact calendar age of a date column today, in whole years.
+
+    PostgreSQL's ``age()`` counts birthdays like ``calendar_ages``: an
+    employee born on February 29 turns a year older on March 1.
+    """
+
+    template = "CAST(date_part('year', age(%(expressions)s)) AS integer)"
+    output_field = IntegerField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(
+            Value(today(), output_field=DateField()), expression, **extra
+        )
+
+
+class AgeBand(Func):
+    """Lower bound of the band of ``bins`` an age falls in, or null."""
+
+    template = '(%(labels)s)[width_bucket(%(expressions)s, %(edges)s) + 1]'
+    output_field = IntegerField()
+
+    def __init__(self, expression, bins, **extra):
+        edges = ', '.join(str(int(edge)) for edge in bins)
+        super().__init__(
+            expression,
+            edges=f'ARRAY[{edges}]',
+            labels=f'ARRAY[NULL, {edges}]::integer[]',
+            **extra,
+        )
+
+
+def calendar_ages(births, on):
+    """Exact ages in whole years on the date ``on``, vectorized.
+
+    ``births`` holds ``datetime64`` dates or integer day numbers since
+    1970-01-01 (such as ``int32``); nothing is parsed. The ages of every
+    day from the earliest to the latest birth date are computed once, by
+    truncating the days to ``datetime64[M]`` and ``datetime64[Y]``, and
+    looked up by day number.
+    """
+    births = np.asarray(births)
+    if births.dtype.kind == 'M':
+        births = births.astype('datetime64[D]').view(np.int64)
+    if not births.size:
+        return np.zeros(0, dtype=np.int32)
+    first = births.min()
+    days = np.arange(first, births.max() + 1).astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    month = (months - years).astype(np.int32)
+    day = (days - months).astype(np.int32)
+    ages = on.year - 1970 - years.astype(np.int32)
+    # Not had this year's birthday yet.
+    ages -= month * 32 + day > (on.month - 1) * 32 + on.day - 1
+    return ages[births - first]
+
+
+def age_in_years(df):
+    births = df['date_of_birth'].to_numpy(dtype='datetime64[D]')
+    return pd.Series(calendar_ages(births, today()), index=df.index)
+
+
+def age_band(ages, bins):
+    """Lower bound of the band of ``bins`` each age falls in, or NaN.
+
+    Like ``calendar_ages``, bands are looked up by age rather than
+    searched for row by row.
+    """
+    values = ages.to_numpy()
+    codes = np.zeros(0, dtype=np.int16)
+    if values.size:
+        first = values.min()
+        bands = np.searchsorted(
+            bins, np.arange(first, values.max() + 1), side='right'
+        )
+        codes = (bands - 1).astype(np.int16)[values - first]
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=bins), index=ages.index
+    )
+
+
+def parse_bins(value):
+    try:
+        bins = [int(edge) for edge in split(value)]
+    except ValueError:
+        raise StatisticsQueryError(
+            "bins are whole years, e.g. bins=20,30,40."
+        ) from None
+    if bins != sorted(set(bins)) or any(edge < 0 for edge in bins):
+        raise StatisticsQueryError("bins must increase from 0 or more.")
+    return bins
+
+
+class Dimension:
+    """A value employees are grouped by.
+
+    ``industry``, ``years_of_experience``, ``age_band`` (decades of age,
+    or the bands starting at each of ``bins``, labelled by their lower
+    bound) or ``other_fields.<key>``.
+    """
+
+    names = ('industry', 'years_of_experience', 'age_band')
+
+    def __init__(self, name, bins=None):
+        self.name = name
+        self.bins = list(bins) if bins else None
+        self.json_key = None
+        if name.startswith('other_fields.'):
+            self.json_key = name.split('.', 1)[1]
+            if not JSON_KEY.match(self.json_key):
+                raise StatisticsQueryError(
+                    f"Invalid other_fields key {self.json_key!r}."
+                )
+        elif name not in self.names:
+            raise StatisticsQueryError(
+                f"Cannot group by {name!r}; choose from "
+                f"{', '.join(self.names)} or other_fields.<key>."
+            )
+
+    @property
+    def columns(self):
+        if self.json_key is not None:
+            return ['other_fields']
+        if self.name == 'age_band':
+            return ['date_of_birth']
+        return [self.name]
+
+    def expression(self):
+        if self.json_key is not None:
+            return KeyTextTransform(self.json_key, 'other_fields')
+        if self.name == 'age_band':
+            age = AgeInYears('date_of_birth')
+            if self.bins:
+                return AgeBand(age, self.bins)
+            return age / AGE_BAND_WIDTH * AGE_BAND_WIDTH
+        return F(self.name)
+
+    def series(self, df):
+        if self.json_key is not None:
+            return df['other_fields'].map(self.json_text)
+        if self.name == 'age_band':
+            ages = age_in_years(df)
+            if self.bins:
+                return age_band(ages, self.bins)
+            return ages // AGE_BAND_WIDTH * AGE_BAND_WIDTH
+        return df[self.name]
+
+    def json_text(self, value):
+        """Python counterpart of PostgreSQL's ``->>`` operator."""
+        if not isinstance(value, dict) or value.get(self.json_key) is None:
+            return None
+        value = value[self.json_key]
+        return value if isinstance(value, str) else json.dumps(value)
+
+
+class Metric:
+    """An aggregate computed per group.
+
+    Written ``<field>:<method>`` with ``field`` one of ``salary``, ``age``
+    or ``years_of_experience`` and ``method`` one of ``mean``, ``median``,
+    ``count``, ``distinct``, ``sum``, ``min``, ``max``, ``std`` or a
+    percentile such as ``p90``. ``count`` alone counts employees and
+    ``percentage`` gives each group's share of all matching employees.
+    """
+
+    fields = ('salary', 'age', 'years_of_experience')
+    methods = (
+        'mean', 'median', 'count', 'distinct', 'sum', 'min', 'max', 'std'
+    )
+
+    def __init__(self, method, field=None, name=None):
+        self.method = method
+        self.field = field
+        self.fraction = None
+        percentile = PERCENTILE.match(method)
+        if percentile:
+            self.fraction = float(percentile.group(1)) / 100
+        if field is None:
+            if method not in ('count', 'percentage'):
+                raise StatisticsQueryError(
+                    f"Metric {method!r} needs a field, e.g. salary:{method}."
+                )
+        elif field not in self.fields:
+            raise StatisticsQueryError(
+                f"Unknown metric field {field!r}; choose from "
+                f"{', '.join(self.fields)}."
+            )
+        elif method not in self.methods and self.fraction is None:
+            raise StatisticsQueryError(
+                f"Unknown metric {method!r}; choose from "
+                f"{', '.join(self.methods)} or a percentile such as p90."
+            )
+        self.name = name or (f'{field}_{method}' if field else method)
+
+    @classmethod
+    def parse(cls, spec):
+        field, _, method = spec.rpartition(':')
+        return cls(method, field or None)
+
+    @property
+    def columns(self):
+        if self.field == 'age':
+            return ['date_of_birth']
+        return [self.field] if self.field else []
+
+    def expression(self):
+        if self.field == 'age':
+            return AgeInYears('date_of_birth')
+        return F(self.field)
+
+    def output_field(self):
+        if self.field == 'salary':
+            return FloatField()
+        return IntegerField()
+
+    def aggregate(self):
+        if self.field is None:
+            return Count('pk')
+        expression = self.expression()
+        if self.fraction is not None:
+            return Percentile(expression, self.fraction)
+        aggregates = {
+            'mean': lambda: Avg(expression, output_field=FloatField()),
+            'median': lambda: Median(expression),
+            'count': lambda: Count(expression),
+            'distinct': lambda: Count(expression, distinct=True),
+            'sum': lambda: Sum(expression, output_field=self.output_field()),
+            'min': lambda: Min(expression, output_field=self.output_field()),
+            'max': lambda: Max(expression, output_field=self.output_field()),
+            'std': lambda: StdDev(
+                expression, sample=True, output_field=FloatField()
+            ),
+        }
+        return aggregates[self.method]()
+
+    def named_aggregation(self, column):
+        """``(column, function)`` for ``DataFrameGroupBy.agg``."""
+        if self.fraction is not None:
+            fraction = self.fraction
+            return column, lambda values: values.quantile(fraction)
+        if self.method == 'distinct':
+            return column, 'nunique'
+        return column, self.method
+
+
+class StatisticsQuery:
+    """Metrics per combination of dimension values, in one pass."""
+
+    def __init__(self, group_by, metrics, ordering=None, bins=None):
+        if not metrics:
+            raise StatisticsQueryError("Ask for at least one metric.")
+        self.group_by = [
+            dimension if isinstance(dimension, Dimension)
+            else Dimension(
+                dimension, bins if dimension == 'age_band' else None
+            )
+            for dimension in group_by
+        ]
+        if bins and not any(d.name == 'age_band' for d in self.group_by):
+            raise StatisticsQueryError("bins apply to group_by=age_band.")
+        self.metrics = [
+            metric if isinstance(metric, Metric) else Metric.parse(metric)
+            for metric in metrics
+        ]
+        names = self.names
+        if len(set(names)) != len(names):
+            raise StatisticsQueryError("Duplicate dimension or metric.")
+        self.ordering = ordering or [
+            dimension.name for dimension in self.group_by
+        ]
+        for key in self.ordering:
+            if key.lstrip('-') not in names:
+                raise StatisticsQueryError(f"Cannot order by {key!r}.")
+
+    @classmethod
+    def parse(cls, group_by='', metrics='', ordering='', bins=''):
+        return cls(
+            split(group_by), split(metrics), split(ordering), parse_bins(bins)
+        )
+
+    @property
+    def names(self):
+        return [
+            *(dimension.name for dimension in self.group_by),
+            *(metric.name for metric in self.metrics),
+        ]
+
+    @property
+    def columns(self):
+        columns = []
+        for item in [*self.group_by, *self.metrics]:
+            columns.extend(c for c in item.columns if c not in columns)
+        return columns or ['id']
+
+    @property
+    def depends_on_today(self):
+        """Whether the results change with the date, as ages do."""
+        return any(
+            dimension.name == 'age_band' for dimension in self.group_by
+        ) or any(metric.field == 'age' for metric in self.metrics)
+
+    @property
+    def needs_total(self):
+        return any(metric.method == 'percentage' for metric in self.metrics)
+
+    def query(self, queryset):
+        groups = {
+            f'group_{i}': dimension.expression()
+            for i, dimension in enumerate(self.group_by)
+        }
+        aggregates = {'group_count': Count('pk')}
+        aggregates.update(
+            (f'metric_{i}', metric.aggregate())
+            for i, metric in enumerate(self.metrics)
+            if metric.method != 'percentage'
+        )
+        queryset = queryset.order_by()
+        if not groups:
+            row = queryset.aggregate(**aggregates)
+            return self.records([row], row['group_count'])
+        queryset = queryset.annotate(**groups)
+        if not self.needs_total:
+            queryset = queryset.filter(**{
+                f'{alias}__isnull': False for alias in groups
+            })
+        rows = list(queryset.values(*groups).annotate(**aggregates))
+        # Employees outside every group still count toward the total.
+        return self.records(rows, sum(row['group_count'] for row in rows))
+
+    def frame(self, df):
+        df = df.copy(deep=False)
+        keys = []
+        for i, dimension in enumerate(self.group_by):
+            df[f'group_{i}'] = dimension.series(df)
+            keys.append(f'group_{i}')
+        if not keys:
+            df['group_all'] = 0
+            keys.append('group_all')
+        if any(metric.field == 'age' for metric in self.metrics):
+            df['age'] = age_in_years(df)
+        rows = self.columns[0]
+        aggregations = {'group_count': (rows, 'size')}
+        for i, metric in enumerate(self.metrics):
+            if metric.method == 'percentage':
+                continue
+            column = metric.field or rows
+            if metric.method == 'count' and not metric.field:
+                aggregations[f'metric_{i}'] = (column, 'size')
+            else:
+                aggregations[f'metric_{i}'] = metric.named_aggregation(column)
+            if metric.method == 'sum':
+                # Like SQL, the sum of no values is null rather than 0.
+                aggregations[f'nonnull_{i}'] = (column, 'count')
+        grouped = df.groupby(keys, observed=True, sort=False).agg(
+            **aggregations
+        )
+        for i, metric in enumerate(self.metrics):
+            if metric.method == 'sum':
+                grouped[f'metric_{i}'] = grouped[f'metric_{i}'].where(
+                    grouped[f'nonnull_{i}'] > 0
+                )
+        rows = grouped.reset_index().to_dict(orient='records')
+        return self.records(rows, len(df))
+
+    def records(self, rows, total):
+        records = []
+        for row in rows:
+            groups = [
+                python_value(row[f'group_{i}'])
+                for i in range(len(self.group_by))
+            ]
+            if None in groups:
+                continue
+            record = {
+                dimension.name: value
+                for dimension, value in zip(self.group_by, groups)
+            }
+            for i, metric in enumerate(self.metrics):
+                if metric.method == 'percentage':
+                    value = (
+                        row['group_count'] / total * 100 if total else None
+                    )
+                else:
+                    value = python_value(row[f'metric_{i}'])
+                record[metric.name] = value
+            records.append(record)
+        return sort_records(records, self.ordering)
+
+    def run(self, queryset=None):
+        if queryset is None:
+            queryset = Employee.objects.all()
+        # Grouping by other_fields keys stays in SQL, which extracts the
+        # keys server-side instead of decoding every blob in Python.
+        in_sql = supports_sql()
+        if employee_snapshot.usable(queryset, self.columns) and not (
+            in_sql and 'other_fields' in self.columns
+        ):
+            return self.frame(employee_snapshot.frame(self.columns))
+        if in_sql:
+            return self.query(queryset)
+        return self.frame(
+            load_employee_frame(self.columns, queryset.order_by())
+        )
+
+
+def split(value):
+    if isinstance(value, (list, tuple)):
+        value = ','.join(value)
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def python_value(value):
+    if value is None or value is pd.NA:
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def sort_records(records, ordering):
+    """Sort on each key in turn, keeping missing values last."""
+    for key in reversed(ordering):
+        descending = key.startswith('-')
+        key = key.lstrip('-')
+        present = [record for record in records if record[key] is not None]
+        missing = [record for record in records if record[key] is None]
+        present.sort(key=itemgetter(key), reverse=descending)
+        records = present + missing
+    return records
+
+
+STATISTICS = {
+    'average-age': StatisticsQuery(
+        ['industry'], [Metric('mean', 'age', name='age')]
+    ),
+    'average-salary': StatisticsQuery(
+        ['industry'], [Metric('mean', 'salary', name='salary')]
+    ),
+    'average-salary-experience': StatisticsQuery(
+        ['years_of_experience'], [Metric('mean', 'salary', name='salary')]
+    ),
+    'median-salary': StatisticsQuery(
+        ['industry'], [Metric('median', 'salary', name='salary')]
+    ),
+    'percentage-employees': StatisticsQuery(
+        ['industry'],
+        [Metric('percentage')],
+        ordering=['-percentage', 'industry'],
+    ),
+}
+
+
+def supports_sql(using=connection):
+    return using.vendor in SQL_VENDORS
+
+
+def compute_statistic(name, queryset=None):
+    """Evaluate the statistic registered as ``name`` over ``queryset``."""
+    return STATISTICS[name].run(queryset)
+
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+def compute_statistics(names, queryset=None):
+    """Evaluate several named statistics in as few passes as possible.
+
+    On SQL databases, statistics sharing their dimensions are merged into
+    one ``GROUP BY``. Otherwise the union of their columns is loaded once,
+    or taken from the employee snapshot, and every statistic is computed
+    from that frame. Returns the results by name and metadata with the
+    time spent in each step.
+    """
+    for name in names:
+        if name not in STATISTICS:
+            raise StatisticsQueryError(
+                f"Unknown statistic {name!r}; choose from "
+                f"{', '.join(STATISTICS)}."
+            )
+    if queryset is None:
+        queryset = Employee.objects.all()
+    started = time.perf_counter()
+    columns = []
+    for name in names:
+        columns.extend(
+            c for c in STATISTICS[name].columns if c not in columns
+        )
+    if employee_snapshot.usable(queryset, columns):
+        results, meta = _shared_frame(names, columns, queryset, True)
+    elif supports_sql():
+        results, meta = _merged_sql(names, queryset)
+    else:
+        results, meta = _shared_frame(names, columns, queryset)
+    meta['total_ms'] = elapsed_ms(started)
+    return results, meta
+
+
+def _merged_sql(names, queryset):
+    passes = defaultdict(list)
+    for name in names:
+        dimensions = tuple(d.name for d in STATISTICS[name].group_by)
+        passes[dimensions].append(name)
+    results = {}
+    meta = {'engine': 'sql', 'passes': [], 'timings_ms': {}}
+    for dimensions, members in passes.items():
+        metrics = []
+        for name in members:
+            for metric in STATISTICS[name].metrics:
+                metric = copy.copy(metric)
+                metric.name = f'{name}:{metric.name}'
+                metrics.append(metric)
+        started = time.perf_counter()
+        records = StatisticsQuery(list(dimensions), metrics).run(queryset)
+        took = elapsed_ms(started)
+        meta['passes'].append({'statistics': members, 'ms': took})
+        for name in members:
+            statistic = STATISTICS[name]
+            results[name] = sort_records(
+                [
+                    {
+                        **{d: record[d] for d in dimensions},
+                        **{
+                            metric.name: record[f'{name}:{metric.name}']
+                            for metric in statistic.metrics
+                        },
+                    }
+                    for record in records
+                ],
+                statistic.ordering,
+            )
+            meta['timings_ms'][name] = took
+    return results, meta
+
+
+def _shared_frame(names, columns, queryset, snapshot=False):
+    meta = {'engine': 'snapshot' if snapshot else 'pandas', 'timings_ms': {}}
+    started = time.perf_counter()
+    if snapshot:
+        df = employee_snapshot.frame(columns)
+    else:
+        df = load_employee_frame(columns, queryset.order_by())
+    meta['timings_ms']['load'] = elapsed_ms(started)
+    results = {}
+    for name in names:
+        started = time.perf_counter()
+        results[name] = STATISTICS[name].frame(df)
+        meta['timings_ms'][name] = elapsed_ms(started)
+    return results, meta
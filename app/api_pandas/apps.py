@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApiPandasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api_pandas'
+
+    def ready(self):
+        from api_pandas import signals  # noqa: F401
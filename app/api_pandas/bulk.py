@@ -0,0 +1,92 @@
+"""
+Batched inserts and upserts of validated employee rows.
+
+Each batch is written with a single ``INSERT ... ON CONFLICT (id)``
+statement. If the database rejects the batch, its rows are retried one by
+one inside savepoints so a single bad row only fails itself.
+"""
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from api_pandas.models import (
+    Employee, allocate_employee_ids, sync_employee_id_sequence
+)
+
+CREATED = 'created'
+UPDATED = 'updated'
+SKIPPED = 'skipped'
+
+
+def upsert_sql(columns, count, update):
+    quote = connection.ops.quote_name
+    placeholders = '(%s)' % ', '.join(['%s'] * len(columns))
+    if update:
+        conflict = 'DO UPDATE SET ' + ', '.join(
+            f'{quote(column)} = EXCLUDED.{quote(column)}'
+            for column in columns
+            if column != 'id'
+        )
+    else:
+        conflict = 'DO NOTHING'
+    return (
+        f'INSERT INTO {quote(Employee._meta.db_table)} '
+        f'({", ".join(map(quote, columns))}) '
+        f'VALUES {", ".join([placeholders] * count)} '
+        f'ON CONFLICT ({quote("id")}) {conflict} '
+        f'RETURNING {quote("id")}, (xmax = 0)'
+    )
+
+
+def execute_upsert(rows, update):
+    fields = Employee._meta.concrete_fields
+    # auto_now is only applied by Model.save().
+    rows = [{**row, 'updated_at': timezone.now()} for row in rows]
+    params = [
+        field.get_db_prep_save(row.get(field.attname), connection)
+        for row in rows
+        for field in fields
+    ]
+    sql = upsert_sql([field.column for field in fields], len(rows), update)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return dict(cursor.fetchall())
+
+
+def write_employees(rows, update=True):
+    """Insert or update validated employee rows.
+
+    Rows with an ``id`` first move the sequence past it, then rows without
+    one receive a block of ids from the sequence. Returns a list with, for
+    every row, ``'created'``, ``'updated'``, ``'skipped'`` (an existing id
+    when ``update`` is false) or the database error message.
+    """
+    rows = [dict(row) for row in rows]
+    if not rows:
+        return []
+    explicit_ids = [row['id'] for row in rows if row.get('id')]
+    if explicit_ids:
+        sync_employee_id_sequence(max(explicit_ids))
+    new_rows = [row for row in rows if not row.get('id')]
+    for row, pk in zip(new_rows, allocate_employee_ids(len(new_rows))):
+        row['id'] = pk
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                written = execute_upsert(rows, update)
+            return [outcome(written, row) for row in rows]
+        except DatabaseError:
+            pass
+        results = []
+        for row in rows:
+            try:
+                with transaction.atomic():
+                    results.append(outcome(execute_upsert([row], update), row))
+            except DatabaseError as exc:
+                results.append(str(exc).strip())
+        return results
+
+
+def outcome(written, row):
+    if row['id'] not in written:
+        return SKIPPED
+    return CREATED if written[row['id']] else UPDATED
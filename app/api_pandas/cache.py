@@ -0,0 +1,489 @@
+"""
+Statistics cache with invalidation on Employee writes.
+
+Results are stored per statistic and query parameters in a pluggable
+backend selected by ``settings.STATISTICS_CACHE``:
+
+* ``'lru'`` - an in-process LRU with a TTL;
+* ``'django'`` - any Django cache alias (local memory, file based, ...),
+  which also invalidates across processes when the cache is shared.
+
+Every key embeds a generation number that is bumped after each committed
+write, so invalidation is O(1). Counts and salary sums per industry and per
+years of experience are additionally kept as running totals that signals
+update in place, which makes averages and percentages O(1) to serve.
+
+Fresh materialized summaries (see ``api_pandas.summary``) take precedence
+over both. Only committed state is cached: reads inside a transaction
+bypass the cache and deltas are applied from ``transaction.on_commit``.
+
+Misses are computed single-flight: concurrent requests for the same
+statistic and parameters wait for one computation. With the ``'django'``
+backend on PostgreSQL, processes also queue on an advisory lock and reuse
+the result the first one stored. With ``STALE_TIMEOUT`` set, the previous
+result is served for that many seconds after it was computed while a
+background thread recomputes it.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from api_pandas.aggregation import compute_statistic
+from api_pandas.models import (
+    Employee, EmployeeDataVersion, bump_data_version
+)
+from api_pandas.singleflight import SingleFlight
+from api_pandas.snapshot import announce_change, employee_snapshot
+from api_pandas.summary import mark_stale, summary_statistic
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKEND': 'lru',
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'MAX_ENTRIES': 256,
+    'KEY_PREFIX': 'statistics',
+    'SINGLE_FLIGHT': True,
+    'LOCK_TIMEOUT': 30,
+    'STALE_TIMEOUT': 0,
+}
+
+
+def cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'STATISTICS_CACHE', {})}
+
+
+class LRUBackend:
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl``.
+
+    Stale copies, kept for ``stale_ttl`` seconds, survive generation bumps.
+    """
+
+    shared = False
+
+    def __init__(self, max_entries, ttl, stale_ttl=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._stale = OrderedDict()
+        self._generation = 1
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stale(self, key):
+        with self._lock:
+            entry = self._stale.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[1]
+
+    def set_stale(self, key, value):
+        with self._lock:
+            self._stale[key] = (time.monotonic() + self.stale_ttl, value)
+            self._stale.move_to_end(key)
+            while len(self._stale) > self.max_entries:
+                self._stale.popitem(last=False)
+
+    def generation(self):
+        return self._generation
+
+    def bump(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            return self._generation
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stale.clear()
+
+
+class DjangoCacheBackend:
+    """Adapter storing entries in one of Django's configured caches."""
+
+    shared = True
+
+    def __init__(self, alias, ttl, prefix, stale_ttl=0):
+        self.cache = caches[alias]
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.generation_key = f'{prefix}:generation'
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.ttl)
+
+    def get_stale(self, key):
+        return self.cache.get(key)
+
+    def set_stale(self, key, value):
+        self.cache.set(key, value, self.stale_ttl)
+
+    def generation(self):
+        return self.cache.get_or_set(self.generation_key, 1, None)
+
+    def bump(self):
+        try:
+            return self.cache.incr(self.generation_key)
+        except ValueError:
+            self.cache.add(self.generation_key, 1, None)
+            return self.cache.incr(self.generation_key)
+
+    def clear(self):
+        self.bump()
+
+
+class RunningTotals:
+    """Employee counts and salary sums per industry and experience bucket.
+
+    Served statistics are computed from these sums without touching the
+    database. Totals are tied to the cache generation they were seeded at;
+    a write committed by another process moves the generation on and the
+    totals are reseeded on next use. They also record the data version they
+    reflect, read in the same snapshot as the sums; every write folded in
+    moves it to the version that write committed, and writes the seed
+    already saw are skipped, so a request can tell whether the totals match
+    its version.
+    """
+
+    dimensions = {
+        'industry': 'average-salary',
+        'years_of_experience': 'average-salary-experience',
+    }
+    served = {*dimensions.values(), 'percentage-employees'}
+
+    def __init__(self, generation, expires, version=None):
+        self.generation = generation
+        self.expires = expires
+        self.version = version
+        self.employees = 0
+        self.buckets = {
+            dimension: defaultdict(lambda: [0, Decimal(0), 0])
+            for dimension in self.dimensions
+        }
+
+    @classmethod
+    def seed(cls, generation, ttl):
+        # One snapshot for the version and the sums, so writes committing
+        # meanwhile are either counted in both or folded in afterwards.
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ'
+                    )
+            return cls._seed(generation, ttl)
+
+    @classmethod
+    def _seed(cls, generation, ttl):
+        version = EmployeeDataVersion.objects.filter(pk=1).values_list(
+            'version', flat=True
+        ).first()
+        totals = cls(generation, time.monotonic() + ttl, version or 0)
+        for dimension, buckets in totals.buckets.items():
+            rows = (
+                Employee.objects.order_by()
+                .values(dimension)
+                .annotate(
+                    count=Count('pk'),
+                    salary_sum=Sum('salary'),
+                    salary_count=Count('salary'),
+                )
+            )
+            for row in rows:
+                buckets[row[dimension]] = [
+                    row['count'],
+                    row['salary_sum'] or Decimal(0),
+                    row['salary_count'],
+                ]
+        totals.employees = sum(
+            bucket[0] for bucket in totals.buckets['industry'].values()
+        )
+        return totals
+
+    def apply(self, row, sign):
+        if row is None:
+            return
+        self.employees += sign
+        for dimension, buckets in self.buckets.items():
+            bucket = buckets[row[dimension]]
+            bucket[0] += sign
+            if row['salary'] is not None:
+                bucket[1] += sign * Decimal(row['salary'])
+                bucket[2] += sign
+
+    def statistic(self, name):
+        for dimension, statistic in self.dimensions.items():
+            if name == statistic:
+                return self._average_salary(dimension)
+        if name == 'percentage-employees':
+            return self._percentage_per_industry()
+        return None
+
+    def _average_salary(self, dimension):
+        return [
+            {
+                dimension: key,
+                'salary': float(total / count) if count else None,
+            }
+            for key, (employees, total, count) in sorted(
+                self._populated(dimension)
+            )
+        ]
+
+    def _percentage_per_industry(self):
+        rows = sorted(
+            self._populated('industry'),
+            key=lambda item: (-item[1][0], item[0]),
+        )
+        return [
+            {
+                'industry': key,
+                'percentage': employees / self.employees * 100,
+            }
+            for key, (employees, _, _) in rows
+        ]
+
+    def _populated(self, dimension):
+        return [
+            (key, bucket)
+            for key, bucket in self.buckets[dimension].items()
+            if key is not None and bucket[0] > 0
+        ]
+
+
+class StatisticsCache:
+    def __init__(self):
+        self._backend = None
+        self._totals = None
+        self._lock = threading.Lock()
+        self._revalidating = {}
+        self.flight = SingleFlight()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            options = cache_settings()
+            if options['BACKEND'] == 'django':
+                self._backend = DjangoCacheBackend(
+                    options['ALIAS'],
+                    options['TIMEOUT'],
+                    options['KEY_PREFIX'],
+                    options['STALE_TIMEOUT'],
+                )
+            elif options['BACKEND'] == 'lru':
+                self._backend = LRUBackend(
+                    options['MAX_ENTRIES'],
+                    options['TIMEOUT'],
+                    options['STALE_TIMEOUT'],
+                )
+            else:
+                raise ValueError(
+                    f"Unknown statistics cache backend {options['BACKEND']!r}"
+                )
+        return self._backend
+
+    def key(self, generation, name, params, version=None):
+        # Values may be sequences, for repeated query parameters.
+        query = urlencode(sorted((params or {}).items()), doseq=True)
+        prefix = cache_settings()['KEY_PREFIX']
+        if version is not None:
+            generation = f'{generation}@{version}'
+        return f'{prefix}:{generation}:{name}:{query}'
+
+    def stale_key(self, name, params):
+        return self.key('stale', name, params)
+
+    def peek(self, name, params=None, version=None):
+        """Return the statistic ``name`` if it is served without computing.
+
+        That is from the summaries, the running totals or a cached result;
+        otherwise ``None``. With ``version``, only a result reflecting that
+        data version is returned.
+        """
+        if not params:
+            result = summary_statistic(name)
+            if result is not None:
+                return result
+        if connection.in_atomic_block:
+            return None
+        generation = self.backend.generation()
+        if not params and name in RunningTotals.served:
+            totals = self.totals(generation, version)
+            if version is None or totals.version == version:
+                return totals.statistic(name)
+            return None
+        return self.backend.get(self.key(generation, name, params, version))
+
+    def get(self, name, params=None, compute=None, version=None):
+        """Return the statistic ``name``, computing it on a cache miss.
+
+        ``compute`` evaluates the statistic for ``params``; it defaults to
+        the named statistic over every employee. ``version``, the data
+        version the caller read, is part of the cache key, so results match
+        it even when another process wrote since they were cached here.
+        """
+        if compute is None:
+            def compute():
+                return compute_statistic(name)
+        result = self.peek(name, params, version)
+        if result is not None:
+            return result
+        if connection.in_atomic_block:
+            return compute()
+        key = self.key(self.backend.generation(), name, params, version)
+        if cache_settings()['STALE_TIMEOUT']:
+            result = self.backend.get_stale(self.stale_key(name, params))
+            if result is not None:
+                self.revalidate(key, name, params, compute)
+                return result
+        return self.fill(key, name, params, compute)
+
+    def fill(self, key, name, params, compute):
+        """Compute and store the entry ``key``, once across callers."""
+        def run():
+            with employee_snapshot.reads() as reads:
+                result = compute()
+            if reads.outdated:
+                # Served while the snapshot catches up; not worth keeping.
+                return result
+            self.backend.set(key, result)
+            if self.backend.stale_ttl:
+                self.backend.set_stale(self.stale_key(name, params), result)
+            return result
+
+        options = cache_settings()
+        if not options['SINGLE_FLIGHT']:
+            return run()
+        return self.flight.do(
+            key,
+            run,
+            recheck=lambda: self.backend.get(key),
+            lock=self.backend.shared and connection.vendor == 'postgresql',
+            timeout=options['LOCK_TIMEOUT'],
+        )
+
+    def revalidate(self, key, name, params, compute):
+        """Recompute ``key`` in a background thread unless one already is."""
+        def refresh():
+            try:
+                self.fill(key, name, params, compute)
+            except Exception:
+                logger.exception("Revalidating statistic %s failed", name)
+            finally:
+                with self._lock:
+                    self._revalidating.pop(key, None)
+                # The thread opened its own database connection.
+                connection.close()
+
+        with self._lock:
+            if key in self._revalidating:
+                return
+            thread = threading.Thread(
+                target=refresh, name='statistics-revalidate', daemon=True
+            )
+            self._revalidating[key] = thread
+        thread.start()
+
+    def wait(self, timeout=None):
+        """Block until running background revalidations have finished."""
+        with self._lock:
+            threads = list(self._revalidating.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def totals(self, generation, version=None):
+        with self._lock:
+            totals = self._totals
+            if (
+                totals is None
+                or totals.generation != generation
+                or totals.expires < time.monotonic()
+                or version is not None and totals.version != version
+            ):
+                totals = RunningTotals.seed(
+                    generation, cache_settings()['TIMEOUT']
+                )
+                self._totals = totals
+            return totals
+
+    def record_write(self, old, new, version):
+        """Invalidate entries and fold one row change into the totals.
+
+        ``old`` and ``new`` are the row's statistic fields before and after
+        the write, ``None`` for a create or a delete respectively;
+        ``version`` is the data version the write committed.
+        """
+        with self._lock:
+            previous = self.backend.generation()
+            generation = self.backend.bump()
+            totals = self._totals
+            if totals is None:
+                return
+            if totals.generation != previous:
+                self._totals = None
+                return
+            totals.generation = generation
+            if version <= totals.version:
+                return
+            totals.apply(old, -1)
+            totals.apply(new, 1)
+            totals.version = version
+
+    def invalidate(self):
+        """Drop every cached result, e.g. after a bulk write."""
+        with self._lock:
+            self.backend.bump()
+            self._totals = None
+
+    def reset(self):
+        self.wait()
+        with self._lock:
+            self._backend = None
+            self._totals = None
+        self.flight.reset()
+
+
+statistics_cache = StatisticsCache()
+
+
+def get_statistic(name, params=None, compute=None, version=None):
+    return statistics_cache.get(name, params, compute, version)
+
+
+def invalidate_statistics(using=None):
+    bump_data_version(using or 'default')
+    mark_stale()
+    announce_change(using or 'default')
+    transaction.on_commit(statistics_cache.invalidate, using=using)
@@ -0,0 +1,116 @@
+"""
+Conditional GET for the employee and statistics endpoints.
+
+Every Employee write bumps the single ``EmployeeDataVersion`` row, in the
+writing transaction when there is one. ETag and Last-Modified are derived
+from that row, read once per request before anything else, so a response
+is never tagged with a version newer than the data it was built from.
+Django's ``condition`` decorator then answers a matching If-None-Match or
+If-Modified-Since with 304 before the view runs its query, serializer or
+pandas code. Async views, which ``condition`` cannot wrap, do the same with
+``conditional_response`` and ``set_validators``.
+
+Ages change with the date rather than with writes, so statistics of ages
+are tagged with the date as well, and get no Last-Modified. Statistics are
+only tagged while every way of serving them reads current data:
+materialized summaries, the employee snapshot and stale-while-revalidate
+serving may lag behind the version, and would otherwise pin clients to an
+old result.
+"""
+import hashlib
+from calendar import timegm
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from api_pandas.aggregation import today
+from api_pandas.cache import cache_settings
+from api_pandas.models import EmployeeDataVersion
+from api_pandas.snapshot import employee_snapshot
+
+
+def data_version(request):
+    """Return ``(version, updated_at)``, read once per request."""
+    if not hasattr(request, '_employee_data_version'):
+        row = EmployeeDataVersion.objects.filter(pk=1).values_list(
+            'version', 'updated_at'
+        ).first()
+        request._employee_data_version = row or (0, None)
+    return request._employee_data_version
+
+
+def employee_etag(request, *args, **kwargs):
+    # The same version renders differently per URL and negotiated format.
+    variant = hashlib.blake2b(
+        f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+        .encode(),
+        digest_size=8,
+    ).hexdigest()
+    return f'{data_version(request)[0]}-{variant}'
+
+
+def employee_last_modified(request, *args, **kwargs):
+    return data_version(request)[1]
+
+
+def statistics_may_lag():
+    return bool(
+        getattr(settings, 'STATISTICS_SUMMARY_MAX_AGE', None)
+        or employee_snapshot.enabled
+        or cache_settings()['STALE_TIMEOUT']
+    )
+
+
+def depends_on_today(request):
+    """Whether the view of ``request`` serves statistics of ages."""
+    view = (getattr(request, 'parser_context', None) or {}).get('view')
+    dated = getattr(view, 'depends_on_today', None)
+    return dated is not None and dated()
+
+
+def statistics_validators(request, dated):
+    """``(etag, last_modified)`` of statistics, ``dated`` if of ages."""
+    if statistics_may_lag():
+        return None, None
+    if dated:
+        return f'{employee_etag(request)}-{today().isoformat()}', None
+    return employee_etag(request), employee_last_modified(request)
+
+
+def statistics_etag(request, *args, **kwargs):
+    return statistics_validators(request, depends_on_today(request))[0]
+
+
+def statistics_last_modified(request, *args, **kwargs):
+    return statistics_validators(request, depends_on_today(request))[1]
+
+
+def conditional_response(request, etag, last_modified):
+    """The 304 or 412 ``condition`` would answer with, or ``None``."""
+    return get_conditional_response(
+        request,
+        etag=quote_etag(etag) if etag is not None else None,
+        last_modified=last_modified and timegm(last_modified.utctimetuple()),
+    )
+
+
+def set_validators(response, request, etag, last_modified):
+    """Add ETag and Last-Modified to ``response`` as ``condition`` does."""
+    if request.method in ('GET', 'HEAD'):
+        if last_modified and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(
+                timegm(last_modified.utctimetuple())
+            )
+        if etag is not None:
+            response.setdefault('ETag', quote_etag(etag))
+    return response
+
+
+conditional_employees = condition(
+    etag_func=employee_etag, last_modified_func=employee_last_modified
+)
+conditional_statistics = condition(
+    etag_func=statistics_etag, last_modified_func=statistics_last_modified
+)
@@ -0,0 +1,152 @@
+"""
+Streaming employee exports in CSV, NDJSON and Parquet.
+
+Every exporter turns a queryset into an iterator of encoded chunks. Rows
+are read through a server-side cursor ``CHUNK_SIZE`` at a time, so memory
+use does not depend on the size of the table.
+"""
+import csv
+import importlib.util
+import io
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api_pandas.models import Employee
+
+CHUNK_SIZE = 2000
+FIELDS = [field.name for field in Employee._meta.concrete_fields]
+
+
+class ExportFormatError(ValueError):
+    pass
+
+
+class Echo:
+    """Pseudo-buffer handing back whatever ``csv.writer`` writes."""
+
+    def write(self, value):
+        return value
+
+
+def stream_rows(queryset):
+    """Yield lists of at most ``CHUNK_SIZE`` employee row tuples."""
+    rows = queryset.values_list(*FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def encode_json(value):
+    return json.dumps(value, cls=DjangoJSONEncoder)
+
+
+def export_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    other_fields = FIELDS.index('other_fields')
+    for chunk in stream_rows(queryset):
+        lines = []
+        for row in chunk:
+            row = list(row)
+            if row[other_fields] is not None:
+                row[other_fields] = encode_json(row[other_fields])
+            lines.append(writer.writerow(row))
+        yield ''.join(lines)
+
+
+def export_ndjson(queryset):
+    for chunk in stream_rows(queryset):
+        yield ''.join(
+            encode_json(dict(zip(FIELDS, row))) + '\n' for row in chunk
+        )
+
+
+class StreamSink(io.RawIOBase):
+    """Write-only file that keeps only the bytes not yet drained."""
+
+    def __init__(self):
+        self.position = 0
+        self.pending = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.pending.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.pending)
+        self.pending = []
+        return data
+
+
+def export_parquet(queryset):
+    if importlib.util.find_spec('pyarrow') is None:
+        raise ExportFormatError(
+            "Exporting Parquet files requires the pyarrow package."
+        )
+    return parquet_chunks(queryset)
+
+
+def parquet_chunks(queryset):
+    """Write one Parquet row group per chunk, yielding bytes as they form."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('id', pa.int32()),
+        ('first_name', pa.string()),
+        ('last_name', pa.string()),
+        ('date_of_birth', pa.date32()),
+        ('industry', pa.string()),
+        ('salary', pa.decimal128(10, 2)),
+        ('years_of_experience', pa.int32()),
+        ('other_fields', pa.string()),
+        ('updated_at', pa.timestamp('us', tz='UTC')),
+    ])
+    sink = StreamSink()
+    writer = pq.ParquetWriter(sink, schema)
+    other_fields = FIELDS.index('other_fields')
+    for chunk in stream_rows(queryset):
+        columns = [list(column) for column in zip(*chunk)]
+        columns[other_fields] = [
+            None if value is None else encode_json(value)
+            for value in columns[other_fields]
+        ]
+        writer.write_table(pa.Table.from_arrays(
+            [
+                pa.array(column, type=field.type)
+                for column, field in zip(columns, schema)
+            ],
+            schema=schema,
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+EXPORTERS = {
+    'csv': ('text/csv', export_csv),
+    'ndjson': ('application/x-ndjson', export_ndjson),
+    'parquet': ('application/vnd.apache.parquet', export_parquet),
+}
+
+
+def export_employees(queryset, file_format):
+    """Return the content type and encoded chunks of an export."""
+    if file_format not in EXPORTERS:
+        raise ExportFormatError(
+            f"Unknown export format {file_format!r}; "
+            f"choose one of {sorted(EXPORTERS)}."
+        )
+    content_type, exporter = EXPORTERS[file_format]
+    return content_type, exporter(queryset)
@@ -0,0 +1,143 @@
+"""
+Filter backends and filter sets for the employee endpoints.
+"""
+import json
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+)
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import Coalesce, Greatest
+from django_filters import rest_framework as django_filters
+from rest_framework.exceptions import ParseError
+from rest_framework.filters import (
+    BaseFilterBackend, OrderingFilter, SearchFilter
+)
+
+from api_pandas.aggregation import JSON_KEY
+from api_pandas.models import Employee
+
+_trigram_databases = {}
+
+
+def trigram_available(using='default'):
+    """Whether the pg_trgm extension is installed in the database."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    key = (using, connection.settings_dict['NAME'])
+    if key not in _trigram_databases:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+            )
+            _trigram_databases[key] = cursor.fetchone() is not None
+    return _trigram_databases[key]
+
+
+class RankedSearchFilter(SearchFilter):
+    """
+    ``SearchFilter`` that orders matches by relevance on PostgreSQL.
+
+    Matching is unchanged (``icontains`` on every search field, served by
+    the trigram indexes of migration 0004). Unless ``?ordering=`` is given,
+    results are ranked by trigram similarity to the search terms, or by
+    full-text rank when pg_trgm is not installed.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        queryset = super().filter_queryset(request, queryset, view)
+        terms = self.get_search_terms(request)
+        if (
+            not terms
+            or connections[queryset.db].vendor != 'postgresql'
+            or request.query_params.get(OrderingFilter.ordering_param)
+        ):
+            return queryset
+        fields = [
+            field.lstrip('^=@$')
+            for field in self.get_search_fields(view, request) or []
+        ]
+        if not fields:
+            return queryset
+        rank = self.rank(fields, terms, queryset.db)
+        return queryset.annotate(search_rank=rank).order_by(
+            '-search_rank', 'id'
+        )
+
+    def rank(self, fields, terms, using):
+        if not trigram_available(using):
+            return SearchRank(
+                SearchVector(*fields, config='simple'),
+                SearchQuery(' '.join(terms), config='simple'),
+            )
+        rank = Value(0.0, output_field=FloatField())
+        for term in terms:
+            similarities = [
+                TrigramSimilarity(field, term) for field in fields
+            ]
+            best = (
+                Greatest(*similarities) if len(similarities) > 1
+                else similarities[0]
+            )
+            rank = rank + Coalesce(
+                best, Value(0.0), output_field=FloatField()
+            )
+        return rank
+
+
+class OtherFieldsFilter(BaseFilterBackend):
+    """
+    ``?other_fields__<key>=<value>`` keeps employees whose ``other_fields``
+    hold ``value`` under ``key``: as a string, or as the JSON scalar it
+    reads as (so ``?other_fields__level=3`` matches ``3`` and ``"3"``).
+    Repeating a parameter matches any of its values.
+
+    Compiled to JSON containment (``@>``), which the ``jsonb_path_ops``
+    GIN index of migration 0006 serves.
+    """
+
+    prefix = 'other_fields__'
+
+    def filter_queryset(self, request, queryset, view):
+        return self.filter_params(request.query_params, queryset)
+
+    def filter_params(self, params, queryset):
+        """Filter ``queryset`` by the ``other_fields`` parameters among
+        ``params``, a ``QueryDict``."""
+        for param in params:
+            if not param.startswith(self.prefix):
+                continue
+            key = param[len(self.prefix):]
+            if not JSON_KEY.match(key):
+                raise ParseError(f"Invalid other_fields key {key!r}.")
+            queryset = queryset.filter(
+                self.containing(key, params.getlist(param))
+            )
+        return queryset
+
+    def containing(self, key, values):
+        condition = Q()
+        for value in values:
+            condition |= Q(other_fields__contains={key: value})
+            try:
+                parsed = json.loads(value)
+            except ValueError:
+                continue
+            if parsed != value and not isinstance(parsed, (dict, list)):
+                condition |= Q(other_fields__contains={key: parsed})
+        return condition
+
+
+class EmployeeStatisticsFilter(django_filters.FilterSet):
+    """Filters narrowing the employees a statistic is computed over."""
+
+    class Meta:
+        model = Employee
+        fields = {
+            'industry': ['exact', 'in'],
+            'years_of_experience': ['exact', 'gte', 'lte'],
+            'salary': ['gte', 'lte'],
+            'date_of_birth': ['gte', 'lte'],
+        }
@@ -0,0 +1,267 @@
+"""
+Employee statistics as of a past moment.
+
+Every write to the employee table is appended to ``EmployeeChange`` by
+database triggers. The employees at a moment are, for each employee, the
+latest change made up to then, unless it is a delete. Rather than
+scanning the whole log for it, a reconstruction starts from the latest
+``EmployeeCheckpoint`` taken before that moment, a block of the log
+holding a copy of every employee's row at the time, and only reads the
+changes logged after it. Checkpoints are taken by the
+checkpoint_employees command, e.g. from cron.
+
+The reconstruction is a queryset of ``EmployeeChange`` rows, which carry
+the employee columns, so statistics run over it unchanged, in SQL.
+"""
+import datetime
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (
+    Case, Exists, F, Max, OuterRef, Q, Value, When
+)
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from api_pandas.aggregation import (
+    STATISTICS, StatisticsQueryError, ages_on, compute_statistics, elapsed_ms
+)
+from api_pandas.models import EmployeeChange, EmployeeCheckpoint
+
+DEFAULTS = {
+    # checkpoint_employees skips a checkpoint until this many changes
+    # were logged since the last one.
+    'CHECKPOINT_EVERY': 100000,
+    # Seconds create_checkpoint waits for writes in progress to finish.
+    'CHECKPOINT_WAIT': 60,
+}
+
+
+class WritesInProgress(Exception):
+    """Writes begun before a checkpoint were still in progress."""
+
+
+def history_settings():
+    return {**DEFAULTS, **getattr(settings, 'STATISTICS_HISTORY', {})}
+
+
+def parse_as_of(params):
+    """The moment ``?as_of=`` asks for, or ``None``.
+
+    Takes an ISO 8601 date and time, or a date, meaning the end of that
+    day. Times without an offset are in the current time zone.
+    """
+    value = params.get('as_of')
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        day = None if moment else parse_date(value)
+    except ValueError:
+        moment = day = None
+    if day is not None:
+        moment = datetime.datetime.combine(day, datetime.time.max)
+    if moment is None:
+        raise StatisticsQueryError(
+            f"as_of must be a date or an ISO 8601 date and time, "
+            f"not {value!r}."
+        )
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def checkpoint_before(as_of):
+    return EmployeeCheckpoint.objects.filter(
+        covers_until__lte=as_of
+    ).order_by('-last_change_id').first()
+
+
+def employees_after(checkpoint, changes):
+    """``EmployeeChange`` queryset of each employee's latest row after
+    ``checkpoint`` (or from scratch) and the later changes matching the
+    ``Q`` object ``changes``.
+
+    Only the checkpoint rows and the later changes are scanned, whatever
+    the length of the log: both lie between the checkpoint's last change
+    and the latest of the changes. A row is kept unless a later change of
+    its employee follows; any change follows the checkpoint, even one
+    logged within the checkpoint's block by a concurrent write.
+    """
+    log = EmployeeChange.objects.all()
+    after = checkpoint.last_change_id if checkpoint else 0
+    changes &= ~Q(operation=EmployeeChange.CHECKPOINT)
+    upper = log.filter(changes, id__gt=after).aggregate(
+        upper=Max('id')
+    )['upper'] or after
+    rows = changes
+    if checkpoint is not None:
+        rows |= Q(
+            id__range=(checkpoint.first_row_id, checkpoint.last_row_id),
+            operation=EmployeeChange.CHECKPOINT,
+        )
+        upper = max(upper, checkpoint.last_row_id)
+    log = log.filter(id__gt=after, id__lte=upper)
+    followed_after = Case(
+        When(operation=EmployeeChange.CHECKPOINT, then=Value(after)),
+        default=F('id'),
+        output_field=EmployeeChange._meta.pk,
+    )
+    return log.filter(rows).alias(followed_after=followed_after).exclude(
+        Exists(log.filter(
+            changes,
+            employee_id=OuterRef('employee_id'),
+            id__gt=OuterRef('followed_after'),
+        ))
+    ).exclude(operation=EmployeeChange.DELETE)
+
+
+def employees_as_of(as_of):
+    """``EmployeeChange`` queryset of the employees at the moment ``as_of``.
+
+    Raises ``StatisticsQueryError`` before the first logged change.
+    """
+    first = EmployeeChange.objects.order_by('id').values_list(
+        'changed_at', flat=True
+    ).first()
+    if first is not None and as_of < first:
+        raise StatisticsQueryError(
+            f"Employee history starts at {first.isoformat()}."
+        )
+    return employees_after(
+        checkpoint_before(as_of),
+        Q(changed_at__lte=as_of),
+    )
+
+
+def historical_statistic(query, queryset, as_of):
+    """Evaluate ``query`` over ``queryset`` from ``employees_as_of``.
+
+    Ages are computed on the day of ``as_of``.
+    """
+    with ages_on(timezone.localdate(as_of)):
+        return query.run(queryset)
+
+
+def historical_statistics(names, queryset, as_of):
+    """``compute_statistics`` counterpart of ``historical_statistic``."""
+    for name in names:
+        if name not in STATISTICS:
+            raise StatisticsQueryError(
+                f"Unknown statistic {name!r}; choose from "
+                f"{', '.join(STATISTICS)}."
+            )
+    with ages_on(timezone.localdate(as_of)):
+        results, meta = compute_statistics(names, queryset)
+    meta['as_of'] = as_of.isoformat()
+    return results, meta
+
+
+def last_checkpoint():
+    return EmployeeCheckpoint.objects.order_by('-last_change_id').first()
+
+
+def changes_since_checkpoint():
+    checkpoint = last_checkpoint()
+    return EmployeeChange.objects.filter(
+        id__gt=checkpoint.last_change_id if checkpoint else 0
+    ).exclude(operation=EmployeeChange.CHECKPOINT).count()
+
+
+def settled_change_id():
+    """Id up to which the change log can no longer grow, or ``None``
+    without PostgreSQL.
+
+    Change ids are handed out when a write is made, not when it commits,
+    so a transaction in progress may still commit changes below ids that
+    are already visible. This reads the last id handed out, then waits up
+    to ``CHECKPOINT_WAIT`` seconds for the transactions in progress at
+    that point to end.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    wait = history_settings()['CHECKPOINT_WAIT']
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_sequence_last_value("
+            "pg_get_serial_sequence(%s, 'id'))",
+            [EmployeeChange._meta.db_table],
+        )
+        last_change_id = cursor.fetchone()[0] or 0
+        # A transaction locks its own id, from its first write to its end.
+        cursor.execute(
+            "SELECT array_agg(CAST(transactionid AS text)) FROM pg_locks "
+            "WHERE locktype = 'transactionid' AND mode = 'ExclusiveLock' "
+            "AND pid IS DISTINCT FROM pg_backend_pid()"
+        )
+        running = cursor.fetchone()[0]
+        deadline = time.monotonic() + wait
+        while running:
+            cursor.execute(
+                "SELECT NOT EXISTS (SELECT FROM pg_locks "
+                "WHERE locktype = 'transactionid' "
+                "AND transactionid = ANY(CAST(%s AS xid[])))",
+                [running],
+            )
+            if cursor.fetchone()[0]:
+                break
+            if time.monotonic() >= deadline:
+                raise WritesInProgress(
+                    f"Writes were still in progress after {wait} seconds."
+                )
+            time.sleep(0.05)
+    return last_change_id
+
+
+def create_checkpoint():
+    """Checkpoint the employees after every change logged so far.
+
+    Built from the previous checkpoint and the changes after it, up to
+    ``settled_change_id``. Returns the new checkpoint and the milliseconds
+    it took, or ``None`` and 0 when nothing changed since the previous
+    one. Raises ``WritesInProgress`` if writes begun before it do not end
+    in time.
+    """
+    started = time.perf_counter()
+    settled = settled_change_id()
+    with transaction.atomic():
+        # Concurrent runs wait for each other on the previous checkpoint.
+        previous = EmployeeCheckpoint.objects.select_for_update().order_by(
+            '-last_change_id'
+        ).first()
+        changes = EmployeeChange.objects.filter(
+            id__gt=previous.last_change_id if previous else 0
+        ).exclude(operation=EmployeeChange.CHECKPOINT)
+        if settled is not None:
+            changes = changes.filter(id__lte=settled)
+        logged = changes.aggregate(
+            last_change_id=Max('id'), covers_until=Max('changed_at')
+        )
+        if logged['last_change_id'] is None:
+            return None, 0
+        columns = [
+            field.column for field in EmployeeChange._meta.concrete_fields
+            if field.name not in ('id', 'operation')
+        ]
+        rows = employees_after(
+            previous, Q(id__lte=logged['last_change_id'])
+        ).order_by('employee_id').values_list(*columns)
+        sql, params = rows.query.sql_with_params()
+        table = connection.ops.quote_name(EmployeeChange._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'WITH copied AS (INSERT INTO {table} '
+                f'(operation, {", ".join(columns)}) '
+                f'SELECT %s, rows.* FROM ({sql}) AS rows RETURNING id) '
+                f'SELECT MIN(id), MAX(id), COUNT(*) FROM copied',
+                [EmployeeChange.CHECKPOINT, *params],
+            )
+            first_row_id, last_row_id, employees = cursor.fetchone()
+        checkpoint = EmployeeCheckpoint.objects.create(
+            **logged,
+            first_row_id=first_row_id or 0,
+            last_row_id=last_row_id or 0,
+            employees=employees,
+        )
+    return checkpoint, elapsed_ms(started)
@@ -0,0 +1,282 @@
+"""
+Chunked import of employee files through PostgreSQL ``COPY``.
+
+Files are read ``chunk_size`` rows at a time, so memory use does not grow
+with the file. Each chunk is validated with vectorized pandas operations
+applying the rules of ``EmployeeSerializer``, copied into a temporary
+staging table and merged into the employee table with one
+``INSERT ... ON CONFLICT`` statement.
+"""
+import io
+import json
+import math
+import os
+
+from django.db import connection, transaction
+from django.utils import timezone
+import pandas as pd
+
+from api_pandas.models import (
+    Employee, allocate_employee_ids, sync_employee_id_sequence
+)
+
+FORMATS = ('csv', 'ndjson', 'parquet')
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.parquet': 'parquet',
+}
+DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d')
+COPY_NULL = r'\N'
+MAX_SALARY = 10 ** 8
+# Set by write_chunk. Dropped from files, e.g. our own exports, rather
+# than kept in other_fields.
+IGNORED_COLUMNS = ('updated_at',)
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXTENSIONS:
+        raise ImportFormatError(
+            f"Cannot tell the format of {path!r}; pass one of {FORMATS}."
+        )
+    return EXTENSIONS[extension]
+
+
+def read_chunks(path, file_format, chunk_size):
+    """Yield the file as DataFrames of at most ``chunk_size`` rows."""
+    if file_format == 'csv':
+        yield from pd.read_csv(
+            path,
+            chunksize=chunk_size,
+            dtype=str,
+            keep_default_na=False,
+            na_values=[''],
+        )
+    elif file_format == 'ndjson':
+        with pd.read_json(
+            path,
+            lines=True,
+            chunksize=chunk_size,
+            dtype=False,
+            convert_dates=False,
+        ) as reader:
+            yield from reader
+    elif file_format == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportFormatError(
+                "Reading Parquet files requires the pyarrow package."
+            )
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        raise ImportFormatError(f"Unknown format {file_format!r}.")
+
+
+class ChunkValidator:
+    """Vectorized counterpart of ``EmployeeSerializer`` validation."""
+
+    fields = [
+        field.name for field in Employee._meta.concrete_fields
+        if field.name not in IGNORED_COLUMNS
+    ]
+
+    def __init__(self, mapping=None):
+        self.mapping = mapping or {}
+
+    def clean(self, chunk):
+        """Return the valid rows as an employee frame, plus row errors.
+
+        Errors are ``(position, message)`` pairs, ``position`` being the
+        row's index within ``chunk``.
+        """
+        chunk = chunk.rename(columns=self.mapping).reset_index(drop=True)
+        errors = pd.Series('', index=chunk.index)
+        clean = pd.DataFrame(index=chunk.index)
+
+        def reject(mask, message):
+            mask = mask.fillna(False).astype(bool)
+            errors[mask & (errors == '')] = message
+
+        for name in ('first_name', 'last_name'):
+            text = self.text(chunk, name)
+            reject(text.isna() | (text.str.len() == 0), f"{name}: required.")
+            reject(text.str.len() > 255, f"{name}: too long.")
+            clean[name] = text
+
+        industry = self.text(chunk, 'industry')
+        reject(industry.str.len() > 255, "industry: too long.")
+        clean['industry'] = industry
+
+        clean['date_of_birth'] = self.dates(chunk.get('date_of_birth'))
+        reject(clean['date_of_birth'].isna(), "date_of_birth: invalid date.")
+
+        salary = self.numbers(chunk, 'salary', reject)
+        reject(salary < 0, "salary: Annual income must be a positive value.")
+        reject(salary.abs() >= MAX_SALARY, "salary: too large.")
+        reject(
+            (salary * 100 - (salary * 100).round()).abs() > 1e-6,
+            "salary: more than 2 decimal places.",
+        )
+        clean['salary'] = salary
+
+        experience = self.numbers(chunk, 'years_of_experience', reject)
+        reject(
+            (experience < 0) | (experience.notna() & (experience % 1 != 0)),
+            "years_of_experience: must be a non-negative integer.",
+        )
+        clean['years_of_experience'] = experience.astype('Int64')
+
+        ids = self.numbers(chunk, 'id', reject)
+        reject(
+            (ids < 1) | (ids.notna() & (ids % 1 != 0)),
+            "id: must be a positive integer.",
+        )
+        clean['id'] = ids.astype('Int64')
+
+        clean['other_fields'] = self.other_fields(chunk, reject)
+
+        valid = errors == ''
+        rejected = [
+            (position, message)
+            for position, message in errors[~valid].items()
+        ]
+        return clean[valid][self.fields], rejected
+
+    def text(self, chunk, name):
+        if name not in chunk:
+            return pd.Series(None, index=chunk.index, dtype=object)
+        column = chunk[name]
+        text = column.where(column.isna(), column.astype(str).str.strip())
+        return text.astype(object)
+
+    def numbers(self, chunk, name, reject):
+        if name not in chunk:
+            return pd.Series(float('nan'), index=chunk.index)
+        column = chunk[name]
+        numbers = pd.to_numeric(column, errors='coerce').astype(float)
+        reject(numbers.isna() & column.notna(), f"{name}: not a number.")
+        return numbers
+
+    def dates(self, column):
+        if column is None:
+            return pd.Series(pd.NaT, dtype='datetime64[ns]')
+        if str(column.dtype).startswith('datetime64'):
+            return column.astype('datetime64[ns]')
+        text = column.where(column.isna(), column.astype(str))
+        parsed = pd.Series(pd.NaT, index=column.index, dtype='datetime64[ns]')
+        for date_format in DATE_FORMATS:
+            parsed = parsed.fillna(
+                pd.to_datetime(text, format=date_format, errors='coerce')
+            )
+        return parsed
+
+    def other_fields(self, chunk, reject):
+        extra = [
+            column for column in chunk
+            if column not in self.fields and column not in IGNORED_COLUMNS
+        ]
+        existing = chunk.get('other_fields')
+        if not extra and existing is None:
+            return pd.Series(None, index=chunk.index, dtype=object)
+        # Keyed by row, so that rows without extra columns are kept too.
+        records = chunk[extra].to_dict(orient='index')
+        values = []
+        malformed = pd.Series(False, index=chunk.index)
+        for position in chunk.index:
+            record = records[position]
+            merged = {}
+            if existing is not None:
+                try:
+                    merged.update(parse_json_object(existing[position]))
+                except (TypeError, ValueError):
+                    malformed[position] = True
+            merged.update(
+                (key, to_python(value))
+                for key, value in record.items()
+                if not is_missing(value)
+            )
+            values.append(merged or None)
+        reject(malformed, "other_fields: must be a JSON object.")
+        return pd.Series(values, index=chunk.index, dtype=object)
+
+
+def is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def to_python(value):
+    return value.item() if hasattr(value, 'item') else value
+
+
+def parse_json_object(value):
+    if is_missing(value):
+        return {}
+    if isinstance(value, str):
+        value = json.loads(value)
+    return dict(value)
+
+
+def write_chunk(frame, update=False):
+    """Copy validated rows into the employee table; return rows written."""
+    if frame.empty:
+        return 0
+    frame = frame.copy()
+    explicit = frame['id'].dropna()
+    if len(explicit):
+        sync_employee_id_sequence(int(explicit.max()))
+    missing = frame['id'].isna()
+    frame.loc[missing, 'id'] = allocate_employee_ids(int(missing.sum()))
+    frame = frame.drop_duplicates('id', keep='last')
+    frame['other_fields'] = frame['other_fields'].map(
+        lambda value: COPY_NULL if is_missing(value) else json.dumps(value)
+    )
+    # Written as text: date_format below would truncate a datetime column.
+    frame['updated_at'] = timezone.now().isoformat()
+    buffer = io.StringIO()
+    frame.to_csv(
+        buffer,
+        header=False,
+        index=False,
+        na_rep=COPY_NULL,
+        date_format='%Y-%m-%d',
+        float_format='%.2f',
+    )
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    table = quote(Employee._meta.db_table)
+    columns = ', '.join(quote(column) for column in frame.columns)
+    if update:
+        conflict = 'DO UPDATE SET ' + ', '.join(
+            f'{quote(column)} = EXCLUDED.{quote(column)}'
+            for column in frame.columns
+            if column != 'id'
+        )
+    else:
+        conflict = 'DO NOTHING'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE employee_import (LIKE {table})'
+        )
+        cursor.copy_expert(
+            f"COPY employee_import ({columns}) FROM STDIN "
+            f"WITH (FORMAT csv, NULL '{COPY_NULL}')",
+            buffer,
+        )
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) '
+            f'SELECT {columns} FROM employee_import '
+            f'ON CONFLICT ({quote("id")}) {conflict}'
+        )
+        written = cursor.rowcount
+        cursor.execute('DROP TABLE employee_import')
+    return written
@@ -0,0 +1,97 @@
+"""
+Django command to compare the age computations of the statistics engine
+"""
+import time
+
+from django.core.management.base import BaseCommand
+import numpy as np
+import pandas as pd
+
+from api_pandas.aggregation import age_band, calendar_ages, today
+
+BINS = [20, 30, 40, 50, 60]
+
+
+class Command(BaseCommand):
+    """Django command to benchmark age computations on generated dates"""
+
+    help = (
+        "Generate random birth dates and report how long the original "
+        "computation, parsing date strings and taking (now - dob).days // "
+        "365, takes against exact calendar ages on datetime64[D] values and "
+        "on int32 day numbers, how many ages the original gets wrong, and "
+        "how long banding the ages by --bins takes. Needs no database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000_000)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--bins", default=",".join(str(edge) for edge in BINS)
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.repeat = options["repeat"]
+        on = today()
+        rng = np.random.default_rng(options["seed"])
+        # Born between 1901 and 2024.
+        day_numbers = rng.integers(
+            -25000, 20000, options["rows"], dtype=np.int32
+        )
+        births = day_numbers.astype("datetime64[D]")
+        strings = pd.Series(births.astype(str))
+        frame = pd.Series(births.astype("datetime64[ns]"))
+        now = pd.Timestamp(on)
+        self.stdout.write(
+            f"{options['rows']} birth dates, ages on {on.isoformat()}:"
+        )
+
+        def original():
+            return ((now - pd.to_datetime(strings)).dt.days // 365).to_numpy()
+
+        # Reference ages from pandas' calendar fields.
+        dates = pd.DatetimeIndex(births)
+        expected = (
+            on.year - dates.year
+            - ((dates.month > on.month)
+               | ((dates.month == on.month) & (dates.day > on.day)))
+        ).to_numpy()
+        variants = {
+            "pd.to_datetime(strings), days // 365": original,
+            "datetime64[ns], days // 365": (
+                lambda: ((now - frame).dt.days // 365).to_numpy()
+            ),
+            "calendar_ages(datetime64[D])": (
+                lambda: calendar_ages(births, on)
+            ),
+            "calendar_ages(int32 day numbers)": (
+                lambda: calendar_ages(day_numbers, on)
+            ),
+        }
+        baseline = None
+        for name, function in variants.items():
+            seconds, ages = self.time(function)
+            baseline = baseline or seconds
+            wrong = int(np.count_nonzero(ages != expected))
+            self.stdout.write(
+                f"  {name}: {seconds * 1000:.0f} ms "
+                f"({baseline / seconds:.1f}x), {wrong} ages off"
+            )
+        bins = [int(edge) for edge in options["bins"].split(",")]
+        ages = pd.Series(calendar_ages(day_numbers, on))
+        seconds, _ = self.time(lambda: age_band(ages, bins))
+        self.stdout.write(
+            f"  age_band(bins={options['bins']}): {seconds * 1000:.0f} ms"
+        )
+
+    def time(self, function):
+        """Best wall time of ``--repeat`` runs, and the result."""
+        best = None
+        for _ in range(max(self.repeat, 1)):
+            started = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
@@ -0,0 +1,143 @@
+"""
+Django command to compare the employee list serialization and JSON renderers
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api_pandas.aggregation import StatisticsQuery
+from api_pandas.models import Employee
+from api_pandas.renderers import FastJSONRenderer, orjson
+from api_pandas.views import EmployeeListCreate
+
+# View attribute overrides and extra query parameters of each variant.
+VARIANTS = {
+    "EmployeeSerializer + JSONRenderer": (
+        {"values_serializer_class": None, "renderer_classes": [JSONRenderer]},
+        {},
+    ),
+    "EmployeeValuesSerializer + JSONRenderer": (
+        {"renderer_classes": [JSONRenderer]},
+        {},
+    ),
+    "EmployeeValuesSerializer + FastJSONRenderer": (
+        {"renderer_classes": [FastJSONRenderer]},
+        {},
+    ),
+    "EmployeeValuesSerializer + FastJSONRenderer, names only": (
+        {"renderer_classes": [FastJSONRenderer]},
+        {"fields": "id,first_name,last_name"},
+    ),
+}
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the employee list rendering paths"""
+
+    help = (
+        "Fill the employee table with generated rows, then report requests "
+        "per second and response sizes of the employee list with the model "
+        "serializer and with the values() serializer under both JSON "
+        "renderers, with and without ?fields=, and renders per second of a "
+        "statistics result. The rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--page-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if connection.vendor != "postgresql":
+            raise CommandError("Benchmarks need a PostgreSQL database.")
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "orjson is not installed; FastJSONRenderer falls back to "
+                    "JSONRenderer."
+                )
+            )
+        with transaction.atomic():
+            self.stdout.write(f"Generating {options['rows']} employees....")
+            self.generate(options["rows"])
+            self.report_list(options["requests"], options["page_size"])
+            self.report_statistics(options["requests"])
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Rolled back generated rows."))
+
+    def generate(self, rows):
+        table = connection.ops.quote_name(Employee._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (first_name, last_name, date_of_birth, "
+                f"industry, salary, years_of_experience, other_fields, "
+                f"updated_at) "
+                f"SELECT 'First' || i, 'Last' || i, "
+                f"DATE '1950-01-01' + (i %% 20000), "
+                f"'Industry' || (i %% 15), "
+                f"(20000 + i %% 180000)::numeric, i %% 40, "
+                f"jsonb_build_object('team', 'Team' || (i %% 30)), now() "
+                f"FROM generate_series(1, %s) AS i",
+                [rows],
+            )
+
+    def report_list(self, requests, page_size):
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"GET /api/employees/?page_size={page_size}"
+            )
+        )
+        factory = APIRequestFactory()
+        baseline = None
+        for name, (overrides, params) in VARIANTS.items():
+            view = EmployeeListCreate.as_view(**overrides)
+            params = {"page_size": page_size, **params}
+
+            def request():
+                response = view(factory.get("/api/employees/", params))
+                return response.render()
+
+            # Pagination links are built from the request factory's host.
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+            ):
+                rate = self.rate(request, requests)
+                size = len(request().content)
+            baseline = baseline or rate
+            self.stdout.write(
+                f"  {name}: {rate:.1f} requests/s ({rate / baseline:.2f}x), "
+                f"{size} bytes"
+            )
+
+    def report_statistics(self, requests):
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                "Statistics grouped by industry and years of experience"
+            )
+        )
+        query = StatisticsQuery.parse(
+            ["industry,years_of_experience"],
+            ["salary:mean,salary:median,count"],
+        )
+        result = query.run(Employee.objects.all())
+        baseline = None
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            rate = self.rate(lambda: renderer.render(result), requests)
+            baseline = baseline or rate
+            self.stdout.write(
+                f"  {type(renderer).__name__}: {rate:.1f} renders/s "
+                f"({rate / baseline:.2f}x)"
+            )
+
+    def rate(self, function, repeat):
+        function()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return repeat / (time.perf_counter() - started)
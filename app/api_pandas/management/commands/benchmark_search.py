@@ -0,0 +1,101 @@
+"""
+Django command to compare employee list query plans with and without indexes
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from api_pandas.models import Employee
+
+TRIGRAM_INDEXES = [
+    "employee_first_name_trgm",
+    "employee_last_name_trgm",
+    "employee_industry_trgm",
+]
+INDUSTRIES = [
+    "Accounting", "Advertising", "Aerospace", "Agriculture", "Automotive",
+    "Banking", "Construction", "Education", "Energy", "Finance",
+    "Healthcare", "Insurance", "Media", "Retail", "Software",
+]
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the employee list queries"""
+
+    help = (
+        "Fill the employee table with generated rows and print the plans of "
+        "the employee list queries with and without the indexes. Everything "
+        "runs in one transaction that is rolled back; the table is locked "
+        "meanwhile, so run it against a development database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000)
+        parser.add_argument("--search", default="smith")
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if connection.vendor != "postgresql":
+            raise CommandError("Benchmarks need a PostgreSQL database.")
+        with transaction.atomic():
+            self.stdout.write(f"Generating {options['rows']} employees....")
+            self.generate(options["rows"])
+            queries = self.queries(options["search"])
+            self.report("With indexes", queries)
+            self.drop_indexes()
+            self.report("Without indexes", queries)
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Rolled back generated rows."))
+
+    def generate(self, rows):
+        table = connection.ops.quote_name(Employee._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (first_name, last_name, date_of_birth, "
+                f"industry, salary, years_of_experience, updated_at) "
+                f"SELECT 'First' || (i %% 5000), "
+                f"CASE WHEN i %% 997 = 0 THEN 'Smith' "
+                f"ELSE substr(md5(i::text), 1, 10) END, "
+                f"DATE '1950-01-01' + (i %% 20000), "
+                f"(%s::text[])[1 + i %% %s], "
+                f"(20000 + i %% 180000)::numeric, i %% 40, now() "
+                f"FROM generate_series(1, %s) AS i",
+                [INDUSTRIES, len(INDUSTRIES), rows],
+            )
+            cursor.execute(f"ANALYZE {table}")
+
+    def queries(self, search):
+        employees = Employee.objects.all()
+        middle = employees.order_by("date_of_birth", "id")[
+            employees.count() // 2
+        ]
+        return {
+            "search": employees.filter(
+                Q(first_name__icontains=search)
+                | Q(last_name__icontains=search)
+                | Q(industry__icontains=search)
+            )[:10],
+            "filter by industry": employees.filter(industry="Software")[:10],
+            "order by date of birth": employees.order_by(
+                "date_of_birth", "id"
+            )[:10],
+            "keyset page by date of birth": employees.filter(
+                Q(date_of_birth__gt=middle.date_of_birth)
+                | Q(date_of_birth=middle.date_of_birth, id__gt=middle.id)
+            ).order_by("date_of_birth", "id")[:11],
+        }
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for index in Employee._meta.indexes:
+                cursor.execute(f"DROP INDEX {index.name}")
+            for index in TRIGRAM_INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {index}")
+
+    def report(self, title, queries):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_LABEL(f"  {name}"))
+            plan = queryset.explain(analyze=True)
+            for line in plan.splitlines():
+                self.stdout.write(f"    {line}")
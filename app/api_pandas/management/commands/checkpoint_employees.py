@@ -0,0 +1,51 @@
+"""
+Django command to checkpoint the employee history
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api_pandas.history import (
+    WritesInProgress, changes_since_checkpoint, create_checkpoint,
+    history_settings,
+)
+
+
+class Command(BaseCommand):
+    """Django command to checkpoint the employees for ?as_of= statistics"""
+
+    help = (
+        "Record the current employees as a checkpoint of the change log, "
+        "from which statistics as of a later moment are reconstructed. "
+        "Skipped while fewer than STATISTICS_HISTORY['CHECKPOINT_EVERY'] "
+        "changes were logged since the last checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Checkpoint however few changes were logged.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        changes = changes_since_checkpoint()
+        every = history_settings()["CHECKPOINT_EVERY"]
+        if not changes or (changes < every and not options["force"]):
+            self.stdout.write(
+                f"{changes} changes since the last checkpoint; skipped."
+            )
+            return
+        try:
+            checkpoint, took = create_checkpoint()
+        except WritesInProgress as exc:
+            raise CommandError(exc)
+        if checkpoint is None:
+            self.stdout.write("No changes since the last checkpoint.")
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checkpointed {checkpoint.employees} employees up to "
+                f"change {checkpoint.last_change_id} ({changes} new) "
+                f"in {took:.0f} ms."
+            )
+        )
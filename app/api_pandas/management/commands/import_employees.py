@@ -0,0 +1,92 @@
+"""
+Django command to import employees from CSV, NDJSON or Parquet files
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_pandas.cache import invalidate_statistics
+from api_pandas.importers import (
+    FORMATS, ChunkValidator, ImportFormatError, detect_format, read_chunks,
+    write_chunk
+)
+
+
+class Command(BaseCommand):
+    """Django command to stream an employee file into the database"""
+
+    help = "Import employees from a CSV, NDJSON or Parquet file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="File format; detected from the extension by default.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=50000)
+        parser.add_argument(
+            "--update",
+            action="store_true",
+            help="Replace employees whose id already exists.",
+        )
+        parser.add_argument(
+            "--map",
+            action="append",
+            default=[],
+            metavar="COLUMN=FIELD",
+            help="Read a file column into an Employee field.",
+        )
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            default=20,
+            help="Number of rejected rows to print.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            mapping = dict(item.split("=", 1) for item in options["map"])
+        except ValueError:
+            raise CommandError("--map expects COLUMN=FIELD.")
+        started = time.perf_counter()
+        rows = imported = skipped = rejected = 0
+        try:
+            file_format = options["format"] or detect_format(options["path"])
+            chunks = read_chunks(
+                options["path"], file_format, options["chunk_size"]
+            )
+            validator = ChunkValidator(mapping)
+            for chunk in chunks:
+                valid, errors = validator.clean(chunk)
+                written = write_chunk(valid, update=options["update"])
+                imported += written
+                # Existing ids without --update, and repeated ids.
+                skipped += len(valid) - written
+                for position, message in errors:
+                    if rejected < options["max_errors"]:
+                        row = rows + position + 1
+                        self.stderr.write(f"Row {row}: {message}")
+                    rejected += 1
+                rows += len(chunk)
+                self.stdout.write(
+                    f"{rows} rows read, {imported} imported "
+                    f"({self.rate(rows, started)} rows/sec)"
+                )
+        except (ImportFormatError, OSError) as exc:
+            raise CommandError(exc)
+        finally:
+            # Chunks are committed one by one, also before a failure.
+            if imported:
+                invalidate_statistics()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} of {rows} rows, {skipped} skipped, "
+                f"{rejected} rejected ({self.rate(rows, started)} rows/sec)."
+            )
+        )
+
+    def rate(self, rows, started):
+        elapsed = time.perf_counter() - started
+        return int(rows / elapsed) if elapsed else rows
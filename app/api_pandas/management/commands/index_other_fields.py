@@ -0,0 +1,102 @@
+"""
+Django command to index frequently used other_fields keys
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api_pandas.aggregation import JSON_KEY
+from api_pandas.models import Employee
+
+
+def index_name(key):
+    return f"employee_other_{key}_idx"
+
+
+class Command(BaseCommand):
+    """Django command to manage expression indexes on other_fields keys"""
+
+    help = (
+        "Without keys, list the most frequent other_fields keys and whether "
+        "they are indexed. With keys, create a B-tree index on "
+        "(other_fields ->> 'key') for each, which serves grouping statistics "
+        "by other_fields.<key> and gives the planner statistics on the key, "
+        "or drop them with --drop. Outside a transaction the "
+        "indexes are built concurrently, without blocking writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("keys", nargs="*")
+        parser.add_argument("--drop", action="store_true")
+        parser.add_argument("--top", type=int, default=10)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if connection.vendor != "postgresql":
+            raise CommandError("Expression indexes need PostgreSQL.")
+        for key in options["keys"]:
+            if not JSON_KEY.match(key):
+                raise CommandError(f"Invalid other_fields key {key!r}.")
+            if len(index_name(key)) > connection.ops.max_name_length():
+                raise CommandError(f"other_fields key {key!r} is too long.")
+        if not options["keys"]:
+            self.report(options["top"])
+        elif options["drop"]:
+            self.drop(options["keys"])
+        else:
+            self.create(options["keys"])
+
+    @property
+    def concurrently(self):
+        # CREATE/DROP INDEX CONCURRENTLY cannot run in a transaction block.
+        return "" if connection.in_atomic_block else "CONCURRENTLY "
+
+    @property
+    def table(self):
+        return connection.ops.quote_name(Employee._meta.db_table)
+
+    def create(self, keys):
+        with connection.cursor() as cursor:
+            for key in keys:
+                cursor.execute(
+                    f"CREATE INDEX {self.concurrently}IF NOT EXISTS "
+                    f"{connection.ops.quote_name(index_name(key))} "
+                    f"ON {self.table} ((other_fields ->> %s))",
+                    [key],
+                )
+                self.stdout.write(f"Indexed other_fields key {key!r}.")
+            # Expression indexes get planner statistics on ANALYZE.
+            cursor.execute(f"ANALYZE {self.table}")
+
+    def drop(self, keys):
+        with connection.cursor() as cursor:
+            for key in keys:
+                cursor.execute(
+                    f"DROP INDEX {self.concurrently}IF EXISTS "
+                    f"{connection.ops.quote_name(index_name(key))}"
+                )
+                self.stdout.write(f"Dropped index of key {key!r}.")
+
+    def report(self, top):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT key, count(*) FROM {self.table}, "
+                f"jsonb_object_keys(CASE jsonb_typeof(other_fields) "
+                f"WHEN 'object' THEN other_fields END) AS key "
+                f"GROUP BY key ORDER BY count(*) DESC, key LIMIT %s",
+                [top],
+            )
+            keys = cursor.fetchall()
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes WHERE tablename = %s",
+                [Employee._meta.db_table],
+            )
+            indexes = {name for name, in cursor.fetchall()}
+        total = Employee.objects.count()
+        if not keys:
+            self.stdout.write("No other_fields keys found.")
+        for key, count in keys:
+            status = "indexed" if index_name(key) in indexes else "-"
+            self.stdout.write(
+                f"{key}: {count} of {total} employees "
+                f"({count / total:.0%}), {status}"
+            )
@@ -0,0 +1,31 @@
+"""
+Django command to refresh the materialized employee statistics
+"""
+from django.core.management.base import BaseCommand
+
+from api_pandas.summary import refresh_summaries
+
+
+class Command(BaseCommand):
+    """Django command to rebuild or extend the employee summaries"""
+
+    help = "Refresh the per-industry and per-experience employee summaries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild every summary instead of adding new employees.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        mode = "Rebuilding" if options["full"] else "Refreshing"
+        self.stdout.write(f"{mode} employee statistics....")
+        state = refresh_summaries(full=options["full"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Statistics cover {state.employees} employees "
+                f"up to id {state.high_water_mark}."
+            )
+        )
@@ -0,0 +1,85 @@
+"""
+Django command to write the memory-mapped employee snapshot file
+"""
+import select
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api_pandas.snapshot import (
+    CHANGE_CHANNEL, snapshot_settings, write_snapshot_file
+)
+
+
+class Command(BaseCommand):
+    """Django command to regenerate the shared employee snapshot"""
+
+    help = (
+        "Write the employees to the Arrow file the statistics workers "
+        "memory-map, replacing it atomically. With --watch, keep running "
+        "and rewrite it after every committed Employee change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            help="Snapshot file; defaults to STATISTICS_SNAPSHOT['FILE'].",
+        )
+        parser.add_argument("--watch", action="store_true")
+        parser.add_argument(
+            "--debounce",
+            type=float,
+            default=1.0,
+            help="Seconds to gather further changes before rewriting.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        path = options["path"] or snapshot_settings()["FILE"]
+        if not path:
+            raise CommandError(
+                "Pass --path or set STATISTICS_SNAPSHOT['FILE']."
+            )
+        if options["watch"] and connection.vendor != "postgresql":
+            raise CommandError("--watch needs PostgreSQL notifications.")
+        if options["watch"]:
+            self.listen()
+        self.write(path)
+        while options["watch"]:
+            self.wait_for_change(options["debounce"])
+            self.write(path)
+
+    def write(self, path):
+        started = time.perf_counter()
+        try:
+            rows = write_snapshot_file(path)
+        except OSError as exc:
+            raise CommandError(exc)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {rows} employees to {path} in "
+                f"{time.perf_counter() - started:.2f}s."
+            )
+        )
+
+    def listen(self):
+        connection.ensure_connection()
+        connection.connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANGE_CHANNEL}")
+
+    def wait_for_change(self, debounce):
+        raw = connection.connection
+        while not self.drain(raw):
+            select.select([raw], [], [])
+        deadline = time.monotonic() + debounce
+        while time.monotonic() < deadline:
+            select.select([raw], [], [], deadline - time.monotonic())
+            self.drain(raw)
+
+    def drain(self, raw):
+        raw.poll()
+        received = bool(raw.notifies)
+        raw.notifies.clear()
+        return received
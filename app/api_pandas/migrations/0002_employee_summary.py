@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_pandas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('industry', 'Industry'), ('years_of_experience', 'Years of experience')], max_length=32)),
+                ('value', models.CharField(max_length=255)),
+                ('employees', models.BigIntegerField(default=0)),
+                ('salary_count', models.BigIntegerField(default=0)),
+                ('salary_sum', models.DecimalField(decimal_places=2, default=0, max_digits=24)),
+                ('salary_sum_of_squares', models.DecimalField(decimal_places=4, default=0, max_digits=38)),
+                ('date_of_birth_days_sum', models.BigIntegerField(default=0)),
+                ('date_of_birth_min', models.DateField(blank=True, null=True)),
+                ('date_of_birth_max', models.DateField(blank=True, null=True)),
+                ('salary_sketch', models.JSONField(default=dict)),
+            ],
+            options={
+                'ordering': ['dimension', 'value'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EmployeeSummaryState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employees', models.BigIntegerField(default=0)),
+                ('high_water_mark', models.BigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='employeesummary',
+            constraint=models.UniqueConstraint(fields=('dimension', 'value'), name='unique_employee_summary_dimension_value'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:01
+
+from django.db import migrations, models
+
+
+def sync_id_sequence(apps, schema_editor):
+    # Rows used to get MAX(id) + 1 and never advanced the serial sequence.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "SELECT setval(pg_get_serial_sequence('api_pandas_employee', 'id'), "
+        "COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM api_pandas_employee"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_pandas', '0002_employee_summary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employee',
+            name='id',
+            field=models.AutoField(primary_key=True, serialize=False),
+        ),
+        migrations.RunPython(sync_id_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:09
+
+from django.db import DatabaseError, migrations, models, transaction
+
+SEARCH_FIELDS = ['first_name', 'last_name', 'industry']
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # icontains compiles to UPPER(column) LIKE UPPER(%s), which a trigram
+    # index on UPPER(column) serves. Skipped when pg_trgm is not installed.
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        if cursor.fetchone() is None:
+            return
+        try:
+            with transaction.atomic(using=connection.alias):
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except DatabaseError:
+            return
+        for field in SEARCH_FIELDS:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS employee_{field}_trgm '
+                f'ON api_pandas_employee '
+                f'USING gin (UPPER({field}) gin_trgm_ops)'
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS employee_{field}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_pandas', '0003_employee_id_sequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['industry', 'id'], name='employee_industry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['first_name', 'id'], name='employee_first_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['last_name', 'id'], name='employee_last_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['date_of_birth', 'id'], name='employee_birth_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['salary', 'id'], name='employee_salary_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['years_of_experience', 'id'], name='employee_experience_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
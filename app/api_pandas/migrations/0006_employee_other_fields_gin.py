@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:36
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_pandas', '0005_employee_data_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['other_fields'], name='employee_other_fields_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_pandas', '0006_employee_other_fields_gin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeesummary',
+            name='salary_distinct',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:09
+
+from django.db import migrations, models
+
+
+LOGGED_COLUMNS = (
+    'first_name, last_name, date_of_birth, industry, salary, '
+    'years_of_experience, other_fields, updated_at'
+)
+TRIGGERS = [
+    # (event, transition table, operation)
+    ('INSERT', 'NEW TABLE AS changed_rows', 'I'),
+    ('UPDATE', 'NEW TABLE AS changed_rows', 'U'),
+    ('DELETE', 'OLD TABLE AS changed_rows', 'D'),
+]
+
+
+def create_history_triggers(apps, schema_editor):
+    # Statement-level triggers with transition tables log a bulk write
+    # with one INSERT ... SELECT instead of one insert per row.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f"CREATE FUNCTION api_pandas_log_employee_changes() "
+        f"RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+        f"INSERT INTO api_pandas_employeechange (employee_id, operation, "
+        f"changed_at, {LOGGED_COLUMNS}) "
+        f"SELECT id, TG_ARGV[0], clock_timestamp(), {LOGGED_COLUMNS} "
+        f"FROM changed_rows ORDER BY id; "
+        f"RETURN NULL; END $$"
+    )
+    for event, transition, operation in TRIGGERS:
+        schema_editor.execute(
+            f"CREATE TRIGGER employee_log_{event.lower()} AFTER {event} "
+            f"ON api_pandas_employee REFERENCING {transition} "
+            f"FOR EACH STATEMENT "
+            f"EXECUTE FUNCTION api_pandas_log_employee_changes('{operation}')"
+        )
+    # Existing employees start the log.
+    schema_editor.execute(
+        f"INSERT INTO api_pandas_employeechange (employee_id, operation, "
+        f"changed_at, {LOGGED_COLUMNS}) "
+        f"SELECT id, 'I', clock_timestamp(), {LOGGED_COLUMNS} "
+        f"FROM api_pandas_employee ORDER BY id"
+    )
+
+
+def drop_history_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for event, _, _ in TRIGGERS:
+        schema_editor.execute(
+            f"DROP TRIGGER IF EXISTS employee_log_{event.lower()} "
+            f"ON api_pandas_employee"
+        )
+    schema_editor.execute(
+        "DROP FUNCTION IF EXISTS api_pandas_log_employee_changes()"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_pandas', '0007_employee_summary_salary_distinct'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('employee_id', models.IntegerField()),
+                ('operation', models.CharField(choices=[('I', 'Insert'), ('U', 'Update'), ('D', 'Delete'), ('C', 'Checkpoint')], max_length=1)),
+                ('changed_at', models.DateTimeField()),
+                ('first_name', models.CharField(max_length=255)),
+                ('last_name', models.CharField(max_length=255)),
+                ('date_of_birth', models.DateField()),
+                ('industry', models.CharField(blank=True, max_length=255, null=True)),
+                ('salary', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('years_of_experience', models.PositiveIntegerField(blank=True, null=True)),
+                ('other_fields', models.JSONField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EmployeeCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_change_id', models.BigIntegerField()),
+                ('covers_until', models.DateTimeField()),
+                ('first_row_id', models.BigIntegerField(default=0)),
+                ('last_row_id', models.BigIntegerField(default=0)),
+                ('employees', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['last_change_id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='employeechange',
+            index=models.Index(fields=['changed_at', 'id'], name='employee_change_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeechange',
+            index=models.Index(fields=['employee_id', 'id'], name='employee_change_employee_idx'),
+        ),
+        migrations.RunPython(create_history_triggers, drop_history_triggers),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_pandas', '0008_employee_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeSummaryFolded',
+            fields=[
+                ('employee_id', models.IntegerField(primary_key=True, serialize=False)),
+            ],
+        ),
+    ]
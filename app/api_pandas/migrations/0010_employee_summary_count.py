@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_pandas', '0009_employee_summary_folded'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeSummaryCount',
+            fields=[
+                ('stripe', models.IntegerField(primary_key=True, serialize=False)),
+                ('employees', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
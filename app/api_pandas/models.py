@@ -1,13 +1,80 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connection, connections, models
+from django.utils import timezone
 
 
 def next_available_id():
+    # Only referenced by migration 0001; ids now come from the sequence.
     max_id = Employee.objects.all().aggregate(models.Max("id"))["id__max"] or 0
     return max_id + 1
 
 
+def employee_id_sequence():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_get_serial_sequence(%s, 'id')",
+            [Employee._meta.db_table],
+        )
+        return cursor.fetchone()[0]
+
+
+def allocate_employee_ids(count):
+    """Reserve ``count`` ids from the sequence for rows inserted later."""
+    if not count:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            [employee_id_sequence(), count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def sync_employee_id_sequence(min_value=None):
+    """Move the id sequence past ``min_value`` or the largest stored id.
+
+    Needed after rows are written with explicit ids, which the sequence
+    does not see. The sequence never moves backwards.
+    """
+    sequence = employee_id_sequence()
+    with connection.cursor() as cursor:
+        if min_value is None:
+            cursor.execute(
+                "SELECT MAX(id) FROM %s"
+                % connection.ops.quote_name(Employee._meta.db_table)
+            )
+            min_value = cursor.fetchone()[0]
+        if not min_value:
+            return
+        cursor.execute(
+            "SELECT setval(%%s, GREATEST(%%s, last_value)) FROM %s" % sequence,
+            [sequence, min_value],
+        )
+
+
+def bump_data_version(using="default"):
+    """Count one Employee write in ``EmployeeDataVersion``.
+
+    Returns the version the write moved the data to.
+    """
+    db = connections[using]
+    with db.cursor() as cursor:
+        cursor.execute(
+            "UPDATE %s SET version = version + 1, updated_at = NOW() "
+            "WHERE id = 1 RETURNING version"
+            % db.ops.quote_name(EmployeeDataVersion._meta.db_table)
+        )
+        row = cursor.fetchone()
+    if row is not None:
+        return row[0]
+    _, created = EmployeeDataVersion.objects.using(using).get_or_create(
+        pk=1, defaults={"version": 1, "updated_at": timezone.now()}
+    )
+    return 1 if created else bump_data_version(using)
+
+
 class Employee(models.Model):
-    id = models.AutoField(primary_key=True, default=next_available_id)
+    id = models.AutoField(primary_key=True)
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
     date_of_birth = models.DateField()
@@ -18,9 +85,210 @@ class Employee(models.Model):
     years_of_experience = models.PositiveIntegerField(blank=True, null=True)
 
     other_fields = models.JSONField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.id}"
 
     class Meta:
         ordering = ["id"]
+        # Filter and ordering columns of the employee list, with ``id`` as
+        # the keyset pagination tiebreaker. Trigram indexes for the searched
+        # columns are created by migration 0004 when pg_trgm is available.
+        # The GIN index serves ``other_fields`` containment (``@>``), and the
+        # index_other_fields command adds B-tree indexes on frequent keys.
+        indexes = [
+            models.Index(
+                fields=["industry", "id"], name="employee_industry_idx"
+            ),
+            models.Index(
+                fields=["first_name", "id"], name="employee_first_name_idx"
+            ),
+            models.Index(
+                fields=["last_name", "id"], name="employee_last_name_idx"
+            ),
+            models.Index(
+                fields=["date_of_birth", "id"], name="employee_birth_idx"
+            ),
+            models.Index(fields=["salary", "id"], name="employee_salary_idx"),
+            models.Index(
+                fields=["years_of_experience", "id"],
+                name="employee_experience_idx",
+            ),
+            models.Index(
+                fields=["updated_at", "id"], name="employee_updated_idx"
+            ),
+            GinIndex(
+                fields=["other_fields"],
+                opclasses=["jsonb_path_ops"],
+                name="employee_other_fields_gin",
+            ),
+        ]
+
+
+class EmployeeSummary(models.Model):
+    """Materialized aggregates of employees sharing one dimension value.
+
+    Rows are built by the ``refresh_statistics`` management command and
+    then kept up to date by Employee writes.
+    """
+
+    INDUSTRY = "industry"
+    YEARS_OF_EXPERIENCE = "years_of_experience"
+    DIMENSIONS = [
+        (INDUSTRY, "Industry"),
+        (YEARS_OF_EXPERIENCE, "Years of experience"),
+    ]
+
+    dimension = models.CharField(max_length=32, choices=DIMENSIONS)
+    value = models.CharField(max_length=255)
+    employees = models.BigIntegerField(default=0)
+    salary_count = models.BigIntegerField(default=0)
+    salary_sum = models.DecimalField(
+        max_digits=24, decimal_places=2, default=0
+    )
+    salary_sum_of_squares = models.DecimalField(
+        max_digits=38, decimal_places=4, default=0
+    )
+    date_of_birth_days_sum = models.BigIntegerField(default=0)
+    date_of_birth_min = models.DateField(blank=True, null=True)
+    date_of_birth_max = models.DateField(blank=True, null=True)
+    salary_sketch = models.JSONField(default=dict)
+    salary_distinct = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"{self.dimension}={self.value} ({self.employees})"
+
+    class Meta:
+        ordering = ["dimension", "value"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dimension", "value"],
+                name="unique_employee_summary_dimension_value",
+            )
+        ]
+
+
+class EmployeeSummaryState(models.Model):
+    """Single row recording when and up to which id summaries were built."""
+
+    employees = models.BigIntegerField(default=0)
+    high_water_mark = models.BigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Employee summary up to id {self.high_water_mark}"
+
+
+class EmployeeSummaryCount(models.Model):
+    """Employees created less deleted since the last summary refresh.
+
+    Spread over stripes by employee id, so that concurrent writes rarely
+    wait on the same row; refreshes fold them into the summary state.
+    """
+
+    STRIPES = 16
+
+    stripe = models.IntegerField(primary_key=True)
+    employees = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Employee summary count stripe {self.stripe}"
+
+
+class EmployeeSummaryFolded(models.Model):
+    """Employee above the high-water mark already folded into summaries.
+
+    Summaries follow ORM creates as they happen; a refresh skips these
+    employees, then forgets them once its high-water mark passes them.
+    """
+
+    employee_id = models.IntegerField(primary_key=True)
+
+    def __str__(self):
+        return f"Employee {self.employee_id} folded into summaries"
+
+
+class EmployeeDataVersion(models.Model):
+    """Single row counting Employee writes, for conditional requests."""
+
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Employee data version {self.version}"
+
+
+class EmployeeChange(models.Model):
+    """Append-only log of Employee rows.
+
+    Every inserted, updated or deleted row is appended by database
+    triggers (migration 0008), so bulk writes and imports are logged like
+    API writes. Inserts and updates log the row as written, deletes the
+    row as it was. Checkpoints append a copy of every employee's latest
+    row as one block of ``CHECKPOINT`` rows.
+    """
+
+    INSERT = "I"
+    UPDATE = "U"
+    DELETE = "D"
+    CHECKPOINT = "C"
+    OPERATIONS = [
+        (INSERT, "Insert"),
+        (UPDATE, "Update"),
+        (DELETE, "Delete"),
+        (CHECKPOINT, "Checkpoint"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    employee_id = models.IntegerField()
+    operation = models.CharField(max_length=1, choices=OPERATIONS)
+    changed_at = models.DateTimeField()
+    first_name = models.CharField(max_length=255)
+    last_name = models.CharField(max_length=255)
+    date_of_birth = models.DateField()
+    industry = models.CharField(max_length=255, blank=True, null=True)
+    salary = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True
+    )
+    years_of_experience = models.PositiveIntegerField(blank=True, null=True)
+    other_fields = models.JSONField(blank=True, null=True)
+    updated_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.operation} employee {self.employee_id} (#{self.id})"
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["changed_at", "id"], name="employee_change_time_idx"
+            ),
+            models.Index(
+                fields=["employee_id", "id"],
+                name="employee_change_employee_idx",
+            ),
+        ]
+
+
+class EmployeeCheckpoint(models.Model):
+    """The employees after every change up to ``last_change_id``.
+
+    Their rows are the ``EmployeeChange`` checkpoint rows with ids from
+    ``first_row_id`` to ``last_row_id``. Taken by the checkpoint_employees
+    command.
+    """
+
+    last_change_id = models.BigIntegerField()
+    # When the last change it includes was made.
+    covers_until = models.DateTimeField()
+    first_row_id = models.BigIntegerField(default=0)
+    last_row_id = models.BigIntegerField(default=0)
+    employees = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Checkpoint up to change {self.last_change_id}"
+
+    class Meta:
+        ordering = ["last_change_id"]
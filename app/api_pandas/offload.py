@@ -0,0 +1,97 @@
+"""
+Bounded offloading of statistics work for the async views.
+
+Computations run on a fixed-size thread pool, so a slow aggregation never
+blocks the event loop and at most ``MAX_WORKERS`` run at once (pandas
+releases the GIL in most groupby kernels). Requests for a computation that
+is already running wait for that one instead of starting another, and new
+work is refused once ``MAX_PENDING`` distinct computations are queued.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+DEFAULTS = {
+    'MAX_WORKERS': 4,
+    'MAX_PENDING': 64,
+}
+
+
+def executor_settings():
+    return {**DEFAULTS, **getattr(settings, 'STATISTICS_EXECUTOR', {})}
+
+
+class Overloaded(Exception):
+    pass
+
+
+class StatisticsExecutor:
+    def __init__(self):
+        self._executor = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.computations = 0
+        self.coalesced = 0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=executor_settings()['MAX_WORKERS'],
+                thread_name_prefix='statistics',
+            )
+        return self._executor
+
+    def submit(self, key, function, *args):
+        """Start ``function(*args)`` unless ``key`` is already running.
+
+        Returns the ``concurrent.futures.Future`` of the computation, which
+        is shared by every caller asking for the same ``key`` meanwhile.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            if len(self._inflight) >= executor_settings()['MAX_PENDING']:
+                raise Overloaded("Too many statistics being computed.")
+            future = self.executor.submit(self._call, function, *args)
+            self._inflight[key] = future
+            self.computations += 1
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    async def run(self, key, function, *args):
+        # A cancelled caller must not cancel the computation it shares.
+        return await asyncio.shield(
+            asyncio.wrap_future(self.submit(key, function, *args))
+        )
+
+    def _call(self, function, *args):
+        # Pool threads outlive requests, so manage their connections the
+        # way request_started/request_finished do.
+        close_old_connections()
+        try:
+            return function(*args)
+        finally:
+            close_old_connections()
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def reset(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._inflight = {}
+            self.computations = 0
+            self.coalesced = 0
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+statistics_executor = StatisticsExecutor()
@@ -0,0 +1,290 @@
+import base64
+import json
+import operator
+from collections import OrderedDict
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CustomPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over the requested ordering plus an ``id`` tiebreaker.
+
+    Without ``?ordering=``, searches keep the relevance order of
+    ``RankedSearchFilter``, with the rank in the cursor.
+
+    Each page is fetched with a ``WHERE`` on the last row's sort key
+    instead of an ``OFFSET``, so deep pages cost the same as the first one.
+    NULLs sort as PostgreSQL does (last ascending, first descending).
+    ``?count=exact`` adds a ``COUNT(*)``; ``?count=estimate`` adds the
+    planner's row estimate, read from ``pg_class.reltuples`` for an
+    unfiltered list.
+    """
+    page_size = CustomPagination.page_size
+    page_size_query_param = CustomPagination.page_size_query_param
+    max_page_size = CustomPagination.max_page_size
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.count = self.get_count(queryset, request)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [(field, not desc) for field, desc in ordering]
+        if position is not None:
+            queryset = queryset.filter(
+                self.after(ordering, position),
+                self.bound(ordering, position),
+            )
+        queryset = queryset.order_by(*[
+            f'-{field}' if desc else field for field, desc in ordering
+        ])
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.first = results[0] if results else None
+        self.last = results[-1] if results else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        fields = OrderingFilter().get_ordering(request, queryset, view) or []
+        ranked = 'search_rank' in queryset.query.annotations
+        if ranked and not request.query_params.get(
+            OrderingFilter.ordering_param
+        ):
+            fields = ['-search_rank']
+        ordering = [
+            (field.lstrip('-'), field.startswith('-')) for field in fields
+        ]
+        if 'id' not in [field for field, _ in ordering]:
+            ordering.append(('id', False))
+        return ordering
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    def after(self, ordering, position):
+        """Q matching rows sorted after ``position`` in ``ordering``."""
+        if len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        clauses = []
+        equal = Q()
+        for (field, desc), value in zip(ordering, position):
+            beyond = self.beyond(field, desc, value)
+            if beyond is not None:
+                clauses.append(equal & beyond)
+            if value is None:
+                equal &= Q(**{f'{field}__isnull': True})
+            else:
+                equal &= Q(**{field: value})
+        if not clauses:
+            return Q(pk__in=[])
+        return reduce(operator.or_, clauses)
+
+    def bound(self, ordering, position):
+        """Redundant range on the leading sort field.
+
+        Implied by ``after``, but unlike its ``OR`` it lets PostgreSQL
+        range-scan an index on the leading field instead of filtering.
+        """
+        (field, desc), value = ordering[0], position[0]
+        if value is None:
+            return Q()
+        bound = Q(**{f'{field}__lte' if desc else f'{field}__gte': value})
+        if not desc and self.nullable(field):
+            bound |= Q(**{f'{field}__isnull': True})
+        return bound
+
+    def nullable(self, field):
+        try:
+            return self.model._meta.get_field(field).null
+        except FieldDoesNotExist:
+            return True
+
+    def beyond(self, field, desc, value):
+        if value is None:
+            return Q(**{f'{field}__isnull': False}) if desc else None
+        if desc:
+            return Q(**{f'{field}__lt': value})
+        beyond = Q(**{f'{field}__gt': value})
+        if self.nullable(field):
+            beyond |= Q(**{f'{field}__isnull': True})
+        return beyond
+
+    def position(self, instance):
+        if isinstance(instance, dict):
+            return [instance[field] for field, _ in self.ordering]
+        return [getattr(instance, field) for field, _ in self.ordering]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            return list(cursor['p']), bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        cursor = {'p': self.position(instance)}
+        if reverse:
+            cursor['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(cursor, cls=DjangoJSONEncoder).encode()
+        ).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.count is not None:
+            response['count'] = self.count
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Include an exact or estimated total count.',
+                'schema': {'type': 'string', 'enum': ['exact', 'estimate']},
+            },
+        ]
+
+
+def estimate_count(queryset):
+    """Planner estimate of the number of rows ``queryset`` returns."""
+    connection = connections[queryset.db]
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    sql, params = queryset.order_by().query.get_compiler(
+        queryset.db
+    ).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+
+class EmployeePagination(BasePagination):
+    """
+    Page numbers by default; keyset pagination with ``?pagination=cursor``
+    or when a ``cursor`` is given.
+    """
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.page_number = CustomPagination()
+        self.keyset = KeysetPagination()
+        self.paginator = self.page_number
+
+    def paginate_queryset(self, queryset, request, view=None):
+        use_keyset = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.keyset.cursor_query_param in request.query_params
+        )
+        self.paginator = self.keyset if use_keyset else self.page_number
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.page_number.get_schema_operation_parameters(view)
+            + self.keyset.get_schema_operation_parameters(view)
+            + [{
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Use "cursor" for keyset pagination.',
+                'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+            }]
+        )
@@ -0,0 +1,29 @@
+import json
+
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON lazily, one object per line.
+
+    ``request.data`` becomes a generator, so large uploads are consumed as
+    the view iterates them instead of being loaded up front. Lines that are
+    not valid JSON are passed through as strings for the view to reject.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        return self._rows(stream, encoding)
+
+    def _rows(self, stream, encoding):
+        for line in stream:
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line
@@ -0,0 +1,50 @@
+"""
+JSON rendering through orjson, when it is installed.
+
+``FastJSONRenderer`` produces the same documents as DRF's ``JSONRenderer``
+several times faster, and encodes NumPy arrays and scalars natively. NaN
+and infinities, which ``JSONRenderer`` refuses, become ``null``. Without
+orjson, or when an indented response is requested, it falls back to
+``JSONRenderer``.
+"""
+import decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSONRenderer escapes these, as JavaScript treats them as line breaks.
+LINE_SEPARATORS = [
+    (b'\xe2\x80\xa8', b'\\u2028'),
+    (b'\xe2\x80\xa9', b'\\u2029'),
+]
+
+
+def default(value):
+    if isinstance(value, decimal.Decimal):
+        # What DecimalField renders, rather than JSONEncoder's float.
+        return str(value)
+    return JSONEncoder().default(value)
+
+
+class FastJSONRenderer(JSONRenderer):
+    options = (
+        orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        if orjson is not None else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        rendered = orjson.dumps(data, default=default, option=self.options)
+        for separator, escaped in LINE_SEPARATORS:
+            rendered = rendered.replace(separator, escaped)
+        return rendered
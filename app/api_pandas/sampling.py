@@ -0,0 +1,273 @@
+"""
+Statistics over a uniform sample of employees.
+
+``?sample=`` is either a fraction of the table (``0.05``) or a number of
+rows (``20000``, drawn as the matching fraction of the planner's row
+estimate). Rows are drawn by PostgreSQL with ``TABLESAMPLE`` (``BERNOULLI``
+by default, or ``SYSTEM`` blocks, which is faster but less uniform when
+similar rows share pages). Filters apply to the sampled rows, and
+``?seed=`` makes the draw repeatable.
+
+Only the sample is loaded into pandas. Every record carries confidence
+intervals (``ci``) for its counts, means, medians, percentiles and
+percentages. Means use the normal approximation, quantiles the binomial
+interval of order statistics, and percentages and counts the binomial
+variance of the share. Counts and sums are scaled up to the whole table.
+"""
+import math
+import time
+from statistics import NormalDist
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+from api_pandas.aggregation import (
+    STATISTICS, StatisticsQueryError, age_in_years, elapsed_ms, python_value
+)
+from api_pandas.loaders import load_employee_frame
+
+DEFAULTS = {
+    'METHOD': 'BERNOULLI',
+    'CONFIDENCE': 0.95,
+}
+METHODS = ('BERNOULLI', 'SYSTEM')
+
+
+def sampling_settings():
+    return {**DEFAULTS, **getattr(settings, 'STATISTICS_SAMPLING', {})}
+
+
+def number(params, name, convert):
+    try:
+        return convert(params[name])
+    except ValueError:
+        raise StatisticsQueryError(
+            f"{name} must be a number, not {params[name]!r}."
+        ) from None
+
+
+class Sample:
+    """How many employees to sample, and how sure to be of the results."""
+
+    def __init__(self, rows=None, fraction=None, seed=None, confidence=None):
+        options = sampling_settings()
+        if options['METHOD'] not in METHODS:
+            raise ValueError(
+                f"Unknown sampling method {options['METHOD']!r}"
+            )
+        self.method = options['METHOD']
+        self.rows = rows
+        self.fraction = fraction
+        self.seed = seed
+        self.confidence = confidence or options['CONFIDENCE']
+        if (rows is None) == (fraction is None):
+            raise StatisticsQueryError("Sample either rows or a fraction.")
+        if rows is not None and rows < 1:
+            raise StatisticsQueryError("Sample at least one row.")
+        if fraction is not None and not 0 < fraction <= 1:
+            raise StatisticsQueryError(
+                "A sample fraction is greater than 0 and at most 1."
+            )
+        if not 0 < self.confidence < 1:
+            raise StatisticsQueryError(
+                "confidence is between 0 and 1, e.g. 0.95."
+            )
+
+    @classmethod
+    def parse(cls, params):
+        """The sample ``?sample=`` asks for, or ``None``."""
+        if not params.get('sample'):
+            return None
+        value = params['sample']
+        is_fraction = any(c in value for c in '.eE')
+        return cls(
+            rows=None if is_fraction else number(params, 'sample', int),
+            fraction=number(params, 'sample', float) if is_fraction else None,
+            seed=number(params, 'seed', int) if params.get('seed') else None,
+            confidence=(
+                number(params, 'confidence', float)
+                if params.get('confidence') else None
+            ),
+        )
+
+    @property
+    def z(self):
+        return NormalDist().inv_cdf((1 + self.confidence) / 2)
+
+    def percent(self, queryset):
+        """Percentage of the table to draw."""
+        if self.fraction is not None:
+            return self.fraction * 100
+        return min(100.0, self.rows / estimated_rows(queryset) * 100)
+
+    def draw(self, queryset):
+        """Restrict ``queryset`` to sampled rows; returns it and the rate."""
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            raise StatisticsQueryError("Sampling needs PostgreSQL.")
+        percent = self.percent(queryset)
+        model = queryset.model
+        sql = (
+            f'SELECT {connection.ops.quote_name(model._meta.pk.column)} '
+            f'FROM {connection.ops.quote_name(model._meta.db_table)} '
+            f'TABLESAMPLE {self.method} (%s)'
+        )
+        params = [percent]
+        if self.seed is not None:
+            sql += ' REPEATABLE (%s)'
+            params.append(self.seed)
+        sampled = queryset.filter(pk__in=RawSQL(sql, params))
+        return sampled, percent / 100
+
+    def describe(self, rows, rate):
+        return {
+            'rows': rows,
+            'fraction': rate,
+            'method': self.method,
+            'confidence': self.confidence,
+        }
+
+
+def estimated_rows(queryset):
+    """The planner's estimate of the table's rows, or its exact count."""
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row and row[0] >= 1:
+        return row[0]
+    # Never analyzed.
+    return max(queryset.model._default_manager.using(queryset.db).count(), 1)
+
+
+def mean_interval(values, z):
+    if len(values) < 2:
+        return None
+    half = z * values.std() / math.sqrt(len(values))
+    mean = values.mean()
+    return [mean - half, mean + half]
+
+
+def quantile_interval(values, fraction, z):
+    """Order statistics bracketing the ``fraction`` quantile."""
+    values = values.sort_values().to_numpy()
+    count = len(values)
+    if not count:
+        return None
+    spread = z * math.sqrt(count * fraction * (1 - fraction))
+    lower = max(math.floor(count * fraction - spread), 0)
+    upper = min(math.ceil(count * fraction + spread), count - 1)
+    return [float(values[lower]), float(values[upper])]
+
+
+def share_interval(part, total, z):
+    if not total:
+        return None
+    share = part / total
+    half = z * math.sqrt(share * (1 - share) / total)
+    return [max(share - half, 0.0), min(share + half, 1.0)]
+
+
+def group_intervals(query, df, sample, rate):
+    """Confidence intervals of the metrics of ``query`` per group."""
+    z = sample.z
+    total = len(df)
+    keys = [dimension.series(df) for dimension in query.group_by]
+    groups = df.groupby(keys, observed=True) if keys else [((), df)]
+    intervals = {}
+    for key, group in groups:
+        if not isinstance(key, tuple):
+            key = (key,)
+        found = {}
+        for metric in query.metrics:
+            interval = metric_interval(metric, group, total, z, rate)
+            if interval is not None:
+                found[metric.name] = interval
+        intervals[tuple(python_value(value) for value in key)] = found
+    return intervals
+
+
+def metric_interval(metric, group, total, z, rate):
+    if metric.method == 'percentage':
+        share = share_interval(len(group), total, z)
+        return share and [bound * 100 for bound in share]
+    if metric.method == 'count' and metric.field is None:
+        # Each employee is sampled independently with probability rate.
+        half = z * math.sqrt(len(group) * (1 - rate))
+        return [
+            max(len(group) - half, 0) / rate, (len(group) + half) / rate
+        ]
+    if metric.field is None:
+        return None
+    if metric.field == 'age':
+        values = age_in_years(group)
+    else:
+        values = group[metric.field]
+    values = values.dropna().astype(float)
+    if metric.method == 'mean':
+        return mean_interval(values, z)
+    fraction = 0.5 if metric.method == 'median' else metric.fraction
+    if fraction is None:
+        return None
+    return quantile_interval(values, fraction, z)
+
+
+def sampled_records(query, df, sample, rate):
+    records = query.frame(df)
+    intervals = group_intervals(query, df, sample, rate)
+    for record in records:
+        key = tuple(record[dimension.name] for dimension in query.group_by)
+        for metric in query.metrics:
+            value = record[metric.name]
+            if metric.method in ('count', 'sum') and value is not None:
+                record[metric.name] = value / rate
+        record['ci'] = intervals.get(key, {})
+    return records
+
+
+def sample_statistic(query, queryset, sample):
+    """Evaluate ``query`` over a sample of ``queryset``.
+
+    Returns the records, each with its confidence intervals under ``ci``,
+    and a description of the sample.
+    """
+    sampled, rate = sample.draw(queryset)
+    df = load_employee_frame(query.columns, sampled.order_by())
+    return sampled_records(query, df, sample, rate), sample.describe(
+        len(df), rate
+    )
+
+
+def sample_statistics(names, queryset, sample):
+    """``compute_statistics`` counterpart of ``sample_statistic``.
+
+    Every statistic is computed from one sample.
+    """
+    for name in names:
+        if name not in STATISTICS:
+            raise StatisticsQueryError(
+                f"Unknown statistic {name!r}; choose from "
+                f"{', '.join(STATISTICS)}."
+            )
+    started = time.perf_counter()
+    columns = []
+    for name in names:
+        columns.extend(
+            c for c in STATISTICS[name].columns if c not in columns
+        )
+    sampled, rate = sample.draw(queryset)
+    df = load_employee_frame(columns, sampled.order_by())
+    results = {
+        name: sampled_records(STATISTICS[name], df, sample, rate)
+        for name in names
+    }
+    meta = {
+        'engine': 'sample',
+        'sample': sample.describe(len(df), rate),
+        'total_ms': elapsed_ms(started),
+    }
+    return results, meta
@@ -1,8 +1,11 @@
+from django.utils import timezone
 from rest_framework import serializers
 from api_pandas.models import Employee
 
 
 class EmployeeSerializer(serializers.ModelSerializer):
+    """Pass ``fields=[...]`` to render only those fields."""
+
     date_of_birth = serializers.DateField(
         input_formats=['%d/%m/%Y', '%Y-%m-%d']
         )
@@ -11,9 +14,81 @@ class EmployeeSerializer(serializers.ModelSerializer):
         model = Employee
         fields = '__all__'
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     def validate_salary(self, value):
         if value and value < 0:
             raise serializers.ValidationError(
                 "Annual income must be a positive value."
             )
         return value
+
+
+class EmployeeBatchSerializer(serializers.ListSerializer):
+    """Validates a batch row by row so one bad row does not reject the rest.
+
+    After ``is_valid()``, ``validated_data`` holds the valid rows and
+    ``row_errors`` maps the position of every invalid row to its errors.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        self.row_errors = {}
+        self.valid_rows = []
+        validated = []
+        for index, item in enumerate(data):
+            try:
+                validated.append(self.child.run_validation(item))
+            except serializers.ValidationError as exc:
+                self.row_errors[index] = exc.detail
+            else:
+                self.valid_rows.append(index)
+        return validated
+
+
+class EmployeeBulkSerializer(EmployeeSerializer):
+    id = serializers.IntegerField(required=False, min_value=1)
+
+    class Meta(EmployeeSerializer.Meta):
+        list_serializer_class = EmployeeBatchSerializer
+
+
+def iso_datetime(value):
+    # Matches DateTimeField's ISO 8601 output.
+    value = timezone.localtime(value).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+class EmployeeValuesSerializer(serializers.BaseSerializer):
+    """Read-only ``EmployeeSerializer`` equivalent for ``values()`` rows.
+
+    Renders the same representation without model instances or per-field
+    serializer calls; rows must hold every name in ``fields``, and any
+    other keys (annotations used for ordering) are left out. Like
+    ``EmployeeSerializer``, takes ``fields=[...]`` to render fewer.
+    """
+
+    # In EmployeeSerializer's order, which puts declared fields first.
+    fields = list(EmployeeSerializer().fields)
+    converters = {
+        'date_of_birth': lambda value: value.isoformat(),
+        'salary': lambda value: f'{value:f}',
+        'updated_at': iso_datetime,
+    }
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            self.fields = [name for name in self.fields if name in fields]
+
+    def to_representation(self, row):
+        data = {name: row[name] for name in self.fields}
+        for name, convert in self.converters.items():
+            if data.get(name) is not None:
+                data[name] = convert(data[name])
+        return data
@@ -0,0 +1,66 @@
+"""
+Keep the statistics cache, the summaries and the data version in step with
+Employee writes.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from api_pandas.cache import statistics_cache
+from api_pandas.models import Employee, bump_data_version
+from api_pandas.snapshot import announce_change
+from api_pandas.summary import SUMMARY_FIELDS, apply_write, mark_stale
+
+TRACKED_FIELDS = SUMMARY_FIELDS
+
+
+def statistic_fields(instance):
+    if instance.get_deferred_fields().intersection(TRACKED_FIELDS):
+        return None
+    return {field: getattr(instance, field) for field in TRACKED_FIELDS}
+
+
+def record_write(old, new, using, version):
+    transaction.on_commit(
+        partial(statistics_cache.record_write, old, new, version),
+        using=using,
+    )
+
+
+@receiver(post_init, sender=Employee)
+def remember_statistic_fields(sender, instance, **kwargs):
+    instance._statistic_fields = statistic_fields(instance)
+
+
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, created, using, **kwargs):
+    version = bump_data_version(using)
+    announce_change(using)
+    old = instance._statistic_fields
+    new = statistic_fields(instance)
+    if created:
+        record_write(None, new, using, version)
+        apply_write(None, new, instance.pk)
+    elif old is None or new is None:
+        transaction.on_commit(statistics_cache.invalidate, using=using)
+        mark_stale()
+    else:
+        record_write(old, new, using, version)
+        apply_write(old, new, instance.pk)
+    instance._statistic_fields = new
+
+
+@receiver(post_delete, sender=Employee)
+def employee_deleted(sender, instance, using, **kwargs):
+    version = bump_data_version(using)
+    announce_change(using)
+    if instance._statistic_fields is None:
+        transaction.on_commit(statistics_cache.invalidate, using=using)
+        mark_stale()
+    else:
+        record_write(
+            instance._statistic_fields, None, using, version
+        )
+        apply_write(instance._statistic_fields, None, instance.pk)
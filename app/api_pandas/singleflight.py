@@ -0,0 +1,120 @@
+"""
+Single-flight execution of expensive computations.
+
+Concurrent callers asking for the same key share one execution: the first
+caller (the leader) runs the function while the others wait for its result
+or exception. Across processes, leaders can additionally take a PostgreSQL
+session advisory lock derived from the key; a leader queued behind another
+process then rechecks the shared cache before computing, and usually finds
+the result the other process just stored.
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+POLL_INTERVAL = 0.05
+
+
+def advisory_key(key):
+    """Map ``key`` onto the signed 64-bit space of advisory lock ids."""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+@contextmanager
+def advisory_lock(key, timeout=None, using='default'):
+    """Hold the session advisory lock for ``key`` on ``using``.
+
+    Waits up to ``timeout`` seconds (without limit when ``None``) and
+    yields whether the lock was acquired; past the timeout the body runs
+    unlocked, so a stuck holder delays other processes but never blocks
+    them.
+    """
+    connection = connections[using]
+    lock_id = advisory_key(key)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [lock_id])
+            acquired = cursor.fetchone()[0]
+            if acquired or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                break
+            time.sleep(POLL_INTERVAL)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [lock_id])
+
+
+class Flight:
+    """One execution that callers of the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, function, recheck=None, lock=False, timeout=None):
+        """Return ``function()``, sharing one call among callers of ``key``.
+
+        With ``lock``, the leader runs under the advisory lock for ``key``
+        and first calls ``recheck``, whose result is returned instead of
+        calling ``function`` unless it is ``None``.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+            else:
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = self._lead(key, function, recheck, lock, timeout)
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def _lead(self, key, function, recheck, lock, timeout):
+        if not lock:
+            return self._execute(function)
+        with advisory_lock(key, timeout):
+            if recheck is not None:
+                result = recheck()
+                if result is not None:
+                    return result
+            return self._execute(function)
+
+    def _execute(self, function):
+        with self._lock:
+            self.executions += 1
+        return function()
+
+    def reset(self):
+        with self._lock:
+            self.executions = 0
+            self.shared = 0
@@ -0,0 +1,174 @@
+"""
+Mergeable sketches for approximate statistics.
+"""
+import base64
+import hashlib
+import math
+
+
+class QuantileSketch:
+    """Log-bucketed histogram answering quantiles within ``alpha``.
+
+    Positive values fall into the bucket ``ceil(log_gamma(value))`` with
+    ``gamma = (1 + alpha) / (1 - alpha)``, so any quantile is estimated
+    with a relative error of at most ``alpha`` (the DDSketch scheme).
+    Sketches built over disjoint rows merge by adding bucket counts.
+    """
+
+    def __init__(self, alpha=0.01, buckets=None, zeros=0):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.buckets = dict(buckets or {})
+        self.zeros = zeros
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.buckets.values())
+
+    def key(self, value):
+        return math.ceil(math.log(value, self.gamma))
+
+    def add(self, value, count=1):
+        if value is None:
+            return
+        value = float(value)
+        if value <= 0:
+            self.zeros += count
+        else:
+            key = self.key(value)
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self._drop_empty()
+
+    def add_bucket(self, key, count):
+        """Add ``count`` values whose bucket key was computed elsewhere."""
+        if key is None:
+            self.zeros += count
+        else:
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self._drop_empty()
+
+    def merge(self, other):
+        if other.alpha != self.alpha:
+            raise ValueError("Cannot merge sketches with different accuracy.")
+        self.zeros += other.zeros
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self._drop_empty()
+        return self
+
+    def quantile(self, q):
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1.")
+        count = self.count
+        if not count:
+            return None
+        # Interpolated between the neighbouring ranks, like pandas and
+        # PostgreSQL's percentile_cont, which keeps the relative error
+        # within alpha of their result.
+        rank = q * (count - 1)
+        lower = self.value_at(math.floor(rank))
+        upper = self.value_at(math.ceil(rank))
+        return lower + (rank - math.floor(rank)) * (upper - lower)
+
+    def value_at(self, rank):
+        """Estimate of the ``rank``-th smallest value, counting from 0."""
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {
+            'alpha': self.alpha,
+            'zeros': self.zeros,
+            'buckets': {
+                str(key): count for key, count in self.buckets.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if not data:
+            return cls()
+        return cls(
+            alpha=data['alpha'],
+            buckets={int(k): v for k, v in data['buckets'].items()},
+            zeros=data['zeros'],
+        )
+
+    def _drop_empty(self):
+        self.buckets = {k: v for k, v in self.buckets.items() if v}
+
+
+class HyperLogLog:
+    """Distinct counter over ``2 ** precision`` registers.
+
+    Each value is hashed to 64 bits (the first 16 hex digits of its MD5, so
+    that SQL can compute the same registers); the top ``precision`` bits
+    pick a register, which keeps the highest rank (leading zeros + 1) of
+    the remaining bits. Estimates have a standard error of about
+    ``1.04 / sqrt(2 ** precision)``. Sketches merge by taking the maximum
+    of each register; values cannot be removed.
+    """
+
+    def __init__(self, precision=12, registers=None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers or self.size)
+
+    @property
+    def standard_error(self):
+        return 1.04 / math.sqrt(self.size)
+
+    def register(self, text):
+        """Register index and rank of ``text``."""
+        digest = hashlib.md5(text.encode()).digest()
+        bits = int.from_bytes(digest[:8], 'big')
+        width = 64 - self.precision
+        rest = bits & ((1 << width) - 1)
+        return bits >> width, width - rest.bit_length() + 1
+
+    def add(self, text):
+        self.add_register(*self.register(text))
+
+    def add_register(self, index, rank):
+        """Add a value whose register was computed elsewhere."""
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different accuracy.")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self):
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(
+            2.0 ** -rank for rank in self.registers
+        )
+        empty = self.registers.count(0)
+        if raw <= 2.5 * size and empty:
+            # Linear counting is more accurate for small cardinalities.
+            return size * math.log(size / empty)
+        return raw
+
+    def to_dict(self):
+        return {
+            'precision': self.precision,
+            'registers': base64.b64encode(self.registers).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if not data:
+            return cls()
+        return cls(
+            precision=data['precision'],
+            registers=base64.b64decode(data['registers']),
+        )
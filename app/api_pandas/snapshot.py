@@ -0,0 +1,333 @@
+"""
+Process-wide, read-only snapshot of the employee table as a DataFrame.
+
+Statistics computed in pandas read their columns from one shared frame
+instead of loading the table per request. The snapshot is versioned by the
+``EmployeeDataVersion`` row, which every Employee write bumps, bulk writes
+included, so a stale snapshot is detected with one counter read in every
+worker process alike.
+
+A stale snapshot is rebuilt either lazily by the first reader noticing it
+(``'lazy'``) or by a background thread while readers keep using the
+previous frame (``'background'``). Either way the new frame is built aside
+and swapped in with one assignment, so readers never see a partial frame.
+Code storing what it computes, like the statistics cache, wraps the
+computation in ``reads()`` to learn whether it saw an outdated frame.
+
+With ``FILE`` set, the snapshot is instead an Arrow IPC (Feather v2) file
+written by ``manage.py write_employee_snapshot`` and memory-mapped by every
+worker process, so numeric and date columns live in shared page cache
+rather than in each worker. The writer replaces the file with an atomic
+rename; readers notice the new inode on their next request. Mapping the
+file needs pyarrow; without it, statistics read the database.
+"""
+import importlib.util
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connection, connections
+
+from api_pandas.loaders import _apply_dtypes, load_employee_frame
+from api_pandas.models import EmployeeDataVersion
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'REFRESH': 'background',
+    'COLUMNS': [
+        'id', 'date_of_birth', 'industry', 'salary', 'years_of_experience',
+        'other_fields',
+    ],
+    'FILE': None,
+}
+REFRESH_MODES = ('lazy', 'background')
+# JSON documents cannot be memory-mapped, so files leave other_fields out.
+MAPPED_COLUMNS = [
+    'id', 'date_of_birth', 'industry', 'salary', 'years_of_experience',
+]
+CHANGE_CHANNEL = 'employee_changes'
+
+
+def snapshot_settings():
+    return {**DEFAULTS, **getattr(settings, 'STATISTICS_SNAPSHOT', {})}
+
+
+def current_version():
+    return EmployeeDataVersion.objects.filter(pk=1).values_list(
+        'version', flat=True
+    ).first() or 0
+
+
+def write_snapshot_file(path):
+    """Write every employee to the Arrow file ``path``; return the rows.
+
+    Columns are stored uncompressed with NaN for missing salaries, so that
+    readers map salaries and dates without copying them.
+    """
+    import pyarrow as pa
+
+    df = load_employee_frame(MAPPED_COLUMNS)
+    table = pa.Table.from_arrays(
+        [
+            pa.array(df['id'].to_numpy()),
+            pa.array(df['date_of_birth'].to_numpy()),
+            pa.array(df['industry']),
+            pa.array(df['salary'].to_numpy()),
+            pa.array(df['years_of_experience'], type=pa.int32()),
+        ],
+        names=MAPPED_COLUMNS,
+    )
+    temporary = f'{path}.{os.getpid()}.tmp'
+    try:
+        with pa.OSFile(temporary, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return len(df)
+
+
+def file_version(path):
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def announce_change(using='default'):
+    """Wake ``write_employee_snapshot --watch`` once the write commits."""
+    if not snapshot_settings()['FILE']:
+        return
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'NOTIFY {CHANGE_CHANNEL}')
+
+
+class Snapshot:
+    """One immutable build of the employee frame."""
+
+    def __init__(self, frame, version, build_seconds, table=None):
+        self.frame = frame
+        self.version = version
+        self.build_seconds = build_seconds
+        self.built_at = time.time()
+        # Keeps the memory map, which the frame's buffers point into, open.
+        self.table = table
+
+    def memory(self):
+        """Bytes held by each column, counting Python objects."""
+        usage = self.frame.memory_usage(index=True, deep=True)
+        return {str(column): int(size) for column, size in usage.items()}
+
+
+class SnapshotReads:
+    """Whether frames read within ``EmployeeSnapshot.reads`` were outdated."""
+
+    def __init__(self):
+        self.outdated = False
+
+
+class EmployeeSnapshot:
+    def __init__(self):
+        self._local = threading.local()
+        self._current = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresh = None
+        self.builds = 0
+
+    @property
+    def enabled(self):
+        options = snapshot_settings()
+        return bool(options['ENABLED'] or options['FILE'])
+
+    def usable(self, queryset, columns):
+        """Whether ``columns`` of ``queryset`` can be read from here.
+
+        Only whole-table reads of committed data qualify.
+        """
+        options = snapshot_settings()
+        if options['FILE']:
+            available = MAPPED_COLUMNS
+            if importlib.util.find_spec('pyarrow') is None:
+                return False
+            if not os.path.exists(options['FILE']):
+                return False
+        else:
+            available = options['COLUMNS']
+        return (
+            self.enabled
+            and not connection.in_atomic_block
+            and not queryset.query.where
+            and set(columns) <= set(available)
+        )
+
+    def frame(self, columns=None):
+        """Return the current frame, restricted to ``columns``."""
+        snapshot = self.get()
+        if columns is None:
+            return snapshot.frame
+        return snapshot.frame[list(columns)]
+
+    def get(self):
+        path = snapshot_settings()['FILE']
+        if path:
+            return self.mapped(path)
+        version = current_version()
+        snapshot = self._current
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        mode = snapshot_settings()['REFRESH']
+        if mode not in REFRESH_MODES:
+            raise ValueError(f"Unknown snapshot refresh mode {mode!r}")
+        if snapshot is not None and mode == 'background':
+            self.refresh_in_background(version)
+            reads = getattr(self._local, 'reads', None)
+            if reads is not None:
+                reads.outdated = True
+            return snapshot
+        with self._lock:
+            snapshot = self._current
+            if snapshot is None or snapshot.version != version:
+                snapshot = self.build(version)
+            return snapshot
+
+    @contextmanager
+    def reads(self):
+        """Track whether this thread reads an outdated frame meanwhile."""
+        previous = getattr(self._local, 'reads', None)
+        reads = self._local.reads = SnapshotReads()
+        try:
+            yield reads
+        finally:
+            self._local.reads = previous
+            if previous is not None and reads.outdated:
+                previous.outdated = True
+
+    def build(self, version):
+        started = time.perf_counter()
+        frame = load_employee_frame(snapshot_settings()['COLUMNS'])
+        snapshot = Snapshot(frame, version, time.perf_counter() - started)
+        self._current = snapshot
+        self.builds += 1
+        return snapshot
+
+    def mapped(self, path):
+        version = file_version(path)
+        snapshot = self._current
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        import pyarrow as pa
+
+        with self._lock:
+            snapshot = self._current
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+            started = time.perf_counter()
+            source = pa.memory_map(path)
+            table = pa.ipc.open_file(source).read_all()
+            frame = _apply_dtypes(table.to_pandas(split_blocks=True))
+            snapshot = Snapshot(
+                frame, version, time.perf_counter() - started, table
+            )
+            self._current = snapshot
+            self.builds += 1
+            return snapshot
+
+    def preload(self):
+        """Map the snapshot file, writing it first if there is none.
+
+        Called from ``app/wsgi.py`` so that workers start with the map in
+        place; under ``gunicorn --preload`` it is done once before forking.
+        """
+        path = snapshot_settings()['FILE']
+        if not path:
+            return
+        if importlib.util.find_spec('pyarrow') is None:
+            logger.warning(
+                "Employee snapshot %s not loaded: pyarrow is not installed.",
+                path,
+            )
+            return
+        try:
+            if not os.path.exists(path):
+                write_snapshot_file(path)
+            self.mapped(path)
+        except (DatabaseError, OSError) as exc:
+            logger.warning("Employee snapshot %s not loaded: %s", path, exc)
+
+    def refresh_in_background(self, version):
+        with self._refresh_lock:
+            if self._refresh is not None and self._refresh.is_alive():
+                return
+            self._refresh = threading.Thread(
+                target=self._refresh_worker,
+                args=(version,),
+                name='employee-snapshot-refresh',
+                daemon=True,
+            )
+            self._refresh.start()
+
+    def _refresh_worker(self, version):
+        try:
+            with self._lock:
+                if self._current is None or self._current.version != version:
+                    self.build(version)
+        finally:
+            # The thread opened its own database connection.
+            connection.close()
+
+    def wait(self, timeout=None):
+        """Block until a running background refresh has finished."""
+        refresh = self._refresh
+        if refresh is not None:
+            refresh.join(timeout)
+
+    def diagnostics(self):
+        snapshot = self._current
+        refresh = self._refresh
+        options = snapshot_settings()
+        info = {
+            'enabled': self.enabled,
+            'source': 'file' if options['FILE'] else 'database',
+            'refresh': 'file' if options['FILE'] else options['REFRESH'],
+            'refreshing': refresh is not None and refresh.is_alive(),
+            'builds': self.builds,
+            'version': None,
+        }
+        if snapshot is None:
+            return info
+        memory = snapshot.memory()
+        info.update({
+            'version': snapshot.version,
+            'current_version': (
+                file_version(options['FILE']) if options['FILE']
+                else current_version()
+            ),
+            'rows': len(snapshot.frame),
+            'built_at': snapshot.built_at,
+            'build_seconds': round(snapshot.build_seconds, 6),
+            'dtypes': {
+                str(column): str(dtype)
+                for column, dtype in snapshot.frame.dtypes.items()
+            },
+            'memory_bytes': memory,
+            'total_bytes': sum(memory.values()),
+        })
+        return info
+
+    def reset(self):
+        self.wait()
+        with self._lock:
+            self._current = None
+            self.builds = 0
+
+
+employee_snapshot = EmployeeSnapshot()
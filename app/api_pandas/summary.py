@@ -0,0 +1,544 @@
+"""
+Materialized per-dimension employee summaries.
+
+``refresh_summaries`` folds employees into ``EmployeeSummary`` rows, either
+from scratch or incrementally for ids above the stored high-water mark.
+While the last refresh is younger than ``STATISTICS_SUMMARY_MAX_AGE``
+seconds, ``summary_statistic`` answers the statistics it can express
+exactly from those rows without reading the Employee table.
+
+Once built, summaries follow Employee writes made through the ORM:
+``apply_write`` folds each one in, locking only the summaries it changes
+and counting employees in ``EmployeeSummaryCount`` stripes, and records
+the employees it adds above the high-water mark in
+``EmployeeSummaryFolded``. Incremental refreshes
+add the other employees above it, inserted behind the ORM's back. Bulk
+writes mark the summaries stale, so the next refresh rebuilds them. Salary
+sketches can only grow, so their distinct counts may overcount changed or
+deleted salaries until then.
+
+``approximate_statistic`` answers statistics queries from the summaries
+and their sketches, with a bound on the error of every metric. Summaries
+are only ever (re)built by the refresh_statistics command, never within a
+request.
+"""
+import datetime
+import math
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (
+    Count, F, Func, IntegerField, Max, Min, Subquery, Sum
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from api_pandas.aggregation import (
+    STATISTICS, StatisticsQueryError, elapsed_ms, sort_records, today
+)
+from api_pandas.models import (
+    Employee, EmployeeSummary, EmployeeSummaryCount, EmployeeSummaryFolded,
+    EmployeeSummaryState
+)
+from api_pandas.singleflight import advisory_key
+from api_pandas.sketches import HyperLogLog, QuantileSketch
+
+EPOCH = datetime.date(1970, 1, 1)
+GREGORIAN_YEAR = 365.2425
+# Employee fields the summaries are computed from.
+SUMMARY_FIELDS = ('industry', 'years_of_experience', 'salary', 'date_of_birth')
+# Advisory lock refreshes hold exclusively and apply_write shares.
+SUMMARY_LOCK = 'api_pandas:summaries'
+
+SUMMARY_STATISTICS = {
+    'average-salary': EmployeeSummary.INDUSTRY,
+    'average-salary-experience': EmployeeSummary.YEARS_OF_EXPERIENCE,
+    'percentage-employees': EmployeeSummary.INDUSTRY,
+}
+
+
+class EpochDays(Func):
+    """Days between the Unix epoch and a date column."""
+
+    template = "(%(expressions)s - DATE '1970-01-01')"
+    output_field = IntegerField()
+
+
+class SketchBucket(Func):
+    """Bucket key of ``QuantileSketch`` for positive values."""
+
+    template = 'CEIL(LN(%(expressions)s) / %(log_gamma)r)'
+    output_field = IntegerField()
+
+    def __init__(self, expression, gamma, **extra):
+        super().__init__(expression, log_gamma=math.log(gamma), **extra)
+
+
+class SalaryHash(Func):
+    """The 64 bits ``HyperLogLog`` hashes a salary's text to."""
+
+    template = "('x' || substr(md5(%(expressions)s::text), 1, 16))::bit(64)"
+
+
+class HashRegister(Func):
+    """``HyperLogLog.register`` index of a ``SalaryHash``."""
+
+    template = 'substring(%(expressions)s from 1 for %(precision)d)::int'
+    output_field = IntegerField()
+
+
+class HashRank(Func):
+    """``HyperLogLog.register`` rank of a ``SalaryHash``."""
+
+    template = (
+        'COALESCE(NULLIF(position(B\'1\' in substring(%(expressions)s '
+        'from %(start)d)), 0), %(empty)d)'
+    )
+    output_field = IntegerField()
+
+    def __init__(self, expression, precision, **extra):
+        super().__init__(
+            expression, start=precision + 1, empty=64 - precision + 1,
+            **extra
+        )
+
+
+def salary_text(value):
+    """A salary as PostgreSQL prints the column, which sketches hash."""
+    places = Employee._meta.get_field('salary').decimal_places
+    return f'{Decimal(str(value)):.{places}f}'
+
+
+def aggregate_rows(dimension, queryset):
+    queryset = queryset.order_by().exclude(**{f'{dimension}__isnull': True})
+    rows = {
+        str(row.pop(dimension)): row
+        for row in queryset.values(dimension).annotate(
+            employees=Count('pk'),
+            salary_count=Count('salary'),
+            salary_sum=Sum('salary'),
+            salary_sum_of_squares=Sum(F('salary') * F('salary')),
+            date_of_birth_days_sum=Sum(EpochDays('date_of_birth')),
+            date_of_birth_min=Min('date_of_birth'),
+            date_of_birth_max=Max('date_of_birth'),
+        )
+    }
+    sketches = {value: QuantileSketch() for value in rows}
+    buckets = (
+        queryset.filter(salary__gt=0)
+        .annotate(bucket=SketchBucket('salary', QuantileSketch().gamma))
+        .values(dimension, 'bucket')
+        .annotate(count=Count('pk'))
+    )
+    for bucket in buckets:
+        sketch = sketches[str(bucket[dimension])]
+        sketch.add_bucket(int(bucket['bucket']), bucket['count'])
+    for value, row in rows.items():
+        sketch = sketches[value]
+        sketch.zeros = row['salary_count'] - sketch.count
+        row['salary_sketch'] = sketch
+        row['salary_distinct'] = HyperLogLog()
+    precision = HyperLogLog().precision
+    registers = (
+        queryset.filter(salary__isnull=False)
+        .annotate(salary_hash=SalaryHash('salary'))
+        .annotate(
+            register=HashRegister('salary_hash', precision=precision),
+            rank=HashRank('salary_hash', precision),
+        )
+        .values(dimension, 'register')
+        .annotate(max_rank=Max('rank'))
+    )
+    for register in registers:
+        rows[str(register[dimension])]['salary_distinct'].add_register(
+            register['register'], register['max_rank']
+        )
+    return rows
+
+
+def merge_summary(summary, row):
+    summary.employees += row['employees']
+    summary.salary_count += row['salary_count']
+    summary.salary_sum += row['salary_sum'] or 0
+    summary.salary_sum_of_squares += row['salary_sum_of_squares'] or 0
+    summary.date_of_birth_days_sum += row['date_of_birth_days_sum'] or 0
+    summary.date_of_birth_min = min(
+        filter(None, [summary.date_of_birth_min, row['date_of_birth_min']])
+    )
+    summary.date_of_birth_max = max(
+        filter(None, [summary.date_of_birth_max, row['date_of_birth_max']])
+    )
+    summary.salary_sketch = (
+        QuantileSketch.from_dict(summary.salary_sketch)
+        .merge(row['salary_sketch'])
+        .to_dict()
+    )
+    summary.salary_distinct = (
+        HyperLogLog.from_dict(summary.salary_distinct)
+        .merge(row['salary_distinct'])
+        .to_dict()
+    )
+
+
+def summary_lock(shared=False):
+    """Hold the summaries' advisory lock until the transaction ends."""
+    if connection.vendor != 'postgresql':
+        return
+    function = (
+        'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {function}(%s)', [advisory_key(SUMMARY_LOCK)]
+        )
+
+
+def refresh_summaries(full=False):
+    """Fold employees into the summary tables and return the new state.
+
+    With ``full``, or when the summaries were marked stale, every summary
+    is rebuilt; otherwise only employees with an id above the stored
+    high-water mark are added, unless ``apply_write`` folded them in.
+    """
+    with transaction.atomic():
+        # Waits for writes folding into the summaries to commit.
+        summary_lock()
+        state, _ = (
+            EmployeeSummaryState.objects.select_for_update()
+            .get_or_create(pk=1)
+        )
+        counted = EmployeeSummaryCount.objects.aggregate(
+            employees=Sum('employees')
+        )['employees'] or 0
+        if full or state.refreshed_at is None:
+            EmployeeSummary.objects.all().delete()
+            EmployeeSummaryFolded.objects.all().delete()
+            state.employees = 0
+            state.high_water_mark = 0
+            counted = 0
+        high_water_mark = (
+            Employee.objects.aggregate(Max('id'))['id__max'] or 0
+        )
+        folded = EmployeeSummaryFolded.objects.filter(
+            employee_id__lte=high_water_mark
+        )
+        window = Employee.objects.filter(
+            id__gt=state.high_water_mark, id__lte=high_water_mark
+        ).exclude(id__in=folded.values('employee_id'))
+        for dimension, _ in EmployeeSummary.DIMENSIONS:
+            rows = aggregate_rows(dimension, window)
+            existing = {
+                summary.value: summary
+                for summary in EmployeeSummary.objects.filter(
+                    dimension=dimension, value__in=list(rows)
+                )
+            }
+            created = []
+            for value, row in rows.items():
+                summary = existing.get(value)
+                if summary is None:
+                    summary = EmployeeSummary(dimension=dimension, value=value)
+                    created.append(summary)
+                merge_summary(summary, row)
+            EmployeeSummary.objects.bulk_create(created)
+            EmployeeSummary.objects.bulk_update(
+                existing.values(),
+                [
+                    field.name
+                    for field in EmployeeSummary._meta.concrete_fields
+                    if field.name not in ('id', 'dimension', 'value')
+                ],
+            )
+        state.employees += window.count() + counted
+        EmployeeSummaryCount.objects.update(employees=0)
+        folded.delete()
+        state.high_water_mark = high_water_mark
+        state.refreshed_at = timezone.now()
+        state.save()
+    return state
+
+
+def summary_states():
+    """Summary states with ``total_employees``, counting the stripes."""
+    counted = EmployeeSummaryCount.objects.order_by().annotate(
+        total=Func(F('employees'), function='SUM')
+    ).values('total')
+    return EmployeeSummaryState.objects.annotate(
+        total_employees=F('employees') + Coalesce(Subquery(counted), 0)
+    )
+
+
+def fresh_state():
+    max_age = getattr(settings, 'STATISTICS_SUMMARY_MAX_AGE', None)
+    if not max_age:
+        return None
+    oldest = timezone.now() - datetime.timedelta(seconds=max_age)
+    return summary_states().filter(pk=1, refreshed_at__gte=oldest).first()
+
+
+def summary_statistic(name):
+    """Serve ``name`` from fresh summaries, or return ``None``."""
+    if name not in SUMMARY_STATISTICS:
+        return None
+    state = fresh_state()
+    if state is None:
+        return None
+    dimension = SUMMARY_STATISTICS[name]
+    summaries = EmployeeSummary.objects.filter(
+        dimension=dimension, employees__gt=0
+    )
+    if name == 'percentage-employees':
+        return [
+            {
+                'industry': summary.value,
+                'percentage': (
+                    summary.employees / state.total_employees * 100
+                ),
+            }
+            for summary in summaries.order_by('-employees', 'value')
+        ]
+    convert = int if dimension == EmployeeSummary.YEARS_OF_EXPERIENCE else str
+    rows = [
+        {
+            dimension: convert(summary.value),
+            'salary': (
+                float(summary.salary_sum / summary.salary_count)
+                if summary.salary_count else None
+            ),
+        }
+        for summary in summaries
+    ]
+    return sorted(rows, key=lambda row: row[dimension])
+
+
+def built_state():
+    """The summary state if the summaries are built and not stale."""
+    return summary_states().filter(pk=1, refreshed_at__isnull=False).first()
+
+
+def mark_stale():
+    """Have the next refresh rebuild the summaries from scratch."""
+    EmployeeSummaryState.objects.filter(pk=1).update(refreshed_at=None)
+
+
+def summary_row(values):
+    """Normalize the ``SUMMARY_FIELDS`` of an employee, as saved."""
+    if values is None:
+        return None
+    date_of_birth = values['date_of_birth']
+    if isinstance(date_of_birth, str):
+        date_of_birth = parse_date(date_of_birth)
+    salary = values['salary']
+    return {
+        'industry': values['industry'],
+        'years_of_experience': values['years_of_experience'],
+        'salary': None if salary is None else Decimal(salary_text(salary)),
+        'date_of_birth': date_of_birth,
+    }
+
+
+def fold_employee(summary, row, sign):
+    """Add (``sign=1``) or remove (``sign=-1``) one employee's ``row``."""
+    summary.employees += sign
+    days = (row['date_of_birth'] - EPOCH).days
+    summary.date_of_birth_days_sum += sign * days
+    if sign > 0:
+        # Removals cannot narrow the range; the next rebuild does.
+        summary.date_of_birth_min = min(filter(None, [
+            summary.date_of_birth_min, row['date_of_birth']
+        ]))
+        summary.date_of_birth_max = max(filter(None, [
+            summary.date_of_birth_max, row['date_of_birth']
+        ]))
+    salary = row['salary']
+    if salary is None:
+        return
+    summary.salary_count += sign
+    summary.salary_sum += sign * salary
+    summary.salary_sum_of_squares += sign * salary * salary
+    sketch = QuantileSketch.from_dict(summary.salary_sketch)
+    sketch.add(salary, sign)
+    summary.salary_sketch = sketch.to_dict()
+    if sign > 0:
+        distinct = HyperLogLog.from_dict(summary.salary_distinct)
+        distinct.add(salary_text(salary))
+        summary.salary_distinct = distinct.to_dict()
+
+
+def locked_summary(dimension, value):
+    summaries = EmployeeSummary.objects.select_for_update()
+    summary = summaries.filter(dimension=dimension, value=value).first()
+    if summary is None:
+        EmployeeSummary.objects.get_or_create(dimension=dimension, value=value)
+        summary = summaries.get(dimension=dimension, value=value)
+    return summary
+
+
+def count_employees(pk, change):
+    stripes = EmployeeSummaryCount.objects.filter(
+        stripe=pk % EmployeeSummaryCount.STRIPES
+    )
+    if not stripes.update(employees=F('employees') + change):
+        EmployeeSummaryCount.objects.get_or_create(
+            stripe=pk % EmployeeSummaryCount.STRIPES
+        )
+        stripes.update(employees=F('employees') + change)
+
+
+def apply_write(old, new, pk):
+    """Fold one Employee write into the summaries, if they are built.
+
+    ``old`` and ``new`` hold the ``SUMMARY_FIELDS`` of employee ``pk``
+    before and after the write, and are ``None`` for creates and deletes.
+    Employees above the high-water mark that were not created through the
+    ORM are left to the next refresh, which adds them as they are then.
+    """
+    old, new = summary_row(old), summary_row(new)
+    if old == new:
+        return
+    with transaction.atomic():
+        summary_lock(shared=True)
+        state = built_state()
+        if state is None:
+            return
+        if pk > state.high_water_mark:
+            if old is None:
+                EmployeeSummaryFolded.objects.get_or_create(employee_id=pk)
+            elif not EmployeeSummaryFolded.objects.filter(
+                employee_id=pk
+            ).exists():
+                return
+        changes = [
+            ((dimension, str(row[dimension])), row, sign)
+            for dimension, _ in EmployeeSummary.DIMENSIONS
+            for row, sign in ((old, -1), (new, 1))
+            if row is not None and row[dimension] is not None
+        ]
+        # Summaries are locked in one order, so writes cannot deadlock.
+        for group, row, sign in sorted(changes, key=lambda c: c[0]):
+            summary = locked_summary(*group)
+            fold_employee(summary, row, sign)
+            summary.save()
+        if (old is None) != (new is None):
+            count_employees(pk, 1 if old is None else -1)
+
+
+def approximate_statistic(query):
+    """Evaluate a ``StatisticsQuery`` from the summaries.
+
+    Supports grouping by one of ``EmployeeSummary.DIMENSIONS`` with
+    ``count``, ``percentage``, ``age:mean`` and any salary metric. Returns
+    the records and, for each metric, the bound on its error: ``relative``
+    to the exact value, or ``absolute``, holding always unless a
+    ``confidence`` is given. While the summaries are stale, the records
+    are computed exactly instead, with no error.
+    """
+    dimensions = dict(EmployeeSummary.DIMENSIONS)
+    if len(query.group_by) != 1 or query.group_by[0].name not in dimensions:
+        raise StatisticsQueryError(
+            f"Approximate statistics are grouped by one of "
+            f"{', '.join(dimensions)}."
+        )
+    dimension = query.group_by[0].name
+    bounds = {}
+    for metric in query.metrics:
+        bound = approximation_bound(metric)
+        if bound is None:
+            raise StatisticsQueryError(
+                f"Cannot approximate {metric.name!r}; use count, "
+                f"percentage, age:mean or a salary metric."
+            )
+        bounds[metric.name] = bound
+    state = built_state()
+    if state is None:
+        return query.run(), {name: {'relative': 0.0} for name in bounds}
+    convert = int if dimension == EmployeeSummary.YEARS_OF_EXPERIENCE else str
+    records = []
+    for summary in EmployeeSummary.objects.filter(
+        dimension=dimension, employees__gt=0
+    ):
+        record = {dimension: convert(summary.value)}
+        for metric in query.metrics:
+            record[metric.name] = approximate_metric(metric, summary, state)
+        records.append(record)
+    return sort_records(records, query.ordering), bounds
+
+
+def approximation_bound(metric):
+    if metric.field is None:
+        return {'relative': 0.0}
+    if metric.field == 'age':
+        # The mean of whole calendar ages is within half a year of the mean
+        # of the fractional ages, less a half, give or take the day a
+        # Gregorian year of 365.2425 days drifts from the calendar.
+        return {'absolute': 0.51} if metric.method == 'mean' else None
+    if metric.field != 'salary':
+        return None
+    if metric.method in ('count', 'sum', 'mean', 'std'):
+        return {'relative': 0.0}
+    if metric.method == 'distinct':
+        # Two standard errors.
+        return {
+            'relative': round(2 * HyperLogLog().standard_error, 4),
+            'confidence': 0.95,
+        }
+    return {'relative': QuantileSketch().alpha}
+
+
+def approximate_metric(metric, summary, state):
+    if metric.method == 'count' and metric.field is None:
+        return summary.employees
+    if metric.method == 'percentage':
+        return summary.employees / state.total_employees * 100
+    if metric.field == 'age':
+        mean_days = summary.date_of_birth_days_sum / summary.employees
+        days = (today() - EPOCH).days
+        return (days - mean_days) / GREGORIAN_YEAR - 0.5
+    count = summary.salary_count
+    if metric.method == 'count':
+        return count
+    if metric.method == 'sum':
+        return float(summary.salary_sum) if count else None
+    if metric.method == 'mean':
+        return float(summary.salary_sum / count) if count else None
+    if metric.method == 'std':
+        if count < 2:
+            return None
+        total = summary.salary_sum
+        variance = (
+            summary.salary_sum_of_squares - total * total / count
+        ) / (count - 1)
+        return math.sqrt(max(variance, 0))
+    if metric.method == 'distinct':
+        distinct = HyperLogLog.from_dict(summary.salary_distinct)
+        return round(distinct.estimate())
+    fraction = {'median': 0.5, 'min': 0, 'max': 1}.get(
+        metric.method, metric.fraction
+    )
+    return QuantileSketch.from_dict(summary.salary_sketch).quantile(fraction)
+
+
+def approximate_statistics(names):
+    """``compute_statistics`` counterpart of ``approximate_statistic``.
+
+    Returns the results by name and metadata holding the error bounds of
+    each statistic.
+    """
+    for name in names:
+        if name not in STATISTICS:
+            raise StatisticsQueryError(
+                f"Unknown statistic {name!r}; choose from "
+                f"{', '.join(STATISTICS)}."
+            )
+    started = time.perf_counter()
+    results = {}
+    meta = {'engine': 'summary', 'error': {}}
+    for name in names:
+        results[name], meta['error'][name] = approximate_statistic(
+            STATISTICS[name]
+        )
+    meta['total_ms'] = elapsed_ms(started)
+    return results, meta
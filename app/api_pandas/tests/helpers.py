@@ -0,0 +1,16 @@
+import datetime
+
+from api_pandas.models import Employee
+
+
+def create_employee(industry, salary, years_of_experience=None, **fields):
+    """Create an employee, named John Doe and born 1990-01-01 by default."""
+    return Employee.objects.create(**{
+        "first_name": "John",
+        "last_name": "Doe",
+        "date_of_birth": datetime.date(1990, 1, 1),
+        "industry": industry,
+        "salary": salary,
+        "years_of_experience": years_of_experience,
+        **fields,
+    })
@@ -0,0 +1,268 @@
+import datetime
+from unittest.mock import patch
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from api_pandas.aggregation import (
+    STATISTICS, StatisticsQuery, StatisticsQueryError, calendar_ages,
+    compute_statistic, compute_statistics
+)
+from api_pandas.loaders import load_employee_frame
+from api_pandas.models import Employee
+
+
+class AggregationEngineTestCase(TestCase):
+    def setUp(self):
+        rows = [
+            ("Software", 50000, 10, datetime.date(1990, 1, 1)),
+            ("Software", 70000, 5, datetime.date(1985, 6, 15)),
+            ("Software", 90000, 5, datetime.date(1970, 12, 31)),
+            ("Banks", 120000, 10, datetime.date(1960, 2, 29)),
+            ("Banks", None, 2, datetime.date(2000, 7, 4)),
+            (None, 30000, 2, datetime.date(1995, 3, 3)),
+        ]
+        for i, (industry, salary, experience, dob) in enumerate(rows):
+            Employee.objects.create(
+                first_name=f"Employee{i}",
+                last_name="Doe",
+                date_of_birth=dob,
+                industry=industry,
+                salary=salary,
+                years_of_experience=experience,
+                other_fields={"team": "blue" if i % 2 else "red"},
+            )
+
+    def assertSameRecords(self, sql_result, pandas_result, name):
+        self.assertEqual(len(sql_result), len(pandas_result), name)
+        for sql_row, pandas_row in zip(sql_result, pandas_result):
+            self.assertEqual(sql_row.keys(), pandas_row.keys(), name)
+            for key, value in sql_row.items():
+                self.assertAlmostEqual(value, pandas_row[key], msg=name)
+
+    def test_sql_matches_pandas_fallback(self):
+        for name in STATISTICS:
+            sql_result = compute_statistic(name)
+            with patch(
+                "api_pandas.aggregation.supports_sql", return_value=False
+            ):
+                pandas_result = compute_statistic(name)
+            self.assertSameRecords(sql_result, pandas_result, name)
+
+    def test_query_sql_matches_pandas_fallback(self):
+        queries = [
+            ("industry,other_fields.team", "salary:mean,count,salary:sum"),
+            ("age_band", "age:min,age:max,salary:p90,salary:std"),
+            ("years_of_experience", "percentage,salary:count,salary:median"),
+            ("", "count,salary:max,years_of_experience:sum"),
+        ]
+        for group_by, metrics in queries:
+            query = StatisticsQuery.parse(group_by, metrics)
+            sql_result = query.run()
+            with patch(
+                "api_pandas.aggregation.supports_sql", return_value=False
+            ):
+                pandas_result = query.run()
+            self.assertSameRecords(sql_result, pandas_result, metrics)
+
+    def test_json_keys_are_grouped_in_sql_over_the_snapshot(self):
+        query = StatisticsQuery.parse("other_fields.team", "count")
+        with patch(
+            "api_pandas.aggregation.employee_snapshot"
+        ) as snapshot:
+            snapshot.usable.return_value = True
+            result = query.run()
+        snapshot.frame.assert_not_called()
+        self.assertEqual(
+            result,
+            [
+                {"other_fields.team": "blue", "count": 3},
+                {"other_fields.team": "red", "count": 3},
+            ],
+        )
+
+    def test_query_several_dimensions_and_metrics(self):
+        query = StatisticsQuery.parse(
+            "industry,other_fields.team",
+            "count,salary:sum,salary:max",
+            "-count,industry,other_fields.team",
+        )
+        self.assertEqual(
+            query.run(),
+            [
+                {
+                    "industry": "Software",
+                    "other_fields.team": "red",
+                    "count": 2,
+                    "salary_sum": 140000.0,
+                    "salary_max": 90000.0,
+                },
+                {
+                    "industry": "Banks",
+                    "other_fields.team": "blue",
+                    "count": 1,
+                    "salary_sum": 120000.0,
+                    "salary_max": 120000.0,
+                },
+                {
+                    "industry": "Banks",
+                    "other_fields.team": "red",
+                    "count": 1,
+                    "salary_sum": None,
+                    "salary_max": None,
+                },
+                {
+                    "industry": "Software",
+                    "other_fields.team": "blue",
+                    "count": 1,
+                    "salary_sum": 70000.0,
+                    "salary_max": 70000.0,
+                },
+            ],
+        )
+
+    def test_query_filters_through_queryset(self):
+        query = StatisticsQuery.parse("industry", "salary:p50")
+        result = query.run(Employee.objects.filter(salary__lt=80000))
+        self.assertEqual(
+            result, [{"industry": "Software", "salary_p50": 60000.0}]
+        )
+
+    def test_invalid_queries(self):
+        invalid = [
+            ("salary", "count"),
+            ("industry", ""),
+            ("industry", "salary:mode"),
+            ("industry", "mean"),
+            ("industry", "bonus:mean"),
+            ("other_fields.a b", "count"),
+            ("industry", "count,count"),
+        ]
+        for group_by, metrics in invalid:
+            with self.assertRaises(StatisticsQueryError):
+                StatisticsQuery.parse(group_by, metrics)
+        with self.assertRaises(StatisticsQueryError):
+            StatisticsQuery.parse("industry", "count", "salary")
+        for bins in ("20,x", "40,30", "20,20", "-10,20"):
+            with self.assertRaises(StatisticsQueryError):
+                StatisticsQuery.parse("age_band", "count", bins=bins)
+        with self.assertRaises(StatisticsQueryError):
+            StatisticsQuery.parse("industry", "count", bins="20,30")
+
+    @patch(
+        "api_pandas.aggregation.today",
+        return_value=datetime.date(2025, 3, 1),
+    )
+    def test_age_bands_from_bins(self, patched_today):
+        # Ages 35, 39, 54, 65 (born February 29), 24 and 29.
+        query = StatisticsQuery.parse(
+            "age_band", "count,salary:mean,age:min", bins="30,40,60"
+        )
+        expected = [
+            {"age_band": 30, "count": 2, "salary_mean": 60000.0,
+             "age_min": 35},
+            {"age_band": 40, "count": 1, "salary_mean": 90000.0,
+             "age_min": 54},
+            {"age_band": 60, "count": 1, "salary_mean": 120000.0,
+             "age_min": 65},
+        ]
+        self.assertEqual(query.run(), expected)
+        with patch(
+            "api_pandas.aggregation.supports_sql", return_value=False
+        ):
+            self.assertEqual(query.run(), expected)
+
+    def test_average_salary_per_industry(self):
+        result = compute_statistic("average-salary")
+        self.assertEqual(
+            result,
+            [
+                {"industry": "Banks", "salary": 120000.0},
+                {"industry": "Software", "salary": 70000.0},
+            ],
+        )
+
+    def test_median_salary_per_industry(self):
+        result = compute_statistic("median-salary")
+        software = next(r for r in result if r["industry"] == "Software")
+        self.assertAlmostEqual(software["salary"], 70000.0)
+
+    def test_percentage_counts_unassigned_employees(self):
+        result = compute_statistic("percentage-employees")
+        self.assertEqual(
+            result[0], {"industry": "Software", "percentage": 50.0}
+        )
+        self.assertAlmostEqual(
+            sum(r["percentage"] for r in result), 5 / 6 * 100
+        )
+
+    def test_batch_matches_single_statistics(self):
+        for sql in (True, False):
+            with patch(
+                "api_pandas.aggregation.supports_sql", return_value=sql
+            ):
+                results, meta = compute_statistics(list(STATISTICS))
+                for name in STATISTICS:
+                    self.assertSameRecords(
+                        results[name], compute_statistic(name), name
+                    )
+            self.assertEqual(set(STATISTICS) - set(meta["timings_ms"]), set())
+
+    def test_batch_merges_statistics_sharing_dimensions(self):
+        _, meta = compute_statistics(list(STATISTICS))
+        self.assertEqual(meta["engine"], "sql")
+        self.assertCountEqual(
+            [sorted(p["statistics"]) for p in meta["passes"]],
+            [
+                ["average-salary-experience"],
+                sorted(set(STATISTICS) - {"average-salary-experience"}),
+            ],
+        )
+
+    def test_batch_loads_frame_once(self):
+        with patch(
+            "api_pandas.aggregation.supports_sql", return_value=False
+        ), patch(
+            "api_pandas.aggregation.load_employee_frame",
+            wraps=load_employee_frame,
+        ) as load:
+            _, meta = compute_statistics(["average-age", "median-salary"])
+        load.assert_called_once()
+        self.assertCountEqual(
+            load.call_args[0][0], ["industry", "date_of_birth", "salary"]
+        )
+        self.assertIn("load", meta["timings_ms"])
+
+    def test_batch_unknown_statistic(self):
+        with self.assertRaises(StatisticsQueryError):
+            compute_statistics(["average-height"])
+
+
+class CalendarAgesTestCase(SimpleTestCase):
+    def test_birthdays(self):
+        births = np.array(
+            ["1990-04-14", "1990-04-15", "1990-04-16", "2000-02-29"],
+            dtype="datetime64[D]",
+        )
+        self.assertEqual(
+            calendar_ages(births, datetime.date(2023, 4, 15)).tolist(),
+            [33, 33, 32, 23],
+        )
+        self.assertEqual(
+            calendar_ages(births, datetime.date(2023, 2, 28)).tolist(),
+            [32, 32, 32, 22],
+        )
+        self.assertEqual(
+            calendar_ages(births, datetime.date(2024, 2, 29)).tolist(),
+            [33, 33, 33, 24],
+        )
+
+    def test_day_numbers(self):
+        births = np.array(
+            ["1969-12-31", "1970-01-01", "1904-03-01"], dtype="datetime64[D]"
+        )
+        on = datetime.date(2021, 1, 1)
+        self.assertEqual(
+            calendar_ages(births.astype(np.int32), on).tolist(),
+            calendar_ages(births, on).tolist(),
+        )
+        self.assertEqual(calendar_ages(births, on).tolist(), [51, 51, 116])
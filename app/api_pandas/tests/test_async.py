@@ -0,0 +1,223 @@
+import asyncio
+import datetime
+import threading
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from api_pandas.aggregation import StatisticsQuery
+from api_pandas.cache import statistics_cache
+from api_pandas.models import Employee, EmployeeChange, bump_data_version
+from api_pandas.offload import statistics_executor
+
+
+def url(viewname, params=None, **kwargs):
+    # Django 3.2's AsyncClient drops the query string given as data.
+    return f"{reverse(viewname, kwargs=kwargs)}?{urlencode(params or {})}"
+
+
+def if_none_match(etag):
+    # ... and sends extra keyword arguments as headers named verbatim.
+    return {"If-None-Match": etag}
+
+
+class AsyncStatisticsTestCase(TransactionTestCase):
+    def setUp(self):
+        statistics_cache.reset()
+        statistics_executor.reset()
+        self.addCleanup(statistics_cache.reset)
+        self.addCleanup(statistics_executor.reset)
+        for industry, salary in [
+            ("Software", 50000), ("Software", 70000), ("Banks", 120000)
+        ]:
+            Employee.objects.create(
+                first_name="Jane",
+                last_name="Doe",
+                date_of_birth=datetime.date(1990, 1, 1),
+                industry=industry,
+                salary=salary,
+                years_of_experience=3,
+            )
+        self.client = AsyncClient()
+
+    async def test_named_statistic(self):
+        response = await self.client.get(
+            url(
+                "async-statistic",
+                {"salary__gte": 60000},
+                name="average-salary",
+            )
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {"industry": "Banks", "salary": 120000.0},
+                {"industry": "Software", "salary": 70000.0},
+            ],
+        )
+
+    async def test_query(self):
+        response = await self.client.get(
+            url(
+                "async-statistics-query",
+                {
+                    "group_by": "industry",
+                    "metrics": "count",
+                    "ordering": "-count",
+                },
+            )
+        )
+        self.assertEqual(
+            response.json(),
+            [
+                {"industry": "Software", "count": 2},
+                {"industry": "Banks", "count": 1},
+            ],
+        )
+
+    async def test_as_of(self):
+        before = await sync_to_async(self.delete_banks)()
+        response = await self.client.get(
+            url("async-statistic", {"as_of": before}, name="average-salary")
+        )
+        self.assertEqual(
+            response.json(),
+            [
+                {"industry": "Banks", "salary": 120000.0},
+                {"industry": "Software", "salary": 60000.0},
+            ],
+        )
+
+    async def test_other_fields(self):
+        await sync_to_async(
+            Employee.objects.filter(salary=70000).update
+        )(other_fields={"level": 3})
+        response = await self.client.get(
+            url(
+                "async-statistics-query",
+                {"metrics": "salary:mean", "other_fields__level": "3"},
+            )
+        )
+        self.assertEqual(response.json(), [{"salary_mean": 70000.0}])
+        response = await self.client.get(
+            url(
+                "async-statistics-query",
+                {"metrics": "count", "other_fields__a.b": "3"},
+            )
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def delete_banks(self):
+        before = EmployeeChange.objects.latest("id").changed_at
+        Employee.objects.filter(industry="Banks").delete()
+        return before.isoformat()
+
+    async def test_conditional_requests(self):
+        path = url("async-statistic", name="average-salary")
+        response = await self.client.get(path)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+        response = await self.client.get(path, **if_none_match(etag))
+        self.assertEqual(response.status_code, 304)
+        # Another process writes, without this process' signals.
+        await sync_to_async(self.write_elsewhere)()
+        response = await self.client.get(path, **if_none_match(etag))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            response.json()[0], {"industry": "Banks", "salary": 1000.0}
+        )
+        response = await self.client.get(
+            url(
+                "async-statistics-query",
+                {"group_by": "age_band", "metrics": "count"},
+            )
+        )
+        self.assertTrue(
+            response["ETag"].endswith(f'-{datetime.date.today()}"')
+        )
+        self.assertNotIn("Last-Modified", response)
+
+    def write_elsewhere(self):
+        Employee.objects.filter(industry="Banks").update(salary=1000)
+        bump_data_version()
+
+    async def test_errors(self):
+        response = await self.client.get(
+            url("async-statistic", name="average-height")
+        )
+        self.assertEqual(response.status_code, 404)
+        response = await self.client.get(
+            url("async-statistics-query", {"metrics": "bonus:mean"})
+        )
+        self.assertEqual(response.status_code, 400)
+        response = await self.client.get(
+            url(
+                "async-statistics-query",
+                {"metrics": "count", "salary__gte": "a lot"},
+            )
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_identical_requests_share_one_computation(self):
+        release = threading.Event()
+        run = StatisticsQuery.run
+
+        def slow_run(query, queryset=None):
+            release.wait(10)
+            return run(query, queryset)
+
+        async def request():
+            return await self.client.get(
+                url(
+                    "async-statistics-query",
+                    {"group_by": "industry", "metrics": "salary:max"},
+                )
+            )
+
+        with patch.object(
+            StatisticsQuery, "run", autospec=True, side_effect=slow_run
+        ) as patched:
+            requests = asyncio.gather(*(request() for _ in range(10)))
+            await asyncio.sleep(0.2)
+            release.set()
+            responses = await requests
+        self.assertEqual(patched.call_count, 1)
+        self.assertEqual(statistics_executor.coalesced, 9)
+        self.assertEqual(
+            {response.content for response in responses},
+            {responses[0].content},
+        )
+
+    @override_settings(STATISTICS_EXECUTOR={"MAX_WORKERS": 1})
+    async def test_cancelled_caller_leaves_shared_computation(self):
+        release = threading.Event()
+        # Occupy the only worker, so the shared computation is queued.
+        statistics_executor.submit("busy", release.wait, 10)
+        first, second = (
+            asyncio.ensure_future(
+                statistics_executor.run("sum", sum, [1, 2])
+            )
+            for _ in range(2)
+        )
+        await asyncio.sleep(0.1)
+        first.cancel()
+        await asyncio.sleep(0.1)
+        release.set()
+        self.assertEqual(await second, 3)
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.assertEqual(statistics_executor.coalesced, 1)
+
+    @override_settings(STATISTICS_EXECUTOR={"MAX_PENDING": 0})
+    async def test_overloaded(self):
+        response = await self.client.get(
+            url("async-statistics-query", {"metrics": "count"})
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
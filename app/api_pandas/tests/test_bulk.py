@@ -0,0 +1,115 @@
+import json
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api_pandas.models import Employee
+
+
+def employee_payload(i, **extra):
+    return {
+        "first_name": f"Employee{i}",
+        "last_name": "Doe",
+        "date_of_birth": "01/02/1990",
+        "industry": "Software",
+        "salary": 50000 + i,
+        "years_of_experience": i % 10,
+        **extra,
+    }
+
+
+class EmployeeBulkUpsertTestCase(APITestCase):
+    def setUp(self):
+        self.url = reverse("employee-bulk-upsert")
+
+    def test_bulk_create_in_batches(self):
+        payload = [employee_payload(i) for i in range(25)]
+        response = self.client.post(
+            self.url + "?batch_size=10", data=payload, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 25)
+        self.assertEqual(response.data["errors"], [])
+        self.assertEqual(Employee.objects.count(), 25)
+
+    def test_invalid_rows_are_reported_without_aborting(self):
+        payload = [
+            employee_payload(1),
+            employee_payload(2, salary=-5),
+            employee_payload(3, date_of_birth="yesterday"),
+            "not an employee",
+            employee_payload(4),
+        ]
+        response = self.client.post(
+            self.url + "?batch_size=2", data=payload, format="json"
+        )
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(
+            [error["row"] for error in response.data["errors"]], [1, 2, 3]
+        )
+        self.assertIn("salary", response.data["errors"][0]["errors"])
+        self.assertEqual(Employee.objects.count(), 2)
+
+    def test_upsert_updates_existing_ids(self):
+        self.client.post(
+            self.url,
+            data=[employee_payload(i, id=i) for i in (1, 2)],
+            format="json",
+        )
+        response = self.client.post(
+            self.url,
+            data=[
+                employee_payload(1, id=1, salary=99000),
+                employee_payload(3, id=3),
+            ],
+            format="json",
+        )
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual(Employee.objects.get(pk=1).salary, 99000)
+
+    def test_skip_existing_ids(self):
+        self.client.post(
+            self.url, data=[employee_payload(1, id=1)], format="json"
+        )
+        response = self.client.post(
+            self.url + "?on_conflict=skip",
+            data=[employee_payload(1, id=1, salary=1), employee_payload(2)],
+            format="json",
+        )
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["errors"][0]["row"], 0)
+        self.assertEqual(Employee.objects.get(pk=1).salary, 50001)
+        self.assertTrue(Employee.objects.filter(first_name="Employee2"))
+
+    def test_ndjson_stream(self):
+        lines = [json.dumps(employee_payload(i)) for i in range(5)]
+        lines.insert(2, "{broken")
+        response = self.client.post(
+            self.url,
+            data="\n".join(lines) + "\n",
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 5)
+        self.assertEqual(response.data["errors"][0]["row"], 2)
+
+    def test_non_list_payload(self):
+        response = self.client.post(
+            self.url, data=employee_payload(1), format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_single_create_after_explicit_ids(self):
+        self.client.post(
+            self.url,
+            data=[employee_payload(1, id=10 ** 6), employee_payload(2)],
+            format="json",
+        )
+        response = self.client.post(
+            reverse("employee-list-create"),
+            data=employee_payload(9),
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertGreater(response.data["id"], 10 ** 6)
@@ -0,0 +1,235 @@
+import datetime
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api_pandas.aggregation import STATISTICS, compute_statistic
+from api_pandas.cache import LRUBackend, get_statistic, statistics_cache
+from api_pandas.models import Employee, bump_data_version
+from api_pandas.signals import statistic_fields
+
+
+class LRUBackendTestCase(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        backend = LRUBackend(max_entries=2, ttl=60)
+        backend.set("a", 1)
+        backend.set("b", 2)
+        backend.get("a")
+        backend.set("c", 3)
+        self.assertEqual(backend.get("a"), 1)
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.get("c"), 3)
+
+    def test_entries_expire(self):
+        backend = LRUBackend(max_entries=2, ttl=60)
+        with patch("api_pandas.cache.time.monotonic", return_value=0):
+            backend.set("a", 1)
+        with patch("api_pandas.cache.time.monotonic", return_value=61):
+            self.assertIsNone(backend.get("a"))
+
+    def test_bump_drops_entries(self):
+        backend = LRUBackend(max_entries=2, ttl=60)
+        backend.set("a", 1)
+        self.assertEqual(backend.bump(), 2)
+        self.assertIsNone(backend.get("a"))
+
+
+class StatisticsCacheTestCase(TransactionTestCase):
+    def setUp(self):
+        statistics_cache.reset()
+        self.addCleanup(statistics_cache.reset)
+        for i, (industry, salary, experience) in enumerate([
+            ("Software", 50000, 10),
+            ("Software", 70000, 5),
+            ("Banks", 120000, 10),
+            ("Banks", None, 2),
+            (None, 30000, 2),
+        ]):
+            Employee.objects.create(
+                first_name=f"Employee{i}",
+                last_name="Doe",
+                date_of_birth=datetime.date(1990, 1, 1),
+                industry=industry,
+                salary=salary,
+                years_of_experience=experience,
+            )
+
+    def assertMatchesDatabase(self):
+        for name in STATISTICS:
+            expected = sorted(
+                compute_statistic(name), key=lambda row: str(row)
+            )
+            actual = sorted(get_statistic(name), key=lambda row: str(row))
+            self.assertEqual(len(actual), len(expected), name)
+            for actual_row, expected_row in zip(actual, expected):
+                self.assertEqual(actual_row.keys(), expected_row.keys())
+                for key, value in actual_row.items():
+                    self.assertAlmostEqual(value, expected_row[key], msg=name)
+
+    def test_cached_statistics_match_database(self):
+        self.assertMatchesDatabase()
+
+    def test_running_totals_serve_without_queries(self):
+        get_statistic("average-salary")
+        with self.assertNumQueries(0):
+            get_statistic("average-salary")
+            get_statistic("average-salary-experience")
+            get_statistic("percentage-employees")
+
+    def test_tagged_requests_use_running_totals(self):
+        client = APIClient()
+        url = reverse("average-salary-per-industry")
+        client.get(url)
+        # Only the data version is read.
+        with self.assertNumQueries(1):
+            client.get(url)
+        employee = Employee.objects.get(first_name="Employee0")
+        employee.salary = 90000
+        employee.save()
+        with self.assertNumQueries(1):
+            response = client.get(url)
+        self.assertEqual(
+            response.data,
+            [
+                {"industry": "Banks", "salary": 120000.0},
+                {"industry": "Software", "salary": 80000.0},
+            ],
+        )
+
+    def test_totals_follow_the_data_version(self):
+        get_statistic("average-salary", version=0)
+        version = statistics_cache._totals.version
+        with self.assertNumQueries(0):
+            get_statistic("average-salary", version=version)
+        # Another process writes, without this process' signals.
+        Employee.objects.filter(industry="Banks").update(salary=1000)
+        bump_data_version()
+        self.assertEqual(
+            get_statistic("average-salary", version=version + 1)[0],
+            {"industry": "Banks", "salary": 1000.0},
+        )
+
+    def test_writes_seen_by_the_seed_are_not_folded_again(self):
+        employee = Employee.objects.create(
+            first_name="Late",
+            last_name="Doe",
+            date_of_birth=datetime.date(1990, 1, 1),
+            industry="Banks",
+            salary=60000,
+            years_of_experience=3,
+        )
+        # The totals are seeded after the write committed but before its
+        # on_commit hook ran.
+        get_statistic("average-salary")
+        version = statistics_cache._totals.version
+        statistics_cache.record_write(
+            None, statistic_fields(employee), version
+        )
+        self.assertEqual(statistics_cache._totals.version, version)
+        self.assertMatchesDatabase()
+
+    def test_results_are_cached_per_parameters(self):
+        get_statistic("median-salary")
+        with self.assertNumQueries(0):
+            get_statistic("median-salary")
+        with self.assertNumQueries(1):
+            get_statistic("median-salary", {"page": "2"})
+
+    def test_repeated_parameters_are_cached_apart(self):
+        client = APIClient()
+        url = reverse("statistics-query")
+        response = client.get(url, {"metrics": ["salary:mean", "count"]})
+        self.assertEqual(set(response.data[0]), {"salary_mean", "count"})
+        response = client.get(url, {"metrics": "count"})
+        self.assertEqual(response.data, [{"count": 5}])
+        Employee.objects.filter(first_name="Employee0").update(
+            other_fields={"team": "web"}
+        )
+        Employee.objects.filter(first_name="Employee1").update(
+            other_fields={"team": "core"}
+        )
+        response = client.get(
+            url, {"metrics": "count", "other_fields__team": "web"}
+        )
+        self.assertEqual(response.data, [{"count": 1}])
+        response = client.get(
+            url, {"metrics": "count", "other_fields__team": ["core", "web"]}
+        )
+        self.assertEqual(response.data, [{"count": 2}])
+
+    def test_writes_update_statistics(self):
+        self.assertMatchesDatabase()
+        employee = Employee.objects.get(first_name="Employee0")
+        employee.salary = 90000
+        employee.industry = "Banks"
+        employee.save()
+        with self.assertNumQueries(0):
+            get_statistic("average-salary")
+        self.assertMatchesDatabase()
+        Employee.objects.get(first_name="Employee3").delete()
+        Employee.objects.create(
+            first_name="Jane",
+            last_name="Doe",
+            date_of_birth=datetime.date(1980, 1, 1),
+            industry="Retail",
+            salary=40000,
+            years_of_experience=3,
+        )
+        self.assertMatchesDatabase()
+
+    def test_bulk_writes_require_invalidation(self):
+        self.assertMatchesDatabase()
+        Employee.objects.update(salary=1000)
+        statistics_cache.invalidate()
+        self.assertMatchesDatabase()
+
+    @override_settings(STATISTICS_CACHE={"BACKEND": "django"})
+    def test_django_cache_backend(self):
+        statistics_cache.reset()
+        self.assertMatchesDatabase()
+        Employee.objects.filter(first_name="Employee1").delete()
+        self.assertMatchesDatabase()
+
+    def test_concurrent_misses_compute_once(self):
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(10)
+            return compute_statistic("median-salary")
+
+        def request(results):
+            results.append(get_statistic("median-salary", {}, compute))
+
+        results = []
+        threads = [
+            threading.Thread(target=request, args=(results,))
+            for _ in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        threading.Timer(0.2, release.set).start()
+        for thread in threads:
+            thread.join(10)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(statistics_cache.flight.shared, 5)
+        self.assertEqual(results, [compute_statistic("median-salary")] * 6)
+
+    @override_settings(STATISTICS_CACHE={"STALE_TIMEOUT": 60})
+    def test_stale_results_are_served_while_revalidating(self):
+        statistics_cache.reset()
+        before = get_statistic("median-salary")
+        Employee.objects.filter(first_name="Employee2").update(salary=10000)
+        statistics_cache.invalidate()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_statistic("median-salary"), before)
+        statistics_cache.wait(10)
+        with self.assertNumQueries(0):
+            after = get_statistic("median-salary")
+        self.assertEqual(after, compute_statistic("median-salary"))
+        self.assertNotEqual(after, before)
@@ -1,13 +1,29 @@
 """
 Test custom Django Management commands.
 """
+import datetime
+import importlib.util
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
 from unittest.mock import patch
 
+import pandas as pd
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
 from psycopg2 import OperationalError as Psycopg2Error
 
+from api_pandas.aggregation import StatisticsQuery
+from api_pandas.importers import read_chunks
+from api_pandas.models import Employee, EmployeeCheckpoint
+
 
 @patch("api_pandas.management.commands.wait_for_db.Command.check")
 class CommandTest(SimpleTestCase):
@@ -26,3 +42,302 @@ class CommandTest(SimpleTestCase):
         call_command("wait_for_db")
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+
+class ImportEmployeesCommandTest(TestCase):
+    """Test importing employee files."""
+
+    def setUp(self):
+        mocked_data_file_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "MOCK_DATA.json"
+        )
+        with open(mocked_data_file_path, "r") as file:
+            self.records = json.load(file)[:120]
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, frame_writer):
+        path = os.path.join(self.directory.name, name)
+        frame_writer(pd.DataFrame(self.records), path)
+        return path
+
+    def call(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_employees", *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def assertImported(self):
+        self.assertEqual(Employee.objects.count(), len(self.records))
+        first = Employee.objects.get(pk=self.records[0]["id"])
+        self.assertEqual(first.first_name, self.records[0]["first_name"])
+        self.assertEqual(first.date_of_birth, datetime.date(1978, 7, 9))
+        self.assertEqual(
+            first.other_fields, {"email": self.records[0]["email"]}
+        )
+        self.assertEqual(
+            sorted(
+                Employee.objects.values_list("industry", flat=True), key=str
+            ),
+            sorted((record["industry"] for record in self.records), key=str),
+        )
+
+    def test_import_csv_in_chunks(self):
+        path = self.write(
+            "employees.csv", lambda df, p: df.to_csv(p, index=False)
+        )
+        out, err = self.call(path, "--chunk-size", "50")
+        self.assertIn("rows/sec", out)
+        self.assertEqual(err, "")
+        self.assertImported()
+
+    def test_import_ndjson(self):
+        path = self.write(
+            "employees.ndjson",
+            lambda df, p: df.to_json(p, orient="records", lines=True),
+        )
+        self.call(path)
+        self.assertImported()
+
+    @skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow missing")
+    def test_import_parquet(self):
+        path = self.write(
+            "employees.parquet", lambda df, p: df.to_parquet(p, index=False)
+        )
+        self.call(path, "--chunk-size", "32")
+        self.assertImported()
+
+    def test_invalid_rows_are_rejected(self):
+        valid = {
+            "first_name": "A",
+            "last_name": "B",
+            "date_of_birth": "1990-01-01",
+            "salary": "1000.50",
+            "years_of_experience": "3",
+        }
+        self.records = [
+            valid,
+            {**valid, "first_name": ""},
+            {**valid, "date_of_birth": "31/31/1990"},
+            {**valid, "salary": "-1"},
+            {**valid, "years_of_experience": "many"},
+        ]
+        path = self.write(
+            "employees.csv", lambda df, p: df.to_csv(p, index=False)
+        )
+        out, err = self.call(path)
+        self.assertIn("Imported 1 of 5 rows, 0 skipped, 4 rejected", out)
+        self.assertIn("Row 4: salary", err)
+        employee = Employee.objects.get()
+        self.assertEqual(employee.salary, Decimal("1000.50"))
+        self.assertEqual(employee.years_of_experience, 3)
+
+    def test_other_fields_column_without_extra_columns(self):
+        self.records = [
+            {
+                "first_name": "A",
+                "last_name": "B",
+                "date_of_birth": "1990-01-01",
+                "other_fields": json.dumps({"team": "core"}),
+            },
+            {
+                "first_name": "C",
+                "last_name": "D",
+                "date_of_birth": "1990-01-01",
+                "other_fields": None,
+            },
+        ]
+        path = self.write(
+            "employees.csv", lambda df, p: df.to_csv(p, index=False)
+        )
+        out, _ = self.call(path)
+        self.assertIn("Imported 2 of 2 rows", out)
+        self.assertEqual(
+            dict(Employee.objects.values_list("first_name", "other_fields")),
+            {"A": {"team": "core"}, "C": None},
+        )
+
+    def test_malformed_other_fields_are_rejected(self):
+        row = {
+            "first_name": "A",
+            "last_name": "B",
+            "date_of_birth": "1990-01-01",
+        }
+        self.records = [
+            {**row, "other_fields": '{"team": "core"}'},
+            {**row, "other_fields": "{not json"},
+            {**row, "other_fields": "[1, 2]"},
+        ]
+        path = self.write(
+            "employees.csv", lambda df, p: df.to_csv(p, index=False)
+        )
+        out, err = self.call(path)
+        self.assertIn("Imported 1 of 3 rows, 0 skipped, 2 rejected", out)
+        self.assertIn("Row 2: other_fields", err)
+        self.assertEqual(Employee.objects.get().other_fields, {"team": "core"})
+
+    def test_existing_ids_are_skipped_unless_updating(self):
+        path = self.write(
+            "employees.csv", lambda df, p: df.to_csv(p, index=False)
+        )
+        self.call(path)
+        self.records[0]["first_name"] = "Changed"
+        path = self.write(
+            "employees.csv", lambda df, p: df.to_csv(p, index=False)
+        )
+        out, _ = self.call(path)
+        self.assertIn(
+            f"Imported 0 of {len(self.records)} rows, "
+            f"{len(self.records)} skipped",
+            out,
+        )
+        self.call(path, "--update")
+        self.assertEqual(
+            Employee.objects.get(pk=self.records[0]["id"]).first_name,
+            "Changed",
+        )
+
+    def test_committed_chunks_are_invalidated_on_failure(self):
+        path = self.write(
+            "employees.csv", lambda df, p: df.to_csv(p, index=False)
+        )
+        original = read_chunks
+
+        def failing(*args):
+            chunks = original(*args)
+            yield next(chunks)
+            raise OSError("Disk read failed")
+
+        with patch(
+            "api_pandas.management.commands.import_employees.read_chunks",
+            failing,
+        ), patch(
+            "api_pandas.management.commands.import_employees."
+            "invalidate_statistics"
+        ) as invalidate:
+            with self.assertRaises(CommandError):
+                self.call(path, "--chunk-size", "50")
+        self.assertEqual(Employee.objects.count(), 50)
+        invalidate.assert_called_once_with()
+
+    def test_unknown_format(self):
+        with self.assertRaises(CommandError):
+            self.call("employees.xlsx")
+
+
+class BenchmarkSearchCommandTest(TestCase):
+    """Test the index benchmark command."""
+
+    def test_plans_are_printed_and_rows_rolled_back(self):
+        out = StringIO()
+        call_command("benchmark_search", "--rows", "500", stdout=out)
+        output = out.getvalue()
+        self.assertIn("With indexes", output)
+        self.assertIn("Without indexes", output)
+        self.assertIn("employee_birth_idx", output)
+        self.assertEqual(Employee.objects.count(), 0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_indexes WHERE indexname = %s",
+                ["employee_birth_idx"],
+            )
+            self.assertIsNotNone(cursor.fetchone())
+
+
+class BenchmarkRenderingCommandTest(TestCase):
+    """Test the rendering benchmark command."""
+
+    def test_rates_are_printed_and_rows_rolled_back(self):
+        out = StringIO()
+        call_command(
+            "benchmark_rendering", "--rows", "300", "--requests", "2",
+            stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn("EmployeeSerializer + JSONRenderer", output)
+        self.assertIn("EmployeeValuesSerializer + FastJSONRenderer", output)
+        self.assertIn("FastJSONRenderer:", output)
+        self.assertEqual(Employee.objects.count(), 0)
+
+
+class BenchmarkAgesCommandTest(SimpleTestCase):
+    """Test the age benchmark command."""
+
+    def test_exact_ages_are_reported(self):
+        out = StringIO()
+        call_command(
+            "benchmark_ages", "--rows", "2000", "--repeat", "1", stdout=out
+        )
+        output = out.getvalue()
+        self.assertIn("2000 birth dates", output)
+        self.assertIn("calendar_ages(datetime64[D]): ", output)
+        self.assertIn("calendar_ages(int32 day numbers): ", output)
+        self.assertEqual(output.count(", 0 ages off"), 2)
+        self.assertIn("age_band(bins=20,30,40,50,60)", output)
+
+
+class CheckpointEmployeesCommandTest(TestCase):
+    """Test checkpointing the employee history."""
+
+    def call(self, *args):
+        out = StringIO()
+        call_command("checkpoint_employees", *args, stdout=out)
+        return out.getvalue()
+
+    def test_checkpoints_after_enough_changes(self):
+        for i in range(3):
+            Employee.objects.create(
+                first_name=f"Employee{i}",
+                last_name="Doe",
+                date_of_birth=datetime.date(1990, 1, 1),
+            )
+        with self.settings(STATISTICS_HISTORY={"CHECKPOINT_EVERY": 5}):
+            self.assertIn("3 changes since the last checkpoint", self.call())
+            self.assertIn("Checkpointed 3 employees", self.call("--force"))
+            self.assertIn("0 changes since", self.call("--force"))
+        self.assertEqual(EmployeeCheckpoint.objects.count(), 1)
+
+
+class IndexOtherFieldsCommandTest(TestCase):
+    """Test indexing other_fields keys."""
+
+    def setUp(self):
+        for i, other_fields in enumerate(
+            [{"team": "core", "level": 1}, {"team": "web"}, None]
+        ):
+            Employee.objects.create(
+                first_name=f"Employee{i}",
+                last_name="Doe",
+                date_of_birth=datetime.date(1990, 1, 1),
+                other_fields=other_fields,
+            )
+
+    def call(self, *args):
+        out = StringIO()
+        call_command("index_other_fields", *args, stdout=out)
+        return out.getvalue()
+
+    def test_keys_are_reported_indexed_and_dropped(self):
+        self.assertEqual(
+            self.call().splitlines(),
+            [
+                "team: 2 of 3 employees (67%), -",
+                "level: 1 of 3 employees (33%), -",
+            ],
+        )
+        self.call("team")
+        self.assertIn("team: 2 of 3 employees (67%), indexed", self.call())
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        query = StatisticsQuery.parse("other_fields.team", "count")
+        with CaptureQueriesContext(connection) as queries:
+            query.run()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {queries[-1]['sql']}")
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        self.assertIn("employee_other_team_idx", plan)
+        self.call("team", "--drop")
+        self.assertIn("team: 2 of 3 employees (67%), -", self.call())
+
+    def test_invalid_key(self):
+        with self.assertRaises(CommandError):
+            self.call("a.b")
@@ -0,0 +1,115 @@
+import datetime
+
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api_pandas.aggregation import ages_on
+from api_pandas.bulk import write_employees
+from api_pandas.cache import invalidate_statistics, statistics_cache
+from api_pandas.models import Employee, EmployeeDataVersion
+
+
+class ConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        statistics_cache.reset()
+        self.addCleanup(statistics_cache.reset)
+        self.employee = Employee.objects.create(
+            first_name="Jane",
+            last_name="Doe",
+            date_of_birth=datetime.date(1990, 1, 1),
+            industry="Software",
+            salary=50000,
+            years_of_experience=3,
+        )
+
+    def assertNotModified(self, url, response):
+        with self.assertNumQueries(1):
+            repeated = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(repeated.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(repeated["ETag"], response["ETag"])
+
+    def test_writes_bump_the_data_version(self):
+        version = EmployeeDataVersion.objects.get().version
+        self.employee.salary = 60000
+        self.employee.save()
+        self.assertEqual(
+            EmployeeDataVersion.objects.get().version, version + 1
+        )
+        self.employee.delete()
+        self.assertEqual(
+            EmployeeDataVersion.objects.get().version, version + 2
+        )
+
+    def test_unchanged_list_is_not_modified(self):
+        url = reverse("employee-list-create")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+        self.assertNotModified(url, response)
+        other = self.client.get(url, {"industry": "Software"})
+        self.assertNotEqual(other["ETag"], response["ETag"])
+
+    def test_writes_change_the_etag(self):
+        url = reverse(
+            "employee-retrieve-update-destroy",
+            kwargs={"pk": self.employee.pk},
+        )
+        response = self.client.get(url)
+        self.assertNotModified(url, response)
+        self.employee.salary = 60000
+        self.employee.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data["salary"], "60000.00")
+
+    def test_statistics_are_not_modified(self):
+        url = reverse("average-salary-per-industry")
+        response = self.client.get(url)
+        self.assertNotModified(url, response)
+        write_employees([{
+            "first_name": "John",
+            "last_name": "Doe",
+            "date_of_birth": datetime.date(1980, 1, 1),
+            "industry": "Software",
+            "salary": 70000,
+        }])
+        invalidate_statistics()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(
+            changed.data, [{"industry": "Software", "salary": 60000.0}]
+        )
+        self.assertIsNotNone(
+            Employee.objects.get(first_name="John").updated_at
+        )
+
+    def test_statistics_of_ages_are_tagged_with_the_date(self):
+        for url, params in (
+            (reverse("average-age-per-industry"), {}),
+            (
+                reverse("statistics-query"),
+                {"group_by": "age_band", "metrics": "count"},
+            ),
+            (reverse("statistics-batch"), {}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url, params)
+                self.assertNotIn("Last-Modified", response)
+                with ages_on(datetime.date.today() + datetime.timedelta(1)):
+                    changed = self.client.get(
+                        url, params, HTTP_IF_NONE_MATCH=response["ETag"]
+                    )
+                self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        response = self.client.get(
+            reverse("statistics-batch"), {"statistics": "median-salary"}
+        )
+        self.assertIn("Last-Modified", response)
+
+    @override_settings(STATISTICS_SNAPSHOT={"ENABLED": True})
+    def test_lagging_statistics_are_not_tagged(self):
+        response = self.client.get(reverse("average-salary-per-industry"))
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
@@ -0,0 +1,95 @@
+import csv
+import datetime
+import importlib.util
+import io
+import json
+import os
+import tempfile
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api_pandas.models import Employee
+
+
+class EmployeeExportTestCase(APITestCase):
+    def setUp(self):
+        for i in range(5):
+            Employee.objects.create(
+                first_name=f"Employee{i}",
+                last_name="Doe",
+                date_of_birth=datetime.date(1990, 1, i + 1),
+                industry="Software" if i % 2 else "Banks",
+                salary="50000.25",
+                years_of_experience=i,
+                other_fields={"title": "Engineer"} if i else None,
+            )
+
+    def export(self, file_format, **params):
+        response = self.client.get(
+            reverse("employee-export", kwargs={"file_format": file_format}),
+            params,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_export_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.export("csv").decode())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["first_name"], "Employee0")
+        self.assertEqual(rows[0]["date_of_birth"], "1990-01-01")
+        self.assertEqual(rows[1]["salary"], "50000.25")
+        self.assertEqual(
+            json.loads(rows[1]["other_fields"]), {"title": "Engineer"}
+        )
+
+    def test_exported_csv_imports_back(self):
+        before = dict(Employee.objects.values_list("id", "other_fields"))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "employees.csv")
+            with open(path, "wb") as file:
+                file.write(self.export("csv"))
+            call_command(
+                "import_employees", path, "--update", stdout=io.StringIO()
+            )
+        self.assertEqual(
+            dict(Employee.objects.values_list("id", "other_fields")), before
+        )
+
+    def test_export_ndjson_applies_filters(self):
+        content = self.export("ndjson", industry="Software")
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(
+            [row["first_name"] for row in rows], ["Employee1", "Employee3"]
+        )
+        self.assertEqual(rows[0]["other_fields"], {"title": "Engineer"})
+
+    def test_export_applies_search_and_ordering(self):
+        content = self.export(
+            "ndjson", search="Employee", ordering="-date_of_birth"
+        )
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(rows[0]["first_name"], "Employee4")
+
+    @skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow missing")
+    @patch("api_pandas.exporters.CHUNK_SIZE", 2)
+    def test_export_parquet_in_row_groups(self):
+        import pyarrow.parquet as pq
+
+        content = io.BytesIO(self.export("parquet"))
+        self.assertEqual(pq.ParquetFile(content).num_row_groups, 3)
+        table = pq.read_table(content)
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(
+            table.column("first_name").to_pylist()[0], "Employee0"
+        )
+
+    def test_unknown_format(self):
+        response = self.client.get(
+            reverse("employee-export", kwargs={"file_format": "xlsx"})
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,141 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api_pandas.filters import trigram_available
+from api_pandas.models import Employee
+from api_pandas.tests.helpers import create_employee
+
+
+class RankedSearchFilterTestCase(APITestCase):
+    def setUp(self):
+        self.partial = create_employee(
+            "Software", 50000, first_name="Anna", last_name="Smithson"
+        )
+        self.other = create_employee(
+            "Software", 50000, first_name="Bob", last_name="Jones"
+        )
+        self.exact = create_employee(
+            "Software", 50000, first_name="Carl", last_name="Smith"
+        )
+        self.url = reverse("employee-list-create")
+
+    def ids(self, params):
+        response = self.client.get(self.url, params)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_matches_are_unchanged(self):
+        self.assertCountEqual(
+            self.ids({"search": "smith"}), [self.partial.id, self.exact.id]
+        )
+
+    def test_best_match_first(self):
+        self.assertEqual(
+            self.ids({"search": "smith"}), [self.exact.id, self.partial.id]
+        )
+
+    def test_explicit_ordering_wins(self):
+        self.assertEqual(
+            self.ids({"search": "smith", "ordering": "first_name"}),
+            [self.partial.id, self.exact.id],
+        )
+
+
+class OtherFieldsFilterTestCase(APITestCase):
+    def setUp(self):
+        self.core = create_employee(
+            "Software", 50000, first_name="Anna", last_name="Smith",
+            other_fields={"team": "core", "level": 3},
+        )
+        self.web = create_employee(
+            "Software", 50000, first_name="Bob", last_name="Jones",
+            other_fields={"team": "web", "level": "3"},
+        )
+        self.nested = create_employee(
+            "Software", 50000, first_name="Carl", last_name="Brown",
+            other_fields={"team": {"name": "core"}},
+        )
+        create_employee(
+            "Software", 50000, first_name="Dana", last_name="White"
+        )
+
+    def ids(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_list(self):
+        url = reverse("employee-list-create")
+        self.assertEqual(
+            self.ids(url, {"other_fields__team": "core"}), [self.core.id]
+        )
+        self.assertEqual(
+            self.ids(url, {"other_fields__team": ["core", "web"]}),
+            [self.core.id, self.web.id],
+        )
+        self.assertEqual(
+            self.ids(url, {"other_fields__team": "core", "search": "bob"}),
+            [],
+        )
+
+    def test_values_compare_as_text(self):
+        url = reverse("employee-list-create")
+        self.assertEqual(
+            self.ids(url, {"other_fields__level": "3"}),
+            [self.core.id, self.web.id],
+        )
+        self.assertEqual(
+            self.ids(url, {
+                "other_fields__team": "web", "other_fields__level": "3",
+            }),
+            [self.web.id],
+        )
+
+    def test_invalid_key(self):
+        response = self.client.get(
+            reverse("employee-list-create"), {"other_fields__a.b": "x"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_statistics(self):
+        response = self.client.get(
+            reverse("statistics-query"),
+            {"metrics": "count", "other_fields__team": "core"},
+        )
+        self.assertEqual(response.data, [{"count": 1}])
+
+    def test_containment_uses_gin_index(self):
+        queryset = Employee.objects.filter(other_fields__contains={
+            "team": "core",
+        }).order_by()
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        self.assertIn("employee_other_fields_gin", queryset.explain())
+
+
+class EmployeeIndexesTestCase(TestCase):
+    def indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes WHERE tablename = %s",
+                [Employee._meta.db_table],
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_btree_indexes(self):
+        self.assertLessEqual(
+            {index.name for index in Employee._meta.indexes}, self.indexes()
+        )
+
+    def test_trigram_indexes(self):
+        if not trigram_available():
+            self.skipTest("pg_trgm is not installed")
+        self.assertLessEqual(
+            {
+                "employee_first_name_trgm",
+                "employee_last_name_trgm",
+                "employee_industry_trgm",
+            },
+            self.indexes(),
+        )
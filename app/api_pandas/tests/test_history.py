@@ -0,0 +1,242 @@
+import datetime
+import threading
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api_pandas.aggregation import StatisticsQuery, StatisticsQueryError
+from api_pandas.history import (
+    WritesInProgress, create_checkpoint, employees_as_of,
+    historical_statistic, parse_as_of
+)
+from api_pandas.models import Employee, EmployeeChange, EmployeeCheckpoint
+from api_pandas.tests.helpers import create_employee
+
+
+def last_change():
+    return EmployeeChange.objects.latest("id").changed_at
+
+
+class ChangeLogTestCase(TestCase):
+    def test_writes_are_logged(self):
+        employee = create_employee("Banks", 1000)
+        employee.salary = 2000
+        employee.save()
+        Employee.objects.bulk_create([
+            Employee(
+                first_name=f"Bulk{i}",
+                last_name="Doe",
+                date_of_birth=datetime.date(1990, 1, 1),
+            )
+            for i in range(3)
+        ])
+        Employee.objects.filter(first_name__startswith="Bulk").update(
+            salary=F("id")
+        )
+        pk = employee.pk
+        employee.delete()
+        self.assertEqual(
+            list(EmployeeChange.objects.values_list("operation", flat=True)),
+            ["I", "U", "I", "I", "I", "U", "U", "U", "D"],
+        )
+        deleted = EmployeeChange.objects.last()
+        self.assertEqual(
+            (deleted.employee_id, deleted.industry, deleted.salary),
+            (pk, "Banks", 2000),
+        )
+
+
+class EmployeesAsOfTestCase(TestCase):
+    def setUp(self):
+        self.banker = create_employee("Banks", 1000)
+        self.engineer = create_employee("Software", 3000)
+        self.first = last_change()
+        self.banker.salary = 2000
+        self.banker.save()
+        create_employee("Software", 5000)
+        self.second = last_change()
+        self.engineer.delete()
+        self.third = last_change()
+        self.query = StatisticsQuery.parse("industry", "salary:mean,count")
+
+    def statistics(self, as_of):
+        return historical_statistic(
+            self.query, employees_as_of(as_of), as_of
+        )
+
+    def assertHistory(self):
+        self.assertEqual(
+            self.statistics(self.first),
+            [
+                {"industry": "Banks", "salary_mean": 1000.0, "count": 1},
+                {"industry": "Software", "salary_mean": 3000.0, "count": 1},
+            ],
+        )
+        self.assertEqual(
+            self.statistics(self.second),
+            [
+                {"industry": "Banks", "salary_mean": 2000.0, "count": 1},
+                {"industry": "Software", "salary_mean": 4000.0, "count": 2},
+            ],
+        )
+        self.assertEqual(
+            self.statistics(self.third),
+            [
+                {"industry": "Banks", "salary_mean": 2000.0, "count": 1},
+                {"industry": "Software", "salary_mean": 5000.0, "count": 1},
+            ],
+        )
+        self.assertEqual(
+            self.statistics(timezone.now()),
+            self.query.run(Employee.objects.all()),
+        )
+
+    def test_replayed_from_the_log(self):
+        self.assertHistory()
+
+    def test_rebuilt_from_checkpoints(self):
+        first, _ = create_checkpoint()
+        self.assertEqual(first.employees, 2)
+        self.assertEqual(first.covers_until, self.third)
+        self.assertEqual(create_checkpoint(), (None, 0))
+        create_employee("Media", 7000)
+        second, _ = create_checkpoint()
+        self.assertEqual(second.employees, 3)
+        self.assertEqual(
+            second.last_row_id - second.first_row_id + 1, second.employees
+        )
+        self.assertHistory()
+        # Only the log after the checkpoint's last change is read.
+        sql = str(employees_as_of(timezone.now()).query)
+        self.assertIn(f"\"id\" > {second.last_change_id} ", sql)
+        self.assertIn(f"BETWEEN {second.first_row_id}", sql)
+
+    def test_before_history(self):
+        with self.assertRaises(StatisticsQueryError):
+            employees_as_of(self.first - datetime.timedelta(days=1))
+
+    def test_ages_on_that_day(self):
+        query = StatisticsQuery.parse("", "age:max")
+        self.assertEqual(
+            historical_statistic(
+                query,
+                employees_as_of(self.third),
+                self.third.replace(year=2020, month=6, day=1),
+            ),
+            [{"age_max": 30}],
+        )
+
+    def test_parse_as_of(self):
+        moment = parse_as_of({"as_of": "2024-03-31T12:00:00+02:00"})
+        self.assertEqual(moment.utcoffset(), datetime.timedelta(hours=2))
+        day = parse_as_of({"as_of": "2024-03-31"})
+        self.assertEqual(
+            timezone.localtime(day).replace(tzinfo=None),
+            datetime.datetime(2024, 3, 31, 23, 59, 59, 999999),
+        )
+        self.assertIsNone(parse_as_of({}))
+        for value in ("yesterday", "2024-02-30"):
+            with self.assertRaises(StatisticsQueryError):
+                parse_as_of({"as_of": value})
+
+
+class HistoricalStatisticsViewTestCase(APITestCase):
+    def setUp(self):
+        self.banker = create_employee("Banks", 1000)
+        create_employee("Software", 3000)
+        self.before = last_change().isoformat()
+        self.banker.delete()
+        create_employee("Software", 5000)
+
+    def test_statistics_as_of(self):
+        response = self.client.get(
+            reverse("average-salary-per-industry"), {"as_of": self.before}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {"industry": "Banks", "salary": 1000.0},
+                {"industry": "Software", "salary": 3000.0},
+            ],
+        )
+        response = self.client.get(
+            reverse("statistics-query"),
+            {
+                "group_by": "industry",
+                "metrics": "count",
+                "as_of": self.before,
+                "salary__gte": 2000,
+            },
+        )
+        self.assertEqual(response.data, [{"industry": "Software", "count": 1}])
+
+    def test_batch_as_of(self):
+        response = self.client.get(
+            reverse("statistics-batch"),
+            {"statistics": "average-salary", "as_of": self.before},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"]["average-salary"][0],
+            {"industry": "Banks", "salary": 1000.0},
+        )
+        self.assertEqual(response.data["meta"]["as_of"], self.before)
+
+    def test_invalid_as_of(self):
+        for params in (
+            {"as_of": "soon"},
+            {"as_of": "2000-01-01"},
+            {"as_of": self.before, "approx": "true"},
+            {"as_of": self.before, "sample": "0.5"},
+        ):
+            response = self.client.get(
+                reverse("average-salary-per-industry"), params
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, params
+            )
+        self.assertFalse(EmployeeCheckpoint.objects.exists())
+
+
+class ConcurrentCheckpointTestCase(TransactionTestCase):
+    def write_slowly(self, written, release):
+        try:
+            # Without signals, so the summaries' lock is not held.
+            with transaction.atomic():
+                Employee.objects.bulk_create([Employee(
+                    first_name="John",
+                    last_name="Doe",
+                    date_of_birth=datetime.date(1990, 1, 1),
+                    industry="Banks",
+                    salary=1000,
+                )])
+                written.set()
+                release.wait(10)
+        finally:
+            connection.close()
+
+    def test_waits_for_writes_in_progress(self):
+        written, release = threading.Event(), threading.Event()
+        writer = threading.Thread(
+            target=self.write_slowly, args=(written, release)
+        )
+        writer.start()
+        try:
+            written.wait(10)
+            # Logged after, but committed before, the write in progress.
+            create_employee("Media", 7000)
+            with self.settings(STATISTICS_HISTORY={"CHECKPOINT_WAIT": 0.2}):
+                with self.assertRaises(WritesInProgress):
+                    create_checkpoint()
+        finally:
+            release.set()
+            writer.join()
+        checkpoint, _ = create_checkpoint()
+        self.assertEqual(checkpoint.employees, 2)
+        self.assertEqual(employees_as_of(timezone.now()).count(), 2)
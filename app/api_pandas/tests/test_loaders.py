@@ -0,0 +1,78 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+from api_pandas.loaders import (
+    _apply_dtypes, _chunked_frame, load_employee_frame
+)
+from api_pandas.models import Employee
+
+
+class EmployeeFrameLoaderTestCase(TestCase):
+    def setUp(self):
+        Employee.objects.create(
+            first_name="John",
+            last_name="Doe",
+            date_of_birth=datetime.date(1990, 1, 1),
+            industry="n/a",
+            salary=Decimal("50000.50"),
+            years_of_experience=10,
+            other_fields={"title": "Software Engineer"},
+        )
+        Employee.objects.create(
+            first_name="Jane",
+            last_name="Doe",
+            date_of_birth=datetime.date(1985, 6, 15),
+            industry=None,
+            salary=None,
+            years_of_experience=None,
+        )
+
+    def test_columns_are_typed(self):
+        df = load_employee_frame(
+            ["industry", "salary", "years_of_experience", "date_of_birth"]
+        )
+        self.assertEqual(str(df["industry"].dtype), "category")
+        self.assertEqual(str(df["salary"].dtype), "float64")
+        self.assertEqual(str(df["years_of_experience"].dtype), "Int32")
+        self.assertEqual(str(df["date_of_birth"].dtype), "datetime64[ns]")
+        self.assertEqual(df["industry"].iloc[0], "n/a")
+        self.assertAlmostEqual(df["salary"].iloc[0], 50000.5)
+        self.assertTrue(df["salary"].isna().iloc[1])
+        self.assertTrue(df["years_of_experience"].isna().iloc[1])
+
+    def test_only_requested_columns_are_loaded(self):
+        df = load_employee_frame(["salary"])
+        self.assertEqual(list(df.columns), ["salary"])
+
+    def test_queryset_filters_are_applied(self):
+        df = load_employee_frame(
+            ["first_name", "other_fields"],
+            Employee.objects.filter(industry__isnull=False),
+        )
+        self.assertEqual(df["first_name"].tolist(), ["John"])
+        self.assertEqual(
+            df["other_fields"].iloc[0], {"title": "Software Engineer"}
+        )
+
+    def test_empty_queryset(self):
+        df = load_employee_frame(["salary"], Employee.objects.none())
+        self.assertEqual(len(df), 0)
+        self.assertEqual(list(df.columns), ["salary"])
+
+    def test_unknown_column(self):
+        with self.assertRaises(ValueError):
+            load_employee_frame(["email"])
+
+    def test_chunked_fallback_matches_copy(self):
+        columns = ["id", "industry", "salary", "date_of_birth"]
+        queryset = Employee.objects.values_list(*columns)
+        fallback = _apply_dtypes(_chunked_frame(queryset, columns))
+        copied = load_employee_frame(columns)
+        self.assertEqual(
+            [str(dtype) for dtype in fallback.dtypes],
+            [str(dtype) for dtype in copied.dtypes],
+        )
+        self.assertEqual(
+            fallback["salary"].tolist()[:1], copied["salary"].tolist()[:1]
+        )
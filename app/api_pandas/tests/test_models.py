@@ -1,5 +1,10 @@
-from django.test import TestCase
-from api_pandas.models import Employee
+import threading
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from api_pandas.models import (
+    Employee, allocate_employee_ids, sync_employee_id_sequence
+)
 from datetime import date
 
 
@@ -24,3 +29,56 @@ class EmployeeModelTestCase(TestCase):
             self.employee.other_fields,
             {"title": "Software Developer"}
             )
+
+
+class EmployeeIdAllocationTestCase(TransactionTestCase):
+    def create_employees(self, count, ids, errors):
+        try:
+            for i in range(count):
+                employee = Employee.objects.create(
+                    first_name=f"Employee{i}",
+                    last_name="Doe",
+                    date_of_birth=date(1990, 1, 1),
+                )
+                ids.append(employee.id)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_concurrent_creates_never_collide(self):
+        ids, errors = [], []
+        threads = [
+            threading.Thread(
+                target=self.create_employees, args=(25, ids, errors)
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(ids), 200)
+        self.assertEqual(len(set(ids)), 200)
+        self.assertEqual(Employee.objects.count(), 200)
+
+    def test_allocated_blocks_are_unique(self):
+        first = allocate_employee_ids(100)
+        second = allocate_employee_ids(100)
+        self.assertEqual(len(set(first) | set(second)), 200)
+        employee = Employee.objects.create(
+            first_name="John", last_name="Doe", date_of_birth=date(1990, 1, 1)
+        )
+        self.assertNotIn(employee.id, first + second)
+
+    def test_sync_moves_sequence_past_explicit_ids(self):
+        Employee.objects.create(
+            id=10 ** 7, first_name="John", last_name="Doe",
+            date_of_birth=date(1990, 1, 1),
+        )
+        sync_employee_id_sequence()
+        employee = Employee.objects.create(
+            first_name="Jane", last_name="Doe", date_of_birth=date(1990, 1, 1)
+        )
+        self.assertGreater(employee.id, 10 ** 7)
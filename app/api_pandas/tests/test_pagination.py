@@ -0,0 +1,132 @@
+import datetime
+from decimal import Decimal
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api_pandas.models import Employee
+
+
+class KeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        industries = ["Software", "Retail", None, "Software", "Finance"]
+        salaries = [50000, None, 70000, 50000, 65000]
+        for i in range(23):
+            Employee.objects.create(
+                first_name=f"Employee{i % 7}",
+                last_name="Doe",
+                date_of_birth=datetime.date(1980 + i % 4, 1, 1),
+                industry=industries[i % 5],
+                salary=salaries[i % 5],
+                years_of_experience=i % 3,
+            )
+        self.url = reverse("employee-list-create")
+
+    def walk(self, params):
+        """Follow ``next`` links from the first page; return all ids."""
+        response = self.client.get(
+            self.url, {"pagination": "cursor", **params}
+        )
+        ids = []
+        pages = []
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row["id"] for row in response.data["results"])
+            pages.append(response)
+            if response.data["next"] is None:
+                return ids, pages
+            response = self.client.get(response.data["next"])
+
+    def expected(self, *ordering):
+        queryset = Employee.objects.order_by(*ordering, "id")
+        return list(queryset.values_list("id", flat=True))
+
+    def test_default_ordering_is_by_id(self):
+        ids, pages = self.walk({"page_size": 5})
+        self.assertEqual(ids, self.expected())
+        self.assertEqual(len(pages), 5)
+        self.assertIsNone(pages[0].data["previous"])
+        self.assertNotIn("count", pages[0].data)
+
+    def test_every_ordering_field(self):
+        fields = {
+            "first_name": "first_name",
+            "last_name": "last_name",
+            "industry": "industry",
+            "date_of_birth": "date_of_birth",
+            "annual_income": "salary",
+        }
+        for ordering, field in fields.items():
+            for prefix in ("", "-"):
+                with self.subTest(ordering=prefix + ordering):
+                    ids, _ = self.walk(
+                        {"ordering": prefix + ordering, "page_size": 4}
+                    )
+                    self.assertEqual(ids, self.expected(prefix + field))
+
+    def test_multiple_ordering_fields(self):
+        ids, _ = self.walk(
+            {"ordering": "-industry,first_name", "page_size": 3}
+        )
+        self.assertEqual(ids, self.expected("-industry", "first_name"))
+
+    def test_previous_link(self):
+        _, pages = self.walk({"ordering": "annual_income", "page_size": 4})
+        response = self.client.get(pages[-1].data["previous"])
+        self.assertEqual(response.data["results"], pages[-2].data["results"])
+        response = self.client.get(pages[1].data["previous"])
+        self.assertEqual(response.data["results"], pages[0].data["results"])
+        self.assertIsNone(response.data["previous"])
+
+    def test_filters_apply(self):
+        ids, _ = self.walk({"industry": "Software", "page_size": 2})
+        expected = Employee.objects.filter(industry="Software").order_by("id")
+        self.assertEqual(ids, list(expected.values_list("id", flat=True)))
+
+    def test_search_keeps_ranked_order(self):
+        for name in ("Smithsonian", "Smithers", "Smith", "Smiths", "Smyth"):
+            Employee.objects.create(
+                first_name=name,
+                last_name="Doe",
+                date_of_birth=datetime.date(1980, 1, 1),
+            )
+        ranked = self.client.get(self.url, {"search": "smith"})
+        expected = [row["id"] for row in ranked.data["results"]]
+        self.assertNotEqual(expected, sorted(expected))
+        ids, pages = self.walk({"search": "smith", "page_size": 2})
+        self.assertEqual(ids, expected)
+        response = self.client.get(pages[-1].data["previous"])
+        self.assertEqual(response.data["results"], pages[-2].data["results"])
+
+    def test_exact_count(self):
+        response = self.client.get(
+            self.url, {"pagination": "cursor", "count": "exact"}
+        )
+        self.assertEqual(response.data["count"], 23)
+
+    def test_estimated_count(self):
+        response = self.client.get(
+            self.url,
+            {"pagination": "cursor", "count": "estimate", "search": "Doe"},
+        )
+        self.assertIsInstance(response.data["count"], int)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_numbers_by_default(self):
+        response = self.client.get(self.url, {"page": 2})
+        self.assertEqual(response.data["count"], 23)
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_annual_income_ordering_with_page_numbers(self):
+        response = self.client.get(self.url, {"ordering": "-annual_income"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        salaries = [
+            row["salary"] for row in response.data["results"] if row["salary"]
+        ]
+        self.assertEqual(
+            salaries, sorted(salaries, key=Decimal, reverse=True)
+        )
@@ -0,0 +1,82 @@
+import datetime
+import json
+from decimal import Decimal
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from rest_framework.renderers import JSONRenderer
+
+from api_pandas.models import Employee
+from api_pandas.renderers import FastJSONRenderer
+from api_pandas.serializers import (
+    EmployeeSerializer, EmployeeValuesSerializer
+)
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    def test_native_types(self):
+        rendered = FastJSONRenderer().render({
+            "salary": Decimal("50000.00"),
+            "date_of_birth": datetime.date(1990, 1, 1),
+            "updated_at": datetime.datetime(
+                2023, 5, 1, 12, 30, tzinfo=datetime.timezone.utc
+            ),
+            "mean": np.float64(1.5),
+            "count": np.int64(3),
+            "values": np.array([1, 2]),
+            "missing": float("nan"),
+            3: "key",
+        })
+        self.assertEqual(json.loads(rendered), {
+            "salary": "50000.00",
+            "date_of_birth": "1990-01-01",
+            "updated_at": "2023-05-01T12:30:00Z",
+            "mean": 1.5,
+            "count": 3,
+            "values": [1, 2],
+            "missing": None,
+            "3": "key",
+        })
+
+    def test_matches_json_renderer(self):
+        data = [{"industry": "Café  ", "salary": 1.25, "n": None}]
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_indented_output_falls_back(self):
+        data = {"industry": "Software"}
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+
+
+class EmployeeValuesSerializerTestCase(TestCase):
+    def test_matches_employee_serializer(self):
+        Employee.objects.create(
+            first_name="Jane",
+            last_name="Doe",
+            date_of_birth=datetime.date(1990, 1, 1),
+            industry="Software",
+            salary=Decimal("50000.5"),
+            years_of_experience=3,
+            other_fields={"team": "Data", "skills": ["sql"]},
+        )
+        Employee.objects.create(
+            first_name="John",
+            last_name="Doe",
+            date_of_birth=datetime.date(1985, 6, 30),
+        )
+        employees = Employee.objects.all()
+        expected = JSONRenderer().render(
+            EmployeeSerializer(employees, many=True).data
+        )
+        rows = employees.values(*EmployeeValuesSerializer.fields)
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            self.assertEqual(
+                renderer.render(
+                    EmployeeValuesSerializer(rows, many=True).data
+                ),
+                expected,
+            )
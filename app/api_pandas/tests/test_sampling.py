@@ -0,0 +1,164 @@
+import datetime
+from unittest.mock import patch
+
+import numpy as np
+from django.db import connection
+from django.db.models import Avg
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api_pandas.aggregation import StatisticsQuery, StatisticsQueryError
+from api_pandas.models import Employee
+from api_pandas.sampling import Sample, sample_statistic
+
+INDUSTRIES = ["Banks", "Media", "Retail", "Software"]
+
+
+def create_employees(size, seed=3):
+    random = np.random.default_rng(seed)
+    Employee.objects.bulk_create(
+        Employee(
+            first_name="John",
+            last_name="Doe",
+            date_of_birth=(
+                datetime.date(1950, 1, 1)
+                + datetime.timedelta(days=int(day))
+            ),
+            industry=INDUSTRIES[i % len(INDUSTRIES)],
+            salary=round(float(salary), 2),
+            years_of_experience=i % 40,
+        )
+        for i, (day, salary) in enumerate(zip(
+            random.integers(0, 15000, size),
+            random.lognormal(11, 0.5, size),
+        ))
+    )
+
+
+class SampleTestCase(TestCase):
+    def test_parse(self):
+        sample = Sample.parse({"sample": "0.25", "seed": "4"})
+        self.assertEqual((sample.fraction, sample.seed), (0.25, 4))
+        self.assertEqual(Sample.parse({"sample": "500"}).rows, 500)
+        self.assertIsNone(Sample.parse({}))
+        for params in (
+            {"sample": "many"},
+            {"sample": "0"},
+            {"sample": "1.5"},
+            {"sample": "0.5", "confidence": "95"},
+            {"sample": "0.5", "seed": "x"},
+        ):
+            with self.assertRaises(StatisticsQueryError):
+                Sample.parse(params)
+
+    def test_draws_are_repeatable_with_a_seed(self):
+        create_employees(2000)
+        sample = Sample(fraction=0.1, seed=11)
+        first = list(sample.draw(Employee.objects.all())[0].values("id"))
+        again = list(sample.draw(Employee.objects.all())[0].values("id"))
+        self.assertEqual(first, again)
+        self.assertLess(abs(len(first) - 200), 60)
+
+    def test_row_counts_use_the_table_size(self):
+        create_employees(1000)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Employee._meta.db_table}")
+        sampled, rate = Sample(rows=250).draw(Employee.objects.all())
+        self.assertEqual(rate, 0.25)
+        self.assertLess(abs(sampled.count() - 250), 70)
+
+
+class SampleStatisticTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_employees(6000)
+
+    def test_intervals_cover_the_exact_values(self):
+        query = StatisticsQuery.parse(
+            "industry", "salary:mean,salary:median,percentage,count"
+        )
+        with patch(
+            "api_pandas.aggregation.supports_sql", return_value=False
+        ):
+            exact = {row["industry"]: row for row in query.run()}
+        records, description = sample_statistic(
+            query,
+            Employee.objects.all(),
+            Sample(fraction=0.2, seed=5, confidence=0.999),
+        )
+        self.assertEqual(description["fraction"], 0.2)
+        self.assertEqual(len(records), len(INDUSTRIES))
+        for record in records:
+            expected = exact[record["industry"]]
+            for metric in ("salary_mean", "salary_median", "percentage",
+                           "count"):
+                low, high = record["ci"][metric]
+                self.assertLessEqual(low, expected[metric], metric)
+                self.assertGreaterEqual(high, expected[metric], metric)
+                self.assertLessEqual(low, record[metric], metric)
+                self.assertGreaterEqual(high, record[metric], metric)
+
+    def test_whole_table_sample_is_exact(self):
+        query = StatisticsQuery.parse("", "count,salary:mean")
+        records, _ = sample_statistic(
+            query, Employee.objects.all(), Sample(fraction=1.0)
+        )
+        self.assertEqual(records[0]["count"], 6000)
+        self.assertEqual(records[0]["ci"]["count"], [6000.0, 6000.0])
+        self.assertAlmostEqual(
+            records[0]["salary_mean"],
+            float(Employee.objects.aggregate(Avg("salary"))["salary__avg"]),
+        )
+
+    def test_filters_apply_to_the_sample(self):
+        records, _ = sample_statistic(
+            StatisticsQuery.parse("industry", "count"),
+            Employee.objects.filter(industry="Banks"),
+            Sample(fraction=0.5, seed=1),
+        )
+        self.assertEqual([row["industry"] for row in records], ["Banks"])
+
+
+class SampleViewTestCase(APITestCase):
+    def setUp(self):
+        create_employees(400)
+
+    def test_query(self):
+        response = self.client.get(reverse("statistics-query"), {
+            "group_by": "industry",
+            "metrics": "salary:mean",
+            "sample": "0.5",
+            "seed": "2",
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["sample"]["method"], "BERNOULLI")
+        self.assertEqual(response.data["sample"]["confidence"], 0.95)
+        self.assertEqual(
+            set(response.data["results"][0]), {"industry", "salary_mean", "ci"}
+        )
+
+    def test_named_statistic_and_batch(self):
+        response = self.client.get(
+            reverse("median-salary-per-industry"), {"sample": "100"}
+        )
+        self.assertIn("salary", response.data["results"][0]["ci"])
+        response = self.client.get(reverse("statistics-batch"), {
+            "statistics": "average-age,percentage-employees",
+            "sample": "0.3",
+        })
+        self.assertEqual(response.data["meta"]["engine"], "sample")
+        self.assertEqual(
+            set(response.data["results"]),
+            {"average-age", "percentage-employees"},
+        )
+
+    def test_invalid(self):
+        for params in ({"sample": "-1"}, {"sample": "0.5", "approx": "true"}):
+            response = self.client.get(reverse("statistics-query"), {
+                "group_by": "industry", "metrics": "count", **params,
+            })
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
@@ -0,0 +1,134 @@
+import threading
+import time
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from api_pandas.singleflight import SingleFlight, advisory_key, advisory_lock
+
+
+def run_in_threads(count, target):
+    results = [None] * count
+
+    def call(index):
+        try:
+            results[index] = target()
+        except Exception as exc:
+            results[index] = exc
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=call, args=(index,)) for index in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+class SingleFlightTestCase(SimpleTestCase):
+    def test_concurrent_callers_share_one_execution(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def compute():
+            release.wait(10)
+            return object()
+
+        def call():
+            return flight.do("median-salary", compute)
+
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        results = run_in_threads(8, call)
+        timer.join()
+        self.assertEqual(flight.executions, 1)
+        self.assertEqual(flight.shared, 7)
+        self.assertEqual(len({id(result) for result in results}), 1)
+
+    def test_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+
+        def compute():
+            time.sleep(0.2)
+            raise ValueError("boom")
+
+        results = run_in_threads(
+            4, lambda: flight.do("median-salary", compute)
+        )
+        self.assertEqual(flight.executions, 1)
+        for result in results:
+            self.assertIsInstance(result, ValueError)
+
+    def test_later_calls_run_again(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do("a", lambda: 1), 1)
+        self.assertEqual(flight.do("a", lambda: 2), 2)
+        self.assertEqual(flight.executions, 2)
+
+    def test_advisory_key_is_a_signed_bigint(self):
+        key = advisory_key("statistics:1:median-salary:")
+        self.assertEqual(key, advisory_key("statistics:1:median-salary:"))
+        self.assertLess(abs(key), 2 ** 63)
+        self.assertNotEqual(key, advisory_key("statistics:2:median-salary:"))
+
+
+class AdvisoryLockTestCase(TransactionTestCase):
+    def test_processes_reuse_the_stored_result(self):
+        # Two SingleFlight instances stand in for two worker processes
+        # sharing one cache; each thread has its own database session.
+        stored = {}
+        started = threading.Event()
+        workers = [SingleFlight(), SingleFlight()]
+
+        def compute():
+            started.set()
+            time.sleep(0.3)
+            stored["result"] = "computed"
+            return "computed"
+
+        def call(worker):
+            try:
+                return worker.do(
+                    "statistics:1:median-salary:",
+                    compute,
+                    recheck=lambda: stored.get("result"),
+                    lock=True,
+                    timeout=10,
+                )
+            finally:
+                connection.close()
+
+        first = threading.Thread(target=call, args=(workers[0],))
+        first.start()
+        started.wait(10)
+        self.assertEqual(call(workers[1]), "computed")
+        first.join(10)
+        self.assertEqual(workers[0].executions, 1)
+        self.assertEqual(workers[1].executions, 0)
+
+    def test_lock_times_out(self):
+        holder_ready = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            try:
+                with advisory_lock("busy"):
+                    holder_ready.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        holder_ready.wait(10)
+        try:
+            with advisory_lock("busy", timeout=0.1) as acquired:
+                self.assertFalse(acquired)
+        finally:
+            release.set()
+            holder.join(10)
+        with advisory_lock("busy", timeout=1) as acquired:
+            self.assertTrue(acquired)
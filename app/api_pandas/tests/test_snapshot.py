@@ -0,0 +1,213 @@
+import os
+import select
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+import numpy as np
+import psycopg2
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api_pandas.aggregation import STATISTICS, compute_statistic
+from api_pandas.cache import get_statistic, statistics_cache
+from api_pandas.models import Employee, bump_data_version
+from api_pandas.snapshot import (
+    CHANGE_CHANNEL, employee_snapshot, write_snapshot_file
+)
+from api_pandas.tests.helpers import create_employee
+
+LAZY = {"ENABLED": True, "REFRESH": "lazy"}
+BACKGROUND = {"ENABLED": True, "REFRESH": "background"}
+
+
+class EmployeeSnapshotTestCase(TransactionTestCase):
+    def setUp(self):
+        statistics_cache.reset()
+        employee_snapshot.reset()
+        self.addCleanup(statistics_cache.reset)
+        self.addCleanup(employee_snapshot.reset)
+        create_employee("Software", 50000)
+        create_employee("Software", 70000)
+        create_employee("Banks", 120000)
+
+    def test_disabled_by_default(self):
+        compute_statistic("average-salary")
+        self.assertEqual(employee_snapshot.builds, 0)
+
+    @override_settings(STATISTICS_SNAPSHOT=LAZY)
+    def test_statistics_share_one_build(self):
+        with patch(
+            "api_pandas.aggregation.load_employee_frame"
+        ) as load:
+            results = {name: compute_statistic(name) for name in STATISTICS}
+        load.assert_not_called()
+        self.assertEqual(employee_snapshot.builds, 1)
+        with override_settings(STATISTICS_SNAPSHOT={"ENABLED": False}):
+            for name in STATISTICS:
+                expected = compute_statistic(name)
+                self.assertEqual(len(results[name]), len(expected), name)
+                for row, expected_row in zip(results[name], expected):
+                    for key, value in expected_row.items():
+                        self.assertAlmostEqual(row[key], value, msg=name)
+
+    @override_settings(STATISTICS_SNAPSHOT=LAZY)
+    def test_lazy_refresh_after_write(self):
+        compute_statistic("average-salary")
+        create_employee("Banks", 80000)
+        result = compute_statistic("average-salary")
+        self.assertEqual(employee_snapshot.builds, 2)
+        self.assertIn({"industry": "Banks", "salary": 100000.0}, result)
+
+    @override_settings(STATISTICS_SNAPSHOT=LAZY)
+    def test_refresh_after_write_by_another_process(self):
+        compute_statistic("average-salary")
+        # Another worker's write leaves this process's cache untouched.
+        Employee.objects.filter(industry="Banks").update(salary=80000)
+        bump_data_version()
+        result = compute_statistic("average-salary")
+        self.assertEqual(employee_snapshot.builds, 2)
+        self.assertIn({"industry": "Banks", "salary": 80000.0}, result)
+
+    @override_settings(STATISTICS_SNAPSHOT=BACKGROUND)
+    def test_background_refresh_serves_previous_frame(self):
+        compute_statistic("average-salary")
+        create_employee("Banks", 80000)
+        stale = compute_statistic("average-salary")
+        self.assertIn({"industry": "Banks", "salary": 120000.0}, stale)
+        employee_snapshot.wait(timeout=10)
+        fresh = compute_statistic("average-salary")
+        self.assertIn({"industry": "Banks", "salary": 100000.0}, fresh)
+        self.assertEqual(employee_snapshot.builds, 2)
+
+    @override_settings(STATISTICS_SNAPSHOT=BACKGROUND)
+    def test_results_from_an_outdated_frame_are_not_cached(self):
+        get_statistic("median-salary")
+        employee = Employee.objects.get(salary=120000)
+        employee.salary = 200000
+        employee.save()
+        stale = get_statistic("median-salary")
+        self.assertIn({"industry": "Banks", "salary": 120000.0}, stale)
+        employee_snapshot.wait(timeout=10)
+        fresh = get_statistic("median-salary")
+        self.assertIn({"industry": "Banks", "salary": 200000.0}, fresh)
+
+    @override_settings(STATISTICS_SNAPSHOT=LAZY)
+    def test_filtered_querysets_skip_snapshot(self):
+        queryset = Employee.objects.filter(industry="Banks")
+        compute_statistic("average-salary", queryset)
+        self.assertEqual(employee_snapshot.builds, 0)
+
+    @override_settings(STATISTICS_SNAPSHOT=LAZY)
+    def test_diagnostics(self):
+        client = APIClient()
+        response = client.get(reverse("snapshot-diagnostics"))
+        self.assertIsNone(response.data["version"])
+        compute_statistic("average-salary")
+        response = client.get(reverse("snapshot-diagnostics"))
+        self.assertEqual(response.data["rows"], 3)
+        self.assertEqual(response.data["dtypes"]["industry"], "category")
+        memory = response.data["memory_bytes"]
+        self.assertGreater(memory["salary"], 0)
+        self.assertEqual(response.data["total_bytes"], sum(memory.values()))
+
+
+class MappedSnapshotTestCase(TransactionTestCase):
+    def setUp(self):
+        statistics_cache.reset()
+        employee_snapshot.reset()
+        self.addCleanup(statistics_cache.reset)
+        self.addCleanup(employee_snapshot.reset)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "employees.arrow")
+        settings = override_settings(
+            STATISTICS_SNAPSHOT={"ENABLED": False, "FILE": self.path}
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        create_employee("Software", 50000)
+        create_employee("Software", None)
+        create_employee("Banks", 120000)
+        create_employee(None, 30000)
+
+    def test_missing_file_falls_back_to_database(self):
+        compute_statistic("average-salary")
+        self.assertEqual(employee_snapshot.builds, 0)
+
+    def test_preload_writes_and_maps_the_file(self):
+        employee_snapshot.preload()
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(employee_snapshot.builds, 1)
+
+    def test_preload_without_pyarrow(self):
+        with patch(
+            "api_pandas.snapshot.importlib.util.find_spec", return_value=None
+        ), self.assertLogs("api_pandas.snapshot", "WARNING"):
+            employee_snapshot.preload()
+            self.assertFalse(os.path.exists(self.path))
+            write_snapshot_file(self.path)
+            compute_statistic("average-salary")
+        self.assertEqual(employee_snapshot.builds, 0)
+
+    def test_statistics_read_the_mapped_file(self):
+        out = StringIO()
+        call_command("write_employee_snapshot", stdout=out)
+        self.assertIn("Wrote 4 employees", out.getvalue())
+        with override_settings(STATISTICS_SNAPSHOT={"ENABLED": False}):
+            expected = {name: compute_statistic(name) for name in STATISTICS}
+        for name in STATISTICS:
+            self.assertEqual(compute_statistic(name), expected[name], name)
+        self.assertEqual(employee_snapshot.builds, 1)
+
+    def test_columns_are_not_copied(self):
+        write_snapshot_file(self.path)
+        snapshot = employee_snapshot.get()
+        for column, dtype in (
+            ("salary", "float64"), ("date_of_birth", "int64")
+        ):
+            mapped = np.frombuffer(
+                snapshot.table.column(column).chunk(0).buffers()[1],
+                dtype=dtype,
+            )
+            self.assertTrue(
+                np.shares_memory(snapshot.frame[column].to_numpy(), mapped),
+                column,
+            )
+
+    def test_rewritten_file_is_picked_up(self):
+        write_snapshot_file(self.path)
+        compute_statistic("average-salary")
+        create_employee("Banks", 80000)
+        write_snapshot_file(self.path)
+        result = compute_statistic("average-salary")
+        self.assertIn({"industry": "Banks", "salary": 100000.0}, result)
+        self.assertEqual(employee_snapshot.builds, 2)
+        self.assertEqual(
+            [name for name in os.listdir(os.path.dirname(self.path))],
+            ["employees.arrow"],
+        )
+
+    def test_writes_notify_the_writer(self):
+        settings = connection.settings_dict
+        listener = psycopg2.connect(
+            dbname=settings["NAME"],
+            user=settings["USER"],
+            password=settings["PASSWORD"],
+            host=settings["HOST"],
+            port=settings["PORT"] or None,
+        )
+        self.addCleanup(listener.close)
+        listener.autocommit = True
+        listener.cursor().execute(f"LISTEN {CHANGE_CHANNEL}")
+        create_employee("Banks", 80000)
+        select.select([listener], [], [], 5)
+        listener.poll()
+        self.assertEqual(
+            [notify.channel for notify in listener.notifies],
+            [CHANGE_CHANNEL],
+        )
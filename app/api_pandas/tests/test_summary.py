@@ -0,0 +1,417 @@
+import datetime
+import threading
+from unittest.mock import patch
+
+import numpy as np
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api_pandas.aggregation import (
+    STATISTICS, StatisticsQuery, StatisticsQueryError, compute_statistic
+)
+from api_pandas.cache import invalidate_statistics
+from api_pandas.models import (
+    Employee, EmployeeSummary, EmployeeSummaryFolded, allocate_employee_ids
+)
+from api_pandas.sketches import HyperLogLog, QuantileSketch
+from api_pandas.summary import (
+    apply_write, approximate_statistic, approximate_statistics, built_state,
+    refresh_summaries, salary_text, summary_statistic
+)
+from api_pandas.tests.helpers import create_employee
+
+
+class QuantileSketchTestCase(TestCase):
+    def test_quantiles_within_relative_error(self):
+        values = list(range(1, 10001))
+        sketch = QuantileSketch(alpha=0.01)
+        for value in values:
+            sketch.add(value)
+        for q in (0.1, 0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertLessEqual(
+                abs(sketch.quantile(q) - exact) / exact, 0.01
+            )
+
+    def test_merge_equals_single_sketch(self):
+        left, right = QuantileSketch(), QuantileSketch()
+        both = QuantileSketch()
+        for value in range(0, 500):
+            (left if value % 2 else right).add(value)
+            both.add(value)
+        merged = QuantileSketch.from_dict(left.to_dict()).merge(right)
+        self.assertEqual(merged.to_dict(), both.to_dict())
+
+
+class HyperLogLogTestCase(TestCase):
+    def test_estimate_within_standard_errors(self):
+        for size in (10, 1000, 50000):
+            sketch = HyperLogLog()
+            for value in range(size):
+                sketch.add(salary_text(value))
+            self.assertLessEqual(
+                abs(sketch.estimate() - size) / size,
+                3 * sketch.standard_error,
+            )
+
+    def test_merge_equals_single_sketch(self):
+        left, right, both = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        for value in range(2000):
+            (left if value % 3 else right).add(str(value))
+            both.add(str(value))
+        merged = HyperLogLog.from_dict(left.to_dict()).merge(right)
+        self.assertEqual(merged.to_dict(), both.to_dict())
+
+
+@override_settings(STATISTICS_SUMMARY_MAX_AGE=60)
+class EmployeeSummaryTestCase(TestCase):
+    def setUp(self):
+        create_employee(
+            "Software", 50000, 10, date_of_birth=datetime.date(1980, 5, 1)
+        )
+        create_employee("Software", 70000, 5)
+        create_employee("Banks", 120000, 10)
+        create_employee("Banks", None, 2)
+        create_employee(None, 0, 2)
+
+    def assertServedLikeDatabase(self, name):
+        served = summary_statistic(name)
+        expected = compute_statistic(name)
+        self.assertEqual(
+            sorted(map(str, served)), sorted(map(str, expected)), name
+        )
+
+    def test_full_refresh(self):
+        state = refresh_summaries(full=True)
+        self.assertEqual(state.employees, 5)
+        software = EmployeeSummary.objects.get(
+            dimension="industry", value="Software"
+        )
+        self.assertEqual(software.employees, 2)
+        self.assertEqual(software.salary_sum, 120000)
+        self.assertEqual(software.salary_sum_of_squares, 74 * 10 ** 8)
+        self.assertEqual(
+            software.date_of_birth_min, datetime.date(1980, 5, 1)
+        )
+        sketch = QuantileSketch.from_dict(software.salary_sketch)
+        self.assertEqual(sketch.count, 2)
+
+    def test_statistics_served_from_summary(self):
+        refresh_summaries(full=True)
+        for name in (
+            "average-salary",
+            "average-salary-experience",
+            "percentage-employees",
+        ):
+            with self.assertNumQueries(2):
+                summary_statistic(name)
+            self.assertServedLikeDatabase(name)
+        self.assertIsNone(summary_statistic("median-salary"))
+
+    def test_incremental_refresh_adds_new_employees(self):
+        refresh_summaries(full=True)
+        create_employee("Software", 90000, 5)
+        create_employee("Retail", 30000, 1)
+        state = refresh_summaries()
+        self.assertEqual(state.employees, 7)
+        self.assertServedLikeDatabase("average-salary")
+        self.assertServedLikeDatabase("percentage-employees")
+
+    def test_incremental_refresh_adds_employees_behind_folded_ones(self):
+        refresh_summaries(full=True)
+        reserved = allocate_employee_ids(1)
+        folded = create_employee("Software", 90000, 5)
+        folded.salary = 95000
+        folded.save()
+        # Inserted without signals, below the folded employee's id.
+        Employee.objects.bulk_create([Employee(
+            id=reserved[0],
+            first_name="John",
+            last_name="Doe",
+            date_of_birth=datetime.date(1990, 1, 1),
+            industry="Retail",
+            salary=30000,
+            years_of_experience=1,
+        )])
+        state = refresh_summaries()
+        self.assertEqual(state.employees, 7)
+        self.assertEqual(state.high_water_mark, folded.id)
+        self.assertFalse(EmployeeSummaryFolded.objects.exists())
+        self.assertServedLikeDatabase("average-salary")
+        self.assertServedLikeDatabase("percentage-employees")
+
+    @override_settings(STATISTICS_SUMMARY_MAX_AGE=None)
+    def test_disabled_summaries_are_not_served(self):
+        refresh_summaries(full=True)
+        self.assertIsNone(summary_statistic("average-salary"))
+
+    def test_stale_summaries_are_not_served(self):
+        self.assertIsNone(summary_statistic("average-salary"))
+
+    def test_refresh_statistics_command(self):
+        call_command("refresh_statistics", "--full", verbosity=0)
+        self.assertServedLikeDatabase("average-salary-experience")
+
+    def test_sql_registers_match_python(self):
+        refresh_summaries(full=True)
+        software = EmployeeSummary.objects.get(
+            dimension="industry", value="Software"
+        )
+        sketch = HyperLogLog()
+        for salary in (50000, 70000):
+            sketch.add(salary_text(salary))
+        self.assertEqual(software.salary_distinct, sketch.to_dict())
+
+    def test_writes_are_folded_into_built_summaries(self):
+        refresh_summaries(full=True)
+        employee = create_employee("Retail", 30000, 1)
+        employee.industry = "Software"
+        employee.salary = 45000.5
+        employee.save()
+        Employee.objects.filter(industry="Banks").first().delete()
+        maintained = {
+            (summary.dimension, summary.value): summary
+            for summary in EmployeeSummary.objects.filter(employees__gt=0)
+        }
+        state = refresh_summaries(full=True)
+        self.assertEqual(state.employees, 5)
+        rebuilt = EmployeeSummary.objects.all()
+        self.assertEqual(len(maintained), len(rebuilt))
+        for summary in rebuilt:
+            other = maintained[summary.dimension, summary.value]
+            for field in (
+                "employees", "salary_count", "salary_sum",
+                "salary_sum_of_squares", "date_of_birth_days_sum",
+                "salary_sketch",
+            ):
+                self.assertEqual(
+                    getattr(other, field), getattr(summary, field), field
+                )
+
+    def test_bulk_writes_mark_summaries_stale(self):
+        refresh_summaries(full=True)
+        invalidate_statistics()
+        self.assertIsNone(built_state())
+        self.assertIsNone(summary_statistic("average-salary"))
+        self.assertIsNotNone(refresh_summaries().refreshed_at)
+
+
+class ConcurrentSummaryWritesTestCase(TransactionTestCase):
+    def setUp(self):
+        create_employee("Banks", 120000, 10)
+        refresh_summaries(full=True)
+
+    def write(self, industry, pk, done, release=None):
+        try:
+            with transaction.atomic():
+                apply_write(None, {
+                    "industry": industry,
+                    "years_of_experience": pk,
+                    "salary": 1000,
+                    "date_of_birth": datetime.date(1990, 1, 1),
+                }, pk)
+                done.set()
+                if release is not None:
+                    release.wait(10)
+        finally:
+            connection.close()
+
+    def test_writes_to_other_groups_do_not_wait(self):
+        held, done, release = (threading.Event() for _ in range(3))
+        holder = threading.Thread(
+            target=self.write, args=("Media", 1001, held, release)
+        )
+        holder.start()
+        try:
+            held.wait(10)
+            writer = threading.Thread(
+                target=self.write, args=("Retail", 1002, done)
+            )
+            writer.start()
+            self.assertTrue(done.wait(5))
+            writer.join()
+        finally:
+            release.set()
+            holder.join()
+        self.assertEqual(built_state().total_employees, 3)
+
+    def test_refresh_folds_counted_employees(self):
+        for pk in (1001, 1002, 1003):
+            self.write("Media", pk, threading.Event())
+        apply_write({
+            "industry": "Media",
+            "years_of_experience": 1003,
+            "salary": 1000,
+            "date_of_birth": datetime.date(1990, 1, 1),
+        }, None, 1003)
+        self.assertEqual(built_state().total_employees, 3)
+        state = refresh_summaries()
+        self.assertEqual(state.employees, 3)
+        self.assertEqual(built_state().total_employees, 3)
+
+
+class ApproximateStatisticsTestCase(TestCase):
+    industries = ["Banks", "Media", "Retail", "Software"]
+
+    @classmethod
+    def setUpTestData(cls):
+        random = np.random.default_rng(7)
+        size = 4000
+        days = random.integers(0, 15000, size)
+        Employee.objects.bulk_create(
+            Employee(
+                first_name="John",
+                last_name="Doe",
+                date_of_birth=(
+                    datetime.date(1950, 1, 1)
+                    + datetime.timedelta(days=int(day))
+                ),
+                industry=cls.industries[i % len(cls.industries)],
+                salary=round(float(salary), 2) if i % 50 else None,
+                years_of_experience=int(experience),
+            )
+            for i, (day, salary, experience) in enumerate(zip(
+                days,
+                random.lognormal(11, 0.5, size),
+                random.integers(0, 40, size),
+            ))
+        )
+        refresh_summaries(full=True)
+
+    def exact(self, query):
+        with patch("api_pandas.aggregation.supports_sql", return_value=False):
+            return query.run()
+
+    def assertWithinBounds(self, query):
+        approximate, bounds = approximate_statistic(query)
+        exact = self.exact(query)
+        self.assertEqual(len(approximate), len(exact))
+        dimension = query.group_by[0].name
+        for estimate, value in zip(approximate, exact):
+            self.assertEqual(estimate[dimension], value[dimension])
+            for metric in query.metrics:
+                bound = bounds[metric.name]
+                error = abs(estimate[metric.name] - value[metric.name])
+                if "absolute" in bound:
+                    self.assertLessEqual(error, bound["absolute"])
+                else:
+                    self.assertLessEqual(
+                        error,
+                        bound["relative"] * abs(value[metric.name]) + 1e-6,
+                        metric.name,
+                    )
+
+    def test_accuracy_against_pandas(self):
+        self.assertWithinBounds(StatisticsQuery.parse(
+            "industry",
+            "count,percentage,salary:mean,salary:std,salary:median,"
+            "salary:p10,salary:p90,salary:distinct,age:mean",
+        ))
+        self.assertWithinBounds(StatisticsQuery.parse(
+            "years_of_experience", "salary:median,salary:max,salary:count"
+        ))
+        for name in STATISTICS:
+            self.assertWithinBounds(STATISTICS[name])
+
+    def test_sketches_merge_across_partitions(self):
+        approximate_statistic(STATISTICS["median-salary"])
+        merged = QuantileSketch()
+        for summary in EmployeeSummary.objects.filter(dimension="industry"):
+            merged.merge(QuantileSketch.from_dict(summary.salary_sketch))
+        salaries = sorted(
+            float(salary) for salary in Employee.objects.filter(
+                salary__isnull=False
+            ).values_list("salary", flat=True)
+        )
+        median = salaries[len(salaries) // 2]
+        self.assertLessEqual(
+            abs(merged.quantile(0.5) - median) / median, merged.alpha
+        )
+
+    def test_unsupported_queries(self):
+        for group_by, metrics in (
+            ("age_band", "count"),
+            ("industry,years_of_experience", "count"),
+            ("industry", "years_of_experience:mean"),
+            ("industry", "age:median"),
+        ):
+            with self.assertRaises(StatisticsQueryError):
+                approximate_statistic(
+                    StatisticsQuery.parse(group_by, metrics)
+                )
+        with self.assertRaises(StatisticsQueryError):
+            approximate_statistics(["average-height"])
+
+
+class ApproximateStatisticsViewTestCase(APITestCase):
+    def setUp(self):
+        create_employee("Software", 50000, 10)
+        create_employee("Software", 70000, 5)
+        create_employee("Banks", 120000, 10)
+        refresh_summaries(full=True)
+
+    def test_query(self):
+        response = self.client.get(reverse("statistics-query"), {
+            "group_by": "industry",
+            "metrics": "salary:median,count",
+            "approx": "true",
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["error"], {
+            "salary_median": {"relative": 0.01}, "count": {"relative": 0.0},
+        })
+        self.assertEqual(
+            [row["count"] for row in response.data["results"]], [1, 2]
+        )
+
+    def test_named_statistic_and_batch(self):
+        response = self.client.get(
+            reverse("median-salary-per-industry"), {"approx": "1"}
+        )
+        self.assertEqual(response.data["results"][0]["industry"], "Banks")
+        response = self.client.get(reverse("statistics-batch"), {
+            "statistics": "average-salary,median-salary", "approx": "true",
+        })
+        self.assertEqual(response.data["meta"]["engine"], "summary")
+        self.assertEqual(
+            response.data["results"]["average-salary"],
+            [
+                {"industry": "Banks", "salary": 120000.0},
+                {"industry": "Software", "salary": 60000.0},
+            ],
+        )
+        self.assertIn("median-salary", response.data["meta"]["error"])
+
+    def test_stale_summaries_are_not_rebuilt_in_requests(self):
+        invalidate_statistics()
+        response = self.client.get(reverse("statistics-query"), {
+            "group_by": "industry", "metrics": "salary:median", "approx": "1",
+        })
+        self.assertEqual(
+            response.data,
+            {
+                "results": [
+                    {"industry": "Banks", "salary_median": 120000.0},
+                    {"industry": "Software", "salary_median": 60000.0},
+                ],
+                "error": {"salary_median": {"relative": 0.0}},
+            },
+        )
+        self.assertIsNone(built_state())
+
+    def test_invalid(self):
+        for params in (
+            {"group_by": "age_band", "metrics": "count"},
+            {"group_by": "industry", "metrics": "count", "industry": "Banks"},
+        ):
+            response = self.client.get(
+                reverse("statistics-query"), {**params, "approx": "true"}
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
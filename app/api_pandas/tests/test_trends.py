@@ -0,0 +1,186 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api_pandas.aggregation import StatisticsQueryError
+from api_pandas.models import Employee
+from api_pandas.tests.helpers import create_employee
+from api_pandas.trends import Trend, bucket_number, bucket_start
+
+
+def write_employee(industry, salary, written):
+    employee = create_employee(industry, salary)
+    # auto_now only applies on save().
+    Employee.objects.filter(pk=employee.pk).update(
+        updated_at=timezone.make_aware(written)
+    )
+    return employee
+
+
+class BucketTestCase(TestCase):
+    def test_bucket_numbers(self):
+        day = datetime.date(2024, 3, 14)
+        for period, start in (
+            ("day", day),
+            ("week", datetime.date(2024, 3, 11)),
+            ("month", datetime.date(2024, 3, 1)),
+        ):
+            with self.subTest(period=period):
+                number = bucket_number(day, period)
+                self.assertEqual(bucket_start(number, period), start)
+                self.assertEqual(bucket_number(start, period), number)
+                self.assertLess(
+                    bucket_start(number - 1, period), start
+                )
+        self.assertEqual(
+            bucket_start(bucket_number(day, "month") - 3, "month"),
+            datetime.date(2023, 12, 1),
+        )
+
+    def test_parse(self):
+        trend = Trend.parse({"period": "week", "window": "4"})
+        self.assertEqual((trend.period, trend.window), ("week", 4))
+        self.assertEqual(Trend.parse({}).period, "day")
+        for params in (
+            {"period": "year"},
+            {"window": "0"},
+            {"window": "91"},
+            {"window": "many"},
+            {"start": "2024-02-30"},
+            {"start": "2024-03-02", "end": "2024-03-01"},
+        ):
+            with self.assertRaises(StatisticsQueryError):
+                Trend.parse(params)
+
+
+class TrendTestCase(TestCase):
+    def setUp(self):
+        write_employee("Banks", 1000, datetime.datetime(2024, 1, 1, 9))
+        write_employee("Banks", 3000, datetime.datetime(2024, 1, 1, 23))
+        write_employee("Banks", 8000, datetime.datetime(2024, 1, 3, 12))
+        write_employee("Media", 2000, datetime.datetime(2024, 2, 10, 12))
+        write_employee(None, 5000, datetime.datetime(2024, 1, 2, 12))
+
+    def test_daily(self):
+        self.assertEqual(
+            Trend().run(Employee.objects.all()),
+            [
+                {
+                    "period": "2024-01-01",
+                    "industry": "Banks",
+                    "headcount": 2,
+                    "salary_mean": 2000.0,
+                    "salary_median": 2000.0,
+                },
+                {
+                    "period": "2024-01-03",
+                    "industry": "Banks",
+                    "headcount": 1,
+                    "salary_mean": 8000.0,
+                    "salary_median": 8000.0,
+                },
+                {
+                    "period": "2024-02-10",
+                    "industry": "Media",
+                    "headcount": 1,
+                    "salary_mean": 2000.0,
+                    "salary_median": 2000.0,
+                },
+            ],
+        )
+
+    def test_rolling_window(self):
+        records = Trend(
+            window=3,
+            start=datetime.date(2024, 1, 2),
+            end=datetime.date(2024, 1, 4),
+        ).run(Employee.objects.all())
+        self.assertEqual(
+            [
+                (r["period"], r["headcount"], r["salary_median"])
+                for r in records
+            ],
+            [
+                ("2024-01-02", 2, 2000.0),
+                ("2024-01-03", 3, 3000.0),
+                ("2024-01-04", 1, 8000.0),
+            ],
+        )
+
+    @override_settings(STATISTICS_TRENDS={"CHUNK_BUCKETS": 1})
+    def test_chunks_match_one_pass(self):
+        queryset = Employee.objects.all()
+        for period in ("day", "week", "month"):
+            with self.subTest(period=period):
+                trend = Trend(period, window=2)
+                with override_settings(STATISTICS_TRENDS={}):
+                    whole = Trend(period, window=2).run(queryset)
+                self.assertEqual(trend.run(queryset), whole)
+
+    def test_monthly(self):
+        records = Trend("month").run(Employee.objects.all())
+        self.assertEqual(
+            [(r["period"], r["industry"], r["headcount"]) for r in records],
+            [("2024-01-01", "Banks", 3), ("2024-02-01", "Media", 1)],
+        )
+
+    def test_range_clamped_to_employees(self):
+        queryset = Employee.objects.all()
+        expected = Trend(
+            "month",
+            window=3,
+            start=datetime.date(2024, 1, 1),
+            end=datetime.date(2024, 4, 30),
+        ).run(queryset)
+        trend = Trend(
+            "month",
+            window=3,
+            start=datetime.date(1900, 1, 1),
+            end=datetime.date(2100, 1, 1),
+        )
+        with self.assertNumQueries(2):
+            records = trend.run(queryset)
+        self.assertEqual(records, expected)
+        # The last employees still count in the next two windows.
+        self.assertEqual(records[-1]["period"], "2024-04-01")
+
+    def test_no_employees(self):
+        self.assertEqual(Trend().run(Employee.objects.none()), [])
+
+
+class SalaryTrendViewTestCase(APITestCase):
+    def setUp(self):
+        write_employee("Banks", 1000, datetime.datetime(2024, 1, 1, 9))
+        write_employee("Media", 3000, datetime.datetime(2024, 1, 8, 9))
+
+    def test_weekly_trend(self):
+        response = self.client.get(
+            reverse("salary-trend"), {"period": "week", "window": "2"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r["period"], r["industry"]) for r in response.data],
+            [
+                ("2024-01-01", "Banks"),
+                ("2024-01-08", "Banks"),
+                ("2024-01-08", "Media"),
+            ],
+        )
+
+    def test_filtered(self):
+        response = self.client.get(
+            reverse("salary-trend"), {"salary__gte": 2000}
+        )
+        self.assertEqual(
+            [r["industry"] for r in response.data], ["Media"]
+        )
+
+    def test_invalid_parameters(self):
+        response = self.client.get(
+            reverse("salary-trend"), {"period": "decade"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
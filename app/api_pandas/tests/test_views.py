@@ -1,6 +1,9 @@
 import os
 import json
 import datetime
+from unittest.mock import patch
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -169,8 +172,14 @@ class MockedDataCRUDTestCase(APITestCase):
         with open(mocked_data_file_path, "r") as file:
             cls.mocked_data = json.load(file)[:500]
 
-    def test_crud_employees_from_mocked_data(self):
+    # The expected ages below are the calendar ages on this day.
+    @patch(
+        "api_pandas.aggregation.today",
+        return_value=datetime.date(2023, 4, 15),
+    )
+    def test_crud_employees_from_mocked_data(self, patched_today):
         # test_create_employees_from_mocked_data
+        # ids come from the database sequence, so keep the assigned ones
         for employee_data in self.mocked_data:
             response = self.client.post(
                 reverse("employee-list-create"),
@@ -178,6 +187,7 @@ class MockedDataCRUDTestCase(APITestCase):
                 format="json"
             )
             self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            employee_data["id"] = response.data["id"]
 
         # test_retrieve_employees_from_mocked_data
         for employee_data in self.mocked_data:
@@ -494,3 +504,208 @@ class MockedDataCRUDTestCase(APITestCase):
                 )
             )
             self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class StatisticsQueryViewTestCase(APITestCase):
+    def setUp(self):
+        rows = [
+            ("Software", 50000, 2, {"team": "core"}),
+            ("Software", 70000, 4, {"team": "web"}),
+            ("Software", 90000, 4, {"team": "core"}),
+            ("Banks", 120000, 10, None),
+        ]
+        for i, (industry, salary, experience, other_fields) in enumerate(
+            rows
+        ):
+            Employee.objects.create(
+                first_name=f"Employee{i}",
+                last_name="Doe",
+                date_of_birth=datetime.date(1990, 1, 1),
+                industry=industry,
+                salary=salary,
+                years_of_experience=experience,
+                other_fields=other_fields,
+            )
+
+    def test_group_by_and_metrics(self):
+        response = self.client.get(
+            reverse("statistics-query"),
+            {
+                "group_by": "industry",
+                "metrics": "salary:mean,salary:min,count",
+                "ordering": "-count",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {
+                    "industry": "Software",
+                    "salary_mean": 70000.0,
+                    "salary_min": 50000.0,
+                    "count": 3,
+                },
+                {
+                    "industry": "Banks",
+                    "salary_mean": 120000.0,
+                    "salary_min": 120000.0,
+                    "count": 1,
+                },
+            ],
+        )
+
+    def test_group_by_other_fields_key_with_filters(self):
+        response = self.client.get(
+            reverse("statistics-query"),
+            {
+                "group_by": "other_fields.team",
+                "metrics": "count",
+                "years_of_experience__gte": 4,
+            },
+        )
+        self.assertEqual(
+            response.data,
+            [
+                {"other_fields.team": "core", "count": 1},
+                {"other_fields.team": "web", "count": 1},
+            ],
+        )
+
+    def test_invalid_query(self):
+        response = self.client.get(
+            reverse("statistics-query"),
+            {"group_by": "first_name", "metrics": "count"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch(
+        "api_pandas.aggregation.today",
+        return_value=datetime.date(2025, 1, 1),
+    )
+    def test_age_band_bins(self, patched_today):
+        response = self.client.get(
+            reverse("statistics-query"),
+            {"group_by": "age_band", "metrics": "salary:median",
+             "bins": "18,35,50"},
+        )
+        self.assertEqual(
+            response.data, [{"age_band": 35, "salary_median": 80000.0}]
+        )
+        response = self.client.get(
+            reverse("statistics-query"),
+            {"group_by": "industry", "metrics": "count", "bins": "18,35"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_aliases_accept_filters(self):
+        response = self.client.get(
+            reverse("average-salary-per-industry"), {"salary__lte": 70000}
+        )
+        self.assertEqual(
+            response.data, [{"industry": "Software", "salary": 60000.0}]
+        )
+
+    def test_batch(self):
+        response = self.client.get(
+            reverse("statistics-batch"),
+            {"statistics": "average-salary,percentage-employees"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(response.data["results"]),
+            ["average-salary", "percentage-employees"],
+        )
+        self.assertEqual(
+            response.data["results"]["percentage-employees"],
+            [
+                {"industry": "Software", "percentage": 75.0},
+                {"industry": "Banks", "percentage": 25.0},
+            ],
+        )
+        self.assertIn("average-salary", response.data["meta"]["timings_ms"])
+
+    def test_batch_unknown_statistic(self):
+        response = self.client.get(
+            reverse("statistics-batch"), {"statistics": "average-height"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SparseFieldsTestCase(APITestCase):
+    def setUp(self):
+        for i in range(3):
+            self.employee = Employee.objects.create(
+                first_name=f"Jane{i}",
+                last_name=f"Doe{2 - i}",
+                date_of_birth=datetime.date(1990, 1, 1),
+                industry="Software",
+                salary=50000,
+                years_of_experience=3,
+                other_fields={"bio": "x" * 1000},
+            )
+        self.detail_url = reverse(
+            "employee-retrieve-update-destroy",
+            kwargs={"pk": self.employee.pk},
+        )
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, " ".join(query["sql"] for query in queries)
+
+    def test_list_fields(self):
+        full, _ = self.get(reverse("employee-list-create"))
+        response, sql = self.get(
+            reverse("employee-list-create"), {"fields": "first_name,id"}
+        )
+        row = response.json()["results"][0]
+        self.assertEqual(list(row), ["id", "first_name"])
+        self.assertEqual(row["first_name"], "Jane0")
+        self.assertNotIn("other_fields", sql)
+        self.assertLess(len(response.content), len(full.content) / 10)
+
+    def test_list_exclude(self):
+        response, sql = self.get(
+            reverse("employee-list-create"), {"exclude": "other_fields"}
+        )
+        row = response.json()["results"][0]
+        self.assertNotIn("other_fields", row)
+        self.assertIn("updated_at", row)
+        self.assertNotIn("other_fields", sql)
+
+    def test_cursor_pages_with_unrendered_ordering(self):
+        params = {
+            "fields": "first_name",
+            "ordering": "last_name",
+            "pagination": "cursor",
+            "page_size": 2,
+        }
+        response, _ = self.get(reverse("employee-list-create"), params)
+        names = [row["first_name"] for row in response.json()["results"]]
+        response = self.client.get(response.json()["next"])
+        names += [row["first_name"] for row in response.json()["results"]]
+        self.assertEqual(names, ["Jane2", "Jane1", "Jane0"])
+        self.assertEqual(response.json()["results"], [{"first_name": "Jane0"}])
+
+    def test_detail_fields(self):
+        response, sql = self.get(self.detail_url, {"fields": "salary"})
+        self.assertEqual(response.json(), {"salary": "50000.00"})
+        self.assertNotIn("other_fields", sql)
+
+    def test_unknown_fields(self):
+        response = self.client.get(self.detail_url, {"fields": "bonus"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(
+            reverse("employee-list-create"), {"exclude": "id,bonus"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_ignore_fields(self):
+        response = self.client.patch(
+            f"{self.detail_url}?fields=salary", {"salary": 60000}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["salary"], "60000.00")
+        self.assertIn("other_fields", response.data)
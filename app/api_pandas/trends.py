@@ -0,0 +1,210 @@
+"""
+Salary trends per industry over time.
+
+Employees are bucketed by the day, week (from Monday) or month of their
+latest write, ``updated_at``, in the current time zone. Every bucket
+gets the headcount, mean and median salary of each industry; with
+``?window=4`` each bucket instead covers the employees of the last four
+buckets up to it, a rolling window. Buckets without employees are left
+out.
+
+This is a trend of when employees were last modified, not a history of
+salaries: each current employee is counted once, in the bucket of its
+latest write, with its current salary. Earlier values and deleted
+employees are not counted; ``?as_of=`` on the statistics endpoints
+reconstructs those from the change log.
+
+The buckets are computed by PostgreSQL, a chunk of ``CHUNK_BUCKETS`` at
+a time, so only their statistics ever reach Python however many years
+the range spans. A rolling window joins each employee to the buckets
+whose window it falls in, so medians stay exact; the query reads the
+employees of the chunk and of the ``window - 1`` buckets before it,
+through the ``updated_at`` index, and sorts each of them once per
+window, hence ``MAX_WINDOW``.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import DateTimeField, Max, Min
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from api_pandas.aggregation import StatisticsQueryError
+from api_pandas.sampling import number
+
+DEFAULTS = {
+    'CHUNK_BUCKETS': 31,
+    # Each employee is counted in up to this many windows.
+    'MAX_WINDOW': 90,
+}
+PERIODS = ('day', 'week', 'month')
+# Weeks are counted from this Monday.
+EPOCH = datetime.date(1970, 1, 5)
+
+
+def trend_settings():
+    return {**DEFAULTS, **getattr(settings, 'STATISTICS_TRENDS', {})}
+
+
+def bucket_number(day, period):
+    """Number of the bucket ``day`` falls in; consecutive buckets are
+    consecutive numbers."""
+    if period == 'month':
+        return day.year * 12 + day.month - 1
+    days = (day - EPOCH).days
+    return days // 7 if period == 'week' else days
+
+
+def bucket_start(number, period):
+    """First day of bucket ``number``."""
+    if period == 'month':
+        return datetime.date(number // 12, number % 12 + 1, 1)
+    return EPOCH + datetime.timedelta(
+        days=number * 7 if period == 'week' else number
+    )
+
+
+def bucket_number_sql(period):
+    """SQL numbering the bucket starting on the date ``bucket`` like
+    ``bucket_number``."""
+    if period == 'month':
+        return (
+            'CAST(EXTRACT(YEAR FROM bucket) * 12 '
+            '+ EXTRACT(MONTH FROM bucket) - 1 AS integer)'
+        )
+    days = f"(bucket - DATE '{EPOCH.isoformat()}')"
+    return f'{days} / 7' if period == 'week' else days
+
+
+def midnight(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time()))
+
+
+def parse_day(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise StatisticsQueryError(f"{name} must be a date, not {value!r}.")
+    return day
+
+
+class Trend:
+    """Salary statistics per industry and bucket of time."""
+
+    def __init__(self, period='day', window=1, start=None, end=None):
+        options = trend_settings()
+        if period not in PERIODS:
+            raise StatisticsQueryError(
+                f"Unknown period {period!r}; choose from {', '.join(PERIODS)}."
+            )
+        if not 1 <= window <= options['MAX_WINDOW']:
+            raise StatisticsQueryError(
+                f"window is between 1 and {options['MAX_WINDOW']} buckets."
+            )
+        if start and end and start > end:
+            raise StatisticsQueryError("start is after end.")
+        self.period = period
+        self.window = window
+        self.start = start
+        self.end = end
+        self.chunk = max(options['CHUNK_BUCKETS'], 1)
+
+    @classmethod
+    def parse(cls, params):
+        return cls(
+            period=params.get('period') or 'day',
+            window=(
+                number(params, 'window', int) if params.get('window') else 1
+            ),
+            start=parse_day(params, 'start'),
+            end=parse_day(params, 'end'),
+        )
+
+    def buckets(self, queryset):
+        """Numbers of the first and last bucket of the range, or ``None``
+        if empty.
+
+        The range is clamped to the buckets holding employees, or holding
+        them in their window, however far apart ``start`` and ``end`` are.
+        """
+        written = queryset.order_by().filter(industry__isnull=False).aggregate(
+            first=Min('updated_at'), last=Max('updated_at')
+        )
+        if written['first'] is None:
+            return None
+        first = bucket_number(
+            timezone.localdate(written['first']), self.period
+        )
+        last = bucket_number(timezone.localdate(written['last']), self.period)
+        if self.start is not None:
+            first = max(first, bucket_number(self.start, self.period))
+        if self.end is not None:
+            last = min(
+                last + self.window - 1, bucket_number(self.end, self.period)
+            )
+        if first > last:
+            return None
+        return first, last
+
+    def run(self, queryset):
+        """Records of the buckets in range, oldest first."""
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            raise StatisticsQueryError("Trends need PostgreSQL.")
+        buckets = self.buckets(queryset)
+        if buckets is None:
+            return []
+        first, last = buckets
+        records = []
+        for chunk in range(first, last + 1, self.chunk):
+            records.extend(self.chunk_records(
+                queryset, chunk, min(chunk + self.chunk, last + 1)
+            ))
+        return records
+
+    def chunk_records(self, queryset, first, until):
+        """Records of the buckets numbered from ``first`` up to ``until``."""
+        connection = connections[queryset.db]
+        since = bucket_start(first - self.window + 1, self.period)
+        employees = queryset.order_by().filter(
+            updated_at__gte=midnight(since),
+            updated_at__lt=midnight(bucket_start(until, self.period)),
+            industry__isnull=False,
+        ).annotate(bucket=Trunc(
+            'updated_at', self.period, output_field=DateTimeField()
+        )).values('industry', 'salary', 'bucket')
+        sql, params = employees.query.sql_with_params()
+        with connection.cursor() as cursor:
+            # Each employee is joined to the buckets whose window holds
+            # it; OFFSET 0 numbers its own bucket once beforehand.
+            cursor.execute(
+                f'SELECT industry, period, COUNT(*), AVG(salary), '
+                f'PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY salary) '
+                f'FROM (SELECT industry, salary, '
+                f'{bucket_number_sql(self.period)} AS number '
+                f'FROM (SELECT industry, salary, CAST(bucket AS date) '
+                f'AS bucket FROM ({sql}) AS employees) AS dated '
+                f'OFFSET 0) AS trend '
+                f'CROSS JOIN LATERAL generate_series(GREATEST(number, %s), '
+                f'LEAST(number + %s, %s)) AS period '
+                f'GROUP BY period, industry ORDER BY period, industry',
+                [*params, first, self.window - 1, until - 1],
+            )
+            rows = cursor.fetchall()
+        return [
+            {
+                'period': bucket_start(period, self.period).isoformat(),
+                'industry': industry,
+                'headcount': headcount,
+                'salary_mean': None if mean is None else float(mean),
+                'salary_median': median,
+            }
+            for industry, period, headcount, mean, median in rows
+        ]
@@ -1,12 +1,19 @@
 from django.urls import path
 from api_pandas.views import (
+    EmployeeBulkUpsert,
+    EmployeeExport,
     EmployeeListCreate,
     EmployeeRetrieveUpdateDestroy,
+    SalaryTrend,
+    StatisticsBatch,
+    StatisticsQueryView,
+    async_statistic,
     average_age_per_industry,
     average_salary_per_industry,
     average_salary_per_experience,
     median_salary_per_industry,
-    percentage_of_employees_per_industry
+    percentage_of_employees_per_industry,
+    snapshot_diagnostics
 )
 
 urlpatterns = [
@@ -15,11 +22,36 @@ urlpatterns = [
         EmployeeListCreate.as_view(),
         name="employee-list-create",
     ),
+    path(
+        "employees/bulk/",
+        EmployeeBulkUpsert.as_view(),
+        name="employee-bulk-upsert",
+    ),
+    path(
+        "employees/export/<str:file_format>/",
+        EmployeeExport.as_view(),
+        name="employee-export",
+    ),
     path(
         "employees/<int:pk>/",
         EmployeeRetrieveUpdateDestroy.as_view(),
         name="employee-retrieve-update-destroy",
     ),
+    path(
+        "statistics/",
+        StatisticsQueryView.as_view(),
+        name="statistics-query",
+    ),
+    path(
+        "statistics/batch/",
+        StatisticsBatch.as_view(),
+        name="statistics-batch",
+    ),
+    path(
+        "statistics/salary-trend/",
+        SalaryTrend.as_view(),
+        name="salary-trend",
+    ),
     path(
         "statistics/average-age/",
         average_age_per_industry,
@@ -44,5 +76,20 @@ urlpatterns = [
         "statistics/percentage-employees/",
         percentage_of_employees_per_industry,
         name="percentage-employees-per-industry",
-     )
+     ),
+    path(
+        "async/statistics/",
+        async_statistic,
+        name="async-statistics-query",
+    ),
+    path(
+        "async/statistics/<str:name>/",
+        async_statistic,
+        name="async-statistic",
+    ),
+    path(
+        "diagnostics/snapshot/",
+        snapshot_diagnostics,
+        name="snapshot-diagnostics",
+    ),
 ]
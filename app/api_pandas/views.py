@@ -1,85 +1,628 @@
-from rest_framework import generics, filters
+from functools import partial
+from itertools import islice
+from types import GeneratorType
+
+from asgiref.sync import sync_to_async
+from django.db.models import F
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from rest_framework import generics, filters, status
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.response import Response
+from django_filters.utils import translate_validation
 from rest_framework.decorators import api_view
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer
 
+from api_pandas.aggregation import (
+    STATISTICS, StatisticsQuery, StatisticsQueryError, compute_statistics,
+    split
+)
+from api_pandas.bulk import SKIPPED, write_employees
+from api_pandas.cache import (
+    get_statistic, invalidate_statistics, statistics_cache
+)
+from api_pandas.conditional import (
+    conditional_employees, conditional_response, conditional_statistics,
+    data_version, set_validators, statistics_may_lag, statistics_validators
+)
+from api_pandas.exporters import ExportFormatError, export_employees
+from api_pandas.filters import (
+    EmployeeStatisticsFilter, OtherFieldsFilter, RankedSearchFilter
+)
+from api_pandas.history import (
+    employees_as_of, historical_statistic, historical_statistics,
+    parse_as_of
+)
 from api_pandas.models import Employee
-from api_pandas.serializers import EmployeeSerializer
-import pandas as pd
+from api_pandas.offload import Overloaded, statistics_executor
+from api_pandas.pagination import EmployeePagination
+from api_pandas.parsers import NDJSONParser
+from api_pandas.renderers import FastJSONRenderer
+from api_pandas.sampling import Sample, sample_statistic, sample_statistics
+from api_pandas.serializers import (
+    EmployeeBulkSerializer, EmployeeSerializer, EmployeeValuesSerializer
+)
+from api_pandas.snapshot import employee_snapshot
+from api_pandas.summary import approximate_statistic, approximate_statistics
+from api_pandas.trends import Trend
 
 
-class CustomPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+def cache_params(params):
+    """``params``, a ``QueryDict``, with every value of each parameter.
 
+    Filters and queries read repeated parameters with ``getlist``, so a
+    cache key must tell ``?metrics=a&metrics=b`` from ``?metrics=b``.
+    """
+    return {key: tuple(values) for key, values in params.lists()}
 
-class EmployeeListCreate(generics.ListCreateAPIView):
-    queryset = Employee.objects.all()
-    serializer_class = EmployeeSerializer
+
+def statistics_version(request):
+    """The data version statistics are cached under, if they are tagged.
+
+    Cached per data version, so that a result matches the ETag even when
+    another process wrote since it was cached here.
+    """
+    if statistics_may_lag():
+        return None
+    return data_version(request)[0]
+
+
+def approximation_requested(params):
+    return params.get('approx', '').lower() in ('1', 'true', 'yes')
+
+
+def check_approximable(params, queryset):
+    # Summaries cover every employee.
+    if queryset.query.where:
+        raise StatisticsQueryError(
+            "Approximate statistics cannot be filtered."
+        )
+    if params.get('sample'):
+        raise StatisticsQueryError("Ask for either approx or sample.")
+
+
+def check_historical(params):
+    # Summaries and samples only cover the current employees.
+    if approximation_requested(params) or params.get('sample'):
+        raise StatisticsQueryError(
+            "as_of cannot be combined with approx or sample."
+        )
+
+
+def historical_queryset(view, as_of):
+    """The employees at ``as_of``, narrowed by the filters of ``view``."""
+    # DjangoFilterBackend only filters querysets of the filterset's model.
+    filterset = view.filterset_class(
+        view.request.query_params,
+        queryset=employees_as_of(as_of),
+        request=view.request,
+    )
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    return OtherFieldsFilter().filter_queryset(
+        view.request, filterset.qs, view
+    )
+
+
+class EmployeeFilterMixin:
     filter_backends = [
-        filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend
+        RankedSearchFilter, filters.OrderingFilter, DjangoFilterBackend,
+        OtherFieldsFilter
         ]
     search_fields = ['first_name', 'last_name', 'industry']
     ordering_fields = [
         'first_name', 'last_name', 'industry', 'date_of_birth', 'annual_income'
         ]
     filterset_fields = ['industry']
-    pagination_class = CustomPagination
 
+    def get_queryset(self):
+        return super().get_queryset().annotate(annual_income=F('salary'))
 
-class EmployeeRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
+
+class SparseFieldsMixin:
+    """
+    ``?fields=first_name,last_name`` or ``?exclude=other_fields`` narrow a
+    GET response to those serializer fields, and the columns selected to
+    produce it, so large JSON columns are only read when asked for.
+    """
+    fields_query_param = 'fields'
+    exclude_query_param = 'exclude'
+
+    def get_requested_fields(self):
+        """Return the fields to render, or ``None`` for all of them."""
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return None
+        params = self.request.query_params
+        fields = split(params.getlist(self.fields_query_param))
+        exclude = split(params.getlist(self.exclude_query_param))
+        if not fields and not exclude:
+            return None
+        available = list(self.get_serializer_class()().fields)
+        unknown = [name for name in fields + exclude if name not in available]
+        if unknown:
+            raise ParseError(f"Unknown fields: {', '.join(unknown)}.")
+        requested = [
+            name for name in available
+            if (not fields or name in fields) and name not in exclude
+        ]
+        if not requested:
+            raise ParseError('No fields left to render.')
+        return requested
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields is None:
+            return queryset
+        return queryset.only(*fields)
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class ValuesListMixin:
+    """
+    Lists ``values()`` rows through ``values_serializer_class``, skipping
+    model instances and field-by-field serialization.
+
+    Besides the rendered fields, the rows carry ``id``, the
+    ``ordering_fields`` and the queryset's annotations, which keyset
+    cursors are built from. With ``values_serializer_class = None`` the
+    list uses ``serializer_class`` as usual.
+    """
+    values_serializer_class = None
+
+    def get_requested_fields(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.values_serializer_class
+        if serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        fields = self.get_requested_fields() or serializer_class.fields
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering_fields = getattr(self, 'ordering_fields', None)
+        if not isinstance(ordering_fields, (list, tuple)):
+            ordering_fields = []
+        queryset = queryset.values(*dict.fromkeys([
+            *fields, 'id', *ordering_fields, *queryset.query.annotations
+        ]))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = serializer_class(page, many=True, fields=fields)
+            return self.get_paginated_response(serializer.data)
+        return Response(
+            serializer_class(queryset, many=True, fields=fields).data
+        )
+
+
+@method_decorator(conditional_employees, name='get')
+class EmployeeListCreate(
+    SparseFieldsMixin,
+    ValuesListMixin,
+    EmployeeFilterMixin,
+    generics.ListCreateAPIView,
+):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
+    values_serializer_class = EmployeeValuesSerializer
+    pagination_class = EmployeePagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
 
-def get_employee_dataframe():
+@method_decorator(conditional_employees, name='get')
+class EmployeeRetrieveUpdateDestroy(
+    SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = Employee.objects.all()
-    serializer = EmployeeSerializer(queryset, many=True)
-    return pd.DataFrame(serializer.data)
+    serializer_class = EmployeeSerializer
 
 
-@api_view(['GET'])
-def average_age_per_industry(request):
-    df = get_employee_dataframe()
-    df['date_of_birth'] = pd.to_datetime(df['date_of_birth'])
-    df['age'] = (pd.Timestamp.now() - df['date_of_birth']).dt.days // 365
-    result = df.groupby('industry')['age'].mean().reset_index()
-    return Response(result.to_dict(orient='records'))
+class EmployeeBulkUpsert(generics.GenericAPIView):
+    """
+    Create or update many employees from a JSON array or an NDJSON stream.
 
+    Rows are validated and written in batches of ``?batch_size=`` rows.
+    Rows carrying an existing ``id`` replace that employee, unless
+    ``?on_conflict=skip`` is given. Invalid rows are reported by position
+    without affecting the others.
+    """
+    queryset = Employee.objects.all()
+    serializer_class = EmployeeBulkSerializer
+    parser_classes = [JSONParser, NDJSONParser]
+    batch_size = 1000
+    batch_size_query_param = 'batch_size'
+    max_batch_size = 10000
 
-@api_view(['GET'])
-def average_salary_per_industry(request):
-    df = get_employee_dataframe()
-    df['salary'] = pd.to_numeric(df['salary'])
-    result = df.groupby('industry')['salary'].mean().reset_index()
-    return Response(result.to_dict(orient='records'))
+    def get_batch_size(self):
+        try:
+            size = int(self.request.query_params[self.batch_size_query_param])
+        except (KeyError, ValueError):
+            return self.batch_size
+        return min(max(size, 1), self.max_batch_size)
 
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, (list, GeneratorType)):
+            return Response(
+                {'detail': 'Expected a list of employees.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        update = request.query_params.get('on_conflict') != 'skip'
+        batch_size = self.get_batch_size()
+        counts = {'created': 0, 'updated': 0}
+        errors = []
+        rows = iter(request.data)
+        offset = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            serializer = self.get_serializer(data=batch, many=True)
+            serializer.is_valid()
+            for index, detail in serializer.row_errors.items():
+                errors.append({'row': offset + index, 'errors': detail})
+            results = write_employees(serializer.validated_data, update)
+            for index, result in zip(serializer.valid_rows, results):
+                if result in counts:
+                    counts[result] += 1
+                else:
+                    errors.append({
+                        'row': offset + index,
+                        'errors': [self.describe(result)],
+                    })
+            offset += len(batch)
+        if offset:
+            invalidate_statistics()
+        return Response({**counts, 'errors': errors})
 
-@api_view(['GET'])
-def average_salary_per_experience(request):
-    df = get_employee_dataframe()
-    df['years_of_experience'] = pd.to_numeric(df['years_of_experience'])
-    df['salary'] = pd.to_numeric(df['salary'])
-    result = df.groupby('years_of_experience')['salary'].mean().reset_index()
-    return Response(result.to_dict(orient='records'))
+    def describe(self, result):
+        if result == SKIPPED:
+            return 'Employee with this id already exists.'
+        return result
 
 
+class EmployeeExport(EmployeeFilterMixin, generics.GenericAPIView):
+    """
+    Stream every matching employee as CSV, NDJSON or Parquet.
+
+    Accepts the same search, ordering and filter parameters as the
+    employee list, without pagination.
+    """
+    queryset = Employee.objects.all()
+    serializer_class = EmployeeSerializer
+
+    def get(self, request, file_format, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            content_type, chunks = export_employees(queryset, file_format)
+        except ExportFormatError as exc:
+            return Response(
+                {'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="employees.{file_format}"'
+        )
+        return response
+
+
+class StatisticsQueryView(generics.GenericAPIView):
+    """
+    Metrics of employees grouped by any dimensions, in one pass.
+
+    ``?group_by=industry,age_band`` takes ``industry``,
+    ``years_of_experience``, ``age_band`` and ``other_fields.<key>``;
+    ``?metrics=salary:mean,salary:p90,count`` takes ``<field>:<method>``
+    pairs (see ``api_pandas.aggregation.Metric``) plus ``count`` and
+    ``percentage``; ``?ordering=-count`` sorts the groups and
+    ``?bins=20,30,40`` bands ``age_band`` from each of those ages instead
+    of by decade. The list filters of ``EmployeeStatisticsFilter`` narrow
+    the employees.
+
+    With ``statistic`` set, the view serves that predefined statistic and
+    only accepts filters.
+
+    ``?approx=true`` answers from the per-industry and per-experience
+    summaries and their sketches instead of reading employees, as
+    ``{"results": [...], "error": {<metric>: <bound>}}``; see
+    ``api_pandas.summary.approximate_statistic``. ``?sample=0.05`` (or a
+    row count) computes the statistics over a uniform sample instead, as
+    ``{"results": [...], "sample": {...}}`` with confidence intervals in
+    each record; see ``api_pandas.sampling``. ``?as_of=2024-03-31`` (or
+    a date and time) computes the statistics over the employees as they
+    were then, reconstructed from the change log; see
+    ``api_pandas.history``.
+    """
+    queryset = Employee.objects.all()
+    filter_backends = [DjangoFilterBackend, OtherFieldsFilter]
+    filterset_class = EmployeeStatisticsFilter
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    statistic = None
+
+    def get_statistics_query(self):
+        if self.statistic is not None:
+            return STATISTICS[self.statistic]
+        params = self.request.query_params
+        return StatisticsQuery.parse(
+            params.getlist('group_by'),
+            params.getlist('metrics'),
+            params.getlist('ordering'),
+            params.getlist('bins'),
+        )
+
+    def depends_on_today(self):
+        try:
+            return self.get_statistics_query().depends_on_today
+        except StatisticsQueryError:
+            return False
+
+    @method_decorator(conditional_statistics)
+    def get(self, request, *args, **kwargs):
+        try:
+            return self.statistics_response(request)
+        except StatisticsQueryError as exc:
+            return Response(
+                {'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+    def statistics_response(self, request):
+        query = self.get_statistics_query()
+        sample = Sample.parse(request.query_params)
+        as_of = parse_as_of(request.query_params)
+        if as_of is not None:
+            check_historical(request.query_params)
+            queryset = historical_queryset(self, as_of)
+            return Response(historical_statistic(query, queryset, as_of))
+        queryset = self.filter_queryset(self.get_queryset())
+        if approximation_requested(request.query_params):
+            check_approximable(request.query_params, queryset)
+            results, error = approximate_statistic(query)
+            return Response({'results': results, 'error': error})
+        if sample is not None:
+            results, description = sample_statistic(query, queryset, sample)
+            return Response({'results': results, 'sample': description})
+        return Response(get_statistic(
+            self.statistic or 'query',
+            cache_params(request.query_params),
+            lambda: query.run(queryset),
+            statistics_version(request),
+        ))
+
+
+class StatisticsBatch(generics.GenericAPIView):
+    """
+    Several named statistics at once, e.g.
+    ``?statistics=average-age,median-salary`` (all of them by default).
+
+    Statistics are computed together in as few passes over the data as
+    possible; ``meta`` reports the milliseconds spent on each. Accepts the
+    same filters as the single statistics, ``?approx=true``, which
+    reports the error bounds of each statistic in ``meta``, ``?sample=``,
+    which computes every statistic from one sample, and ``?as_of=``.
+    """
+    queryset = Employee.objects.all()
+    filter_backends = [DjangoFilterBackend, OtherFieldsFilter]
+    filterset_class = EmployeeStatisticsFilter
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def statistic_names(self):
+        return list(dict.fromkeys(
+            split(self.request.query_params.getlist('statistics'))
+        )) or list(STATISTICS)
+
+    def depends_on_today(self):
+        return any(
+            STATISTICS[name].depends_on_today
+            for name in self.statistic_names() if name in STATISTICS
+        )
+
+    @method_decorator(conditional_statistics)
+    def get(self, request, *args, **kwargs):
+        names = self.statistic_names()
+        params = request.query_params
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            sample = Sample.parse(params)
+            as_of = parse_as_of(params)
+            if as_of is not None:
+                check_historical(params)
+                results, meta = historical_statistics(
+                    names, historical_queryset(self, as_of), as_of
+                )
+            elif approximation_requested(params):
+                check_approximable(params, queryset)
+                results, meta = approximate_statistics(names)
+            elif sample is not None:
+                results, meta = sample_statistics(names, queryset, sample)
+            else:
+                results, meta = compute_statistics(names, queryset)
+        except StatisticsQueryError as exc:
+            return Response(
+                {'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'results': results, 'meta': meta})
+
+
+class SalaryTrend(generics.GenericAPIView):
+    """
+    Headcount, mean and median salary per industry over time, e.g.
+    ``?period=week&window=4&start=2024-01-01&end=2024-06-30``.
+
+    ``period`` is ``day`` (the default), ``week`` or ``month`` of the
+    employees' latest write; ``window`` rolls each bucket over that many
+    buckets up to it; ``start`` and ``end`` default to the first and last
+    write. Each current employee is counted once, in the bucket of its
+    latest write, with its current salary, so earlier values and deleted
+    employees are not part of the trend; ``?as_of=`` serves statistics as
+    they were. Accepts the same filters as the statistics; see
+    ``api_pandas.trends``.
+    """
+    queryset = Employee.objects.all()
+    filter_backends = [DjangoFilterBackend, OtherFieldsFilter]
+    filterset_class = EmployeeStatisticsFilter
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    @method_decorator(conditional_statistics)
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            trend = Trend.parse(request.query_params)
+            results = get_statistic(
+                'salary-trend',
+                cache_params(request.query_params),
+                lambda: trend.run(queryset),
+                statistics_version(request),
+            )
+        except StatisticsQueryError as exc:
+            return Response(
+                {'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(results)
+
+
+average_age_per_industry = StatisticsQueryView.as_view(
+    statistic='average-age'
+)
+average_salary_per_industry = StatisticsQueryView.as_view(
+    statistic='average-salary'
+)
+average_salary_per_experience = StatisticsQueryView.as_view(
+    statistic='average-salary-experience'
+)
 # interesting statistics
-@api_view(['GET'])
-def median_salary_per_industry(request):
-    df = get_employee_dataframe()
-    df['salary'] = pd.to_numeric(df['salary'])
-    result = df.groupby('industry')['salary'].median().reset_index()
-    return Response(result.to_dict(orient='records'))
+median_salary_per_industry = StatisticsQueryView.as_view(
+    statistic='median-salary'
+)
+percentage_of_employees_per_industry = StatisticsQueryView.as_view(
+    statistic='percentage-employees'
+)
 
 
 @api_view(['GET'])
-def percentage_of_employees_per_industry(request):
-    df = get_employee_dataframe()
-    total_employees = len(df)
-    industry_count = df['industry'].value_counts()
-    result = (industry_count / total_employees * 100).reset_index()
-    result.columns = ['industry', 'percentage']
-    return Response(result.to_dict(orient='records'))
+def snapshot_diagnostics(request):
+    """Version, build time and bytes per column of the employee snapshot."""
+    return Response(employee_snapshot.diagnostics())
+
+
+async def async_statistic(request, name=None):
+    """
+    Async counterpart of the statistics endpoints for ASGI deployments.
+
+    Serves the named statistic, or the query described by ``group_by``,
+    ``metrics``, ``ordering`` and ``bins`` when ``name`` is omitted, with
+    the same filters, ``approx``, ``sample`` and ``as_of``. Cached results
+    are read through ``sync_to_async``; anything else is computed on the
+    bounded statistics pool, where concurrent identical requests share one
+    computation. Responses are tagged and answered conditionally like those
+    of the synchronous views.
+    """
+    try:
+        if name is not None:
+            query = STATISTICS[name]
+        else:
+            query = StatisticsQuery.parse(
+                request.GET.getlist('group_by'),
+                request.GET.getlist('metrics'),
+                request.GET.getlist('ordering'),
+                request.GET.getlist('bins'),
+            )
+    except KeyError:
+        return JsonResponse(
+            {'detail': f'Unknown statistic {name!r}.'},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    except StatisticsQueryError as exc:
+        return JsonResponse(
+            {'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST
+        )
+    etag, last_modified = await sync_to_async(statistics_validators)(
+        request, query.depends_on_today
+    )
+    response = conditional_response(request, etag, last_modified)
+    if response is None:
+        response = await statistic_response(request, name, query)
+    return set_validators(response, request, etag, last_modified)
+
+
+async def statistic_response(request, name, query):
+    """Serve ``query`` for ``async_statistic`` once it is not answered 304."""
+    try:
+        as_of = parse_as_of(request.GET)
+        employees = Employee.objects.all()
+        if as_of is not None:
+            check_historical(request.GET)
+            employees = await sync_to_async(employees_as_of)(as_of)
+    except StatisticsQueryError as exc:
+        return JsonResponse(
+            {'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST
+        )
+    filterset = EmployeeStatisticsFilter(request.GET, queryset=employees)
+    if not filterset.is_valid():
+        return JsonResponse(
+            filterset.errors, status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        employees = OtherFieldsFilter().filter_params(
+            request.GET, filterset.qs
+        )
+    except ParseError as exc:
+        return JsonResponse(
+            {'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        sample = Sample.parse(request.GET)
+        if approximation_requested(request.GET):
+            check_approximable(request.GET, employees)
+            results, error = await sync_to_async(approximate_statistic)(
+                query
+            )
+            return JsonResponse({'results': results, 'error': error})
+    except StatisticsQueryError as exc:
+        return JsonResponse(
+            {'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST
+        )
+    statistic = name or 'query'
+    params = cache_params(request.GET)
+    version = await sync_to_async(statistics_version)(request)
+    key = (statistic, tuple(sorted(params.items())), version)
+    try:
+        if as_of is not None:
+            result = await statistics_executor.run(
+                key, historical_statistic, query, employees, as_of
+            )
+            return JsonResponse(result, safe=False)
+        if sample is not None:
+            results, description = await statistics_executor.run(
+                key, sample_statistic, query, employees, sample
+            )
+            return JsonResponse({'results': results, 'sample': description})
+        result = await sync_to_async(statistics_cache.peek)(
+            statistic, params, version
+        )
+        if result is None:
+            result = await statistics_executor.run(
+                key,
+                get_statistic,
+                statistic,
+                params,
+                partial(query.run, employees),
+                version,
+            )
+    except Overloaded as exc:
+        response = JsonResponse(
+            {'detail': str(exc)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        response['Retry-After'] = '1'
+        return response
+    except StatisticsQueryError as exc:
+        return JsonResponse(
+            {'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST
+        )
+    return JsonResponse(result, safe=False)
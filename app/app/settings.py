@@ -93,3 +93,59 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
+
+# Statistics cache: 'lru' keeps results in each process, 'django' stores
+# them in the CACHES alias below so every worker shares one copy.
+# Concurrent misses for the same statistic are computed once; with 'django'
+# workers also wait on a PostgreSQL advisory lock for up to LOCK_TIMEOUT
+# seconds. STALE_TIMEOUT > 0 serves results that old while recomputing.
+STATISTICS_CACHE = {
+    'BACKEND': os.environ.get('STATISTICS_CACHE_BACKEND', 'lru'),
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'MAX_ENTRIES': 256,
+    'LOCK_TIMEOUT': 30,
+    'STALE_TIMEOUT': int(os.environ.get('STATISTICS_STALE_TIMEOUT', 0)),
+}
+
+# Serve statistics from the summaries built by `manage.py refresh_statistics`
+# while the last refresh is younger than this many seconds; None disables it.
+STATISTICS_SUMMARY_MAX_AGE = None
+
+# Compute whole-table statistics in pandas from one in-process employee
+# DataFrame shared by every request, rebuilt after writes either by a
+# background thread ('background') or by the next reader ('lazy').
+# With FILE set, workers instead memory-map the Arrow file kept up to date by
+# `manage.py write_employee_snapshot --watch`.
+STATISTICS_SNAPSHOT = {
+    'ENABLED': os.environ.get('STATISTICS_SNAPSHOT') == '1',
+    'REFRESH': 'background',
+    'FILE': os.environ.get('STATISTICS_SNAPSHOT_FILE') or None,
+}
+
+# How ?sample= draws employees: TABLESAMPLE BERNOULLI (uniform rows) or
+# SYSTEM (whole pages, faster), and the default confidence of intervals.
+STATISTICS_SAMPLING = {
+    'METHOD': 'BERNOULLI',
+    'CONFIDENCE': 0.95,
+}
+
+# The checkpoint_employees command checkpoints the employee history for
+# ?as_of= once this many changes were logged since the last checkpoint.
+STATISTICS_HISTORY = {
+    'CHECKPOINT_EVERY': 100000,
+}
+
+# The salary trend endpoint queries this many buckets at a time, and
+# rolls them over windows of at most MAX_WINDOW buckets.
+STATISTICS_TRENDS = {
+    'CHUNK_BUCKETS': 31,
+    'MAX_WINDOW': 90,
+}
+
+# Thread pool the async statistics views compute on, and how many distinct
+# computations may wait for it before requests get a 503.
+STATISTICS_EXECUTOR = {
+    'MAX_WORKERS': int(os.environ.get('STATISTICS_WORKERS', 4)),
+    'MAX_PENDING': 64,
+}
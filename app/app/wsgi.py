@@ -14,3 +14,14 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+# Map the employee snapshot file (STATISTICS_SNAPSHOT['FILE']) up front.
+# Under `gunicorn --preload` this runs once before the workers fork, so all
+# of them share the mapped pages from their first request.
+from django.db import connections  # noqa: E402
+
+from api_pandas.snapshot import employee_snapshot  # noqa: E402
+
+employee_snapshot.preload()
+# Forked workers must not share the connection preload may have opened.
+connections.close_all()